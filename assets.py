@@ -0,0 +1,90 @@
+"""
+Preparación de las imágenes del juego.
+
+Cada imagen se carga, se escala y se convierte una sola vez al formato de
+píxel de la pantalla (convert/convert_alpha), así que los blits no tienen que
+convertir nada en cada frame. El resultado escalado se guarda en disco
+(assets/.cache) con una clave que depende del contenido del PNG original y del
+tamaño pedido: en los siguientes arranques no hace falta decodificar ni escalar
+el PNG, y si la imagen original cambia la caché se regenera sola.
+"""
+import hashlib
+import os
+import pygame
+
+ASSETS_DIR = 'assets'
+CACHE_DIR = os.path.join(ASSETS_DIR, '.cache')
+CACHE_VERSION = b'1'  # Cambiar si cambia el formato de la caché
+
+
+def source_key(path, size):
+    """
+    Clave de caché de una imagen: hash del archivo original y tamaño final.
+
+    Args:
+        path: Ruta del PNG original
+        size: Tamaño (ancho, alto) al que se escala
+
+    Returns:
+        Cadena hexadecimal
+    """
+    digest = hashlib.blake2b(CACHE_VERSION, digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    digest.update(f'{size[0]}x{size[1]}'.encode())
+    return digest.hexdigest()
+
+
+def load_scaled(path, size):
+    """
+    Devuelve la imagen escalada en RGBA, desde la caché de disco si existe.
+
+    Args:
+        path: Ruta del PNG original
+        size: Tamaño (ancho, alto) al que se escala
+
+    Returns:
+        Superficie escalada (todavía sin convertir al formato de la pantalla)
+    """
+    name = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(CACHE_DIR, f'{name}-{source_key(path, size)}.rgba')
+
+    if os.path.exists(cached):
+        with open(cached, 'rb') as f:
+            data = f.read()
+        if len(data) == size[0] * size[1] * 4:
+            return pygame.image.fromstring(data, size, 'RGBA')
+
+    image = pygame.transform.scale(pygame.image.load(path), size)
+
+    # Guardar en la caché (escritura atómica: otro proceso nunca ve un archivo a medias)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temp = f'{cached}.{os.getpid()}.tmp'
+    with open(temp, 'wb') as f:
+        f.write(pygame.image.tostring(image, 'RGBA'))
+    os.replace(temp, cached)
+    return image
+
+
+def load_sprite(filename, size, alpha=True):
+    """
+    Carga una imagen lista para dibujar: escalada y en el formato de la pantalla.
+
+    Args:
+        filename: Nombre del archivo dentro de assets
+        size: Tamaño (ancho, alto) final
+        alpha: Si la imagen tiene transparencia (convert_alpha) o no (convert)
+
+    Returns:
+        Superficie convertida
+    """
+    image = load_scaled(os.path.join(ASSETS_DIR, filename), size)
+    return image.convert_alpha() if alpha else image.convert()
+
+
+def find_background():
+    """Nombre del archivo de fondo disponible (bg.png o, si no, background.png)."""
+    for filename in ('bg.png', 'background.png'):
+        if os.path.exists(os.path.join(ASSETS_DIR, filename)):
+            return filename
+    raise FileNotFoundError('No se encontró assets/bg.png ni assets/background.png')
@@ -0,0 +1,143 @@
+"""
+Guardado automático en segundo plano.
+
+El bucle de entrenamiento solo toma una copia en memoria de lo que hay que
+guardar (el genoma del mejor jugador o un checkpoint ya serializado) y la deja
+en una cola; un hilo escritor hace todo el trabajo de disco. Así el bucle no
+espera nunca a la E/S. Los modelos van al registro de modelos (registry.py),
+que solo añade datos y da por bueno un modelo cuando su registro del índice
+está escrito, y los checkpoints sustituyen su estado con os.replace: en ambos
+casos un corte a mitad de escritura no deja archivos a medias.
+
+Cuándo se guarda es configurable: cada cierto tiempo, cada cierto número de
+generaciones y/o cada vez que mejora el mejor fitness.
+"""
+import atexit
+import queue
+import threading
+import time
+from array import array
+import registry
+
+
+class AutoSaver:
+    """
+    Programa los guardados del mejor jugador y los escribe en un hilo aparte.
+    """
+    def __init__(self, directory='models', interval=300, every_generations=None, on_best=False):
+        """
+        Args:
+            directory: Directorio del registro de modelos
+            interval: Segundos entre guardados (None = sin guardado por tiempo)
+            every_generations: Generaciones entre guardados (None = sin guardado por generaciones)
+            on_best: Guardar al terminar cada generación que mejore el mejor fitness
+        """
+        self.directory = directory
+        self.interval = interval
+        self.every_generations = every_generations
+        self.on_best = on_best
+        self.last_time = time.monotonic()  # Último guardado programado
+        self.saved_generation = None  # Generación del último guardado
+        self.saved_fitness = None     # Fitness del último guardado
+        self.generation_seen = None   # Para detectar el final de cada generación
+        self.last_model = None        # Número del último modelo escrito
+
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='autosave', daemon=True)
+        self.thread.start()
+        # Si el programa termina sin close() (p. ej. al cerrar la ventana), se
+        # terminan igualmente las escrituras pendientes
+        atexit.register(self.close)
+
+    def _run(self):
+        """Bucle del hilo escritor: ejecuta los trabajos en orden de llegada."""
+        models = None
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+            kind, payload = job
+            try:
+                if kind == 'model':
+                    if models is None:
+                        models = registry.ModelRegistry(self.directory)
+                    net, generation, fitness, size, iterations = payload
+                    self.last_model = models.save(net, generation, fitness, size, iterations)
+                    print(f"Modelo guardado como: modelo{self.last_model} ({models.data_path})")
+                else:
+                    saver, prepared = payload
+                    saver.write(prepared)
+            except Exception as e:
+                print(f"Error al guardar en segundo plano: {e}")
+            finally:
+                self.jobs.task_done()
+
+    def save(self, pop):
+        """
+        Encola el mejor jugador actual para guardarlo. Los pesos se copian aquí,
+        así que la población puede seguir evolucionando mientras se escribe.
+
+        Returns:
+            True si había un jugador que guardar
+        """
+        best = pop.best_player
+        if best is None:
+            return False
+        net = best.brain.clone()
+        net.weights = array('d', best.brain.weights)
+        self.jobs.put(('model', (net, pop.generation, pop.best_fitness, pop.size, pop.iterations_limit)))
+        self.last_time = time.monotonic()
+        self.saved_generation = pop.generation
+        self.saved_fitness = pop.best_fitness
+        return True
+
+    def checkpoint(self, saver, pop):
+        """
+        Serializa ahora (en memoria) un checkpoint de la población y encola su escritura.
+
+        Args:
+            saver: checkpoint.Checkpoint de destino
+            pop: Population entre dos generaciones
+        """
+        self.jobs.put(('checkpoint', (saver, saver.prepare(pop))))
+
+    def update(self, pop):
+        """
+        Comprueba la programación y encola un guardado si toca. Se puede llamar
+        en cada frame: el guardado por generaciones y por mejor fitness solo se
+        evalúa cuando cambia la generación.
+
+        Returns:
+            True si se encoló un guardado
+        """
+        due = self.interval is not None and time.monotonic() - self.last_time >= self.interval
+
+        if pop.generation != self.generation_seen:
+            self.generation_seen = pop.generation
+            if self.every_generations:
+                since = pop.generation - (self.saved_generation or 1)
+                due = due or since >= self.every_generations
+            if self.on_best and pop.best_fitness > (self.saved_fitness or 0):
+                due = True
+
+        if due:
+            return self.save(pop)
+        return False
+
+    def mark_saved(self, pop):
+        """Da por guardado el estado actual (p. ej. al reanudar desde un checkpoint)."""
+        self.saved_generation = pop.generation
+        self.saved_fitness = pop.best_fitness
+        self.generation_seen = pop.generation
+
+    def seconds_since_save(self):
+        return time.monotonic() - self.last_time
+
+    def close(self):
+        """Espera a que terminen las escrituras pendientes y detiene el hilo."""
+        if not self.thread.is_alive():
+            return
+        atexit.unregister(self.close)
+        self.jobs.put(None)
+        self.thread.join()
@@ -0,0 +1,192 @@
+"""
+Evaluación en lote de todos los modelos guardados.
+
+Carga todos los modelos del registro de un directorio y los simula juntos,
+sin ventana y con la simulación vectorizada, sobre un conjunto fijo de
+recorridos con semilla. Con los tiempos de vida de cada modelo en cada
+recorrido escribe una clasificación (leaderboard.csv) con la media, el mínimo
+y el máximo del tiempo de vida y de las tuberías superadas.
+
+Los resultados de cada modelo se guardan en una caché indexada por el hash
+de su topología y sus pesos (y por los recorridos y el límite de frames), así
+que en las siguientes ejecuciones solo se simulan los modelos nuevos.
+
+Uso:
+    python benchmark.py --models models --courses 5 --max-frames 20000
+"""
+import os
+
+# El driver de vídeo debe elegirse antes de que config cree la ventana
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import csv
+import hashlib
+import json
+import time
+import numpy as np
+import config
+import components
+import events
+import registry
+import vectorized
+
+CACHE_FILE = 'benchmark_cache.json'
+LEADERBOARD_FILE = 'leaderboard.csv'
+
+
+def model_key(topology, weights):
+    """Hash del contenido de un modelo (dos modelos iguales comparten resultado)."""
+    return hashlib.blake2b(topology + weights, digest_size=16).hexdigest()
+
+
+def score(brains, course_seeds, max_frames):
+    """
+    Simula todos los cerebros a la vez en cada recorrido.
+
+    Args:
+        brains: Lista de cerebros (pueden tener topologías distintas)
+        course_seeds: Semillas de los recorridos
+        max_frames: Límite de frames por recorrido
+
+    Returns:
+        Matriz (modelos x recorridos) de tiempos de vida
+    """
+    lifespans = np.zeros((len(brains), len(course_seeds)), dtype=np.int64)
+    if not brains:
+        return lifespans
+    ground = components.Ground(config.win_width)
+    batch = vectorized.BatchBrains.from_brains(brains)
+    for j, seed in enumerate(course_seeds):
+        sim = vectorized.BatchSimulation(batch)
+        vectorized.simulate(sim, config.win_width, ground, components.PipeCourse.get(seed), max_frames)
+        lifespans[:, j] = sim.lifespan
+    return lifespans
+
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print(f"Caché de evaluación ilegible, se ignora: {path}")
+        return {}
+
+
+def write_atomic(path, write):
+    """Escribe un archivo de texto en un temporal y lo sustituye con os.replace."""
+    temp = f'{path}.{os.getpid()}.tmp'
+    with open(temp, 'w', newline='') as f:
+        write(f)
+    os.replace(temp, path)
+
+
+def benchmark(directory='models', courses=5, first_course=0, max_frames=20000, top=20):
+    """
+    Evalúa y clasifica todos los modelos del directorio.
+
+    Args:
+        directory: Directorio del registro de modelos
+        courses: Número de recorridos
+        first_course: Semilla del primer recorrido (los demás, consecutivas)
+        max_frames: Límite de frames por recorrido (los modelos que no mueren
+                    se quedan con este tiempo de vida)
+        top: Número de modelos que se muestran por pantalla
+
+    Returns:
+        Lista de filas de la clasificación, de mejor a peor
+    """
+    start = time.perf_counter()
+    models = registry.ModelRegistry(directory)
+    models.import_legacy()
+    entries = models.models()
+    course_seeds = list(range(first_course, first_course + courses))
+
+    # Los resultados dependen de los recorridos y del límite de frames
+    cache_path = os.path.join(directory, CACHE_FILE)
+    cache = load_cache(cache_path)
+    settings = f"{','.join(map(str, course_seeds))}|{max_frames}"
+    known = cache.setdefault(settings, {})
+
+    keys = []
+    cached = 0
+    pending = {}  # Hash -> cerebro de los modelos que hay que simular
+    for model in entries:
+        topology, weights = models.read(model)
+        key = model_key(topology, weights)
+        keys.append(key)
+        if key in known:
+            cached += 1
+        elif key not in pending:
+            # Los modelos repetidos (mismos pesos) se simulan una sola vez
+            pending[key] = models.make_brain(topology, weights)
+
+    lifespans = score(list(pending.values()), course_seeds, max_frames)
+    for key, row in zip(pending, lifespans.tolist()):
+        known[key] = row
+    if pending:
+        os.makedirs(directory, exist_ok=True)
+        write_atomic(cache_path, lambda f: json.dump(cache, f))
+
+    rows = []
+    for model, key in zip(entries, keys):
+        lives = known[key]
+        pipes = [events.pipes_passed(life) for life in lives]
+        rows.append({
+            'modelo': model.id,
+            'generacion': model.generation,
+            'fitness': model.fitness,
+            'vida_media': sum(lives) / len(lives),
+            'vida_min': min(lives),
+            'vida_max': max(lives),
+            'tuberias_media': sum(pipes) / len(pipes),
+            'tuberias_min': min(pipes),
+            'tuberias_max': max(pipes),
+        })
+    rows.sort(key=lambda row: (row['vida_media'], row['vida_min']), reverse=True)
+
+    if rows:
+        def write(f):
+            writer = csv.writer(f)
+            writer.writerow(['posicion'] + list(rows[0]))
+            for position, row in enumerate(rows, 1):
+                writer.writerow([position] + list(row.values()))
+        write_atomic(os.path.join(directory, LEADERBOARD_FILE), write)
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(entries)} modelos en {courses} recorridos ({len(pending)} simulados, "
+          f"{cached} desde la caché) en {elapsed:.2f}s")
+    print(f"{'Pos':>4} {'Modelo':>8} {'Gen':>6} {'Vida media':>11} {'Mín':>7} {'Máx':>7} {'Tuberías':>9}")
+    for position, row in enumerate(rows[:top], 1):
+        print(f"{position:>4} {'modelo' + str(row['modelo']):>8} {row['generacion']:>6} "
+              f"{row['vida_media']:>11.1f} {row['vida_min']:>7} {row['vida_max']:>7} "
+              f"{row['tuberias_media']:>9.1f}")
+    if rows:
+        print(f"Clasificación completa en {os.path.join(directory, LEADERBOARD_FILE)}")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluación en lote de los modelos guardados')
+    parser.add_argument('--models', default='models',
+                        help='Directorio de los modelos (por defecto models)')
+    parser.add_argument('--courses', type=int, default=5,
+                        help='Número de recorridos con semilla (por defecto 5)')
+    parser.add_argument('--first-course', type=int, default=0,
+                        help='Semilla del primer recorrido')
+    parser.add_argument('--max-frames', type=int, default=20000,
+                        help='Límite de frames por recorrido (por defecto 20000)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='Modelos que se muestran por pantalla')
+    args = parser.parse_args()
+    if args.courses < 1:
+        parser.error('--courses debe ser al menos 1')
+    if args.max_frames < 1:
+        parser.error('--max-frames debe ser al menos 1')
+    benchmark(args.models, args.courses, args.first_course, args.max_frames, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,50 +1,270 @@
 import node  # Importa el módulo que define los nodos de la red neuronal
 import connection  # Importa el módulo que define las conexiones entre nodos
 import random  # Para generar valores aleatorios en los pesos iniciales
+import math  # Para la función exponencial de la sigmoide
+import hashlib  # Para la clave de cada topología
+import weakref  # Para no retener los planes que ya no usa ningún cerebro
+from array import array  # Array contiguo de floats para los pesos
+import numpy as np  # Para apilar pesos de muchos cerebros
+
+
+class NetworkPlan:
+    """
+    Topología compilada de una red neuronal.
+    Guarda los nodos y conexiones como índices planos y un orden de evaluación
+    precalculado, de modo que la propagación no necesita recorrer objetos.
+    Es inmutable y se comparte entre todos los cerebros con la misma topología.
+    """
+    def __init__(self, inputs, nodes, connections, layers):
+        """
+        Compila una topología a partir de su grafo de nodos y conexiones.
+
+        Args:
+            inputs: Número de nodos de entrada
+            nodes: Lista de nodos (el orden define el índice de cada nodo)
+            connections: Lista de conexiones (el orden define el índice de cada peso)
+            layers: Número de capas de la red
+        """
+        self.inputs = inputs
+        self.layers = layers
+        self.node_ids = [n.id for n in nodes]
+        self.node_layers = [n.layer for n in nodes]
+        index = {n.id: i for i, n in enumerate(nodes)}  # ID de nodo -> índice
+
+        self.conn_from = [index[c.from_node.id] for c in connections]
+        self.conn_to = [index[c.to_node.id] for c in connections]
+        self.conn_enabled = [c.enabled for c in connections]
+        # Identidad de cada conexión (ID de origen, ID de destino), para comparar genomas
+        self.genes = [(c.from_node.id, c.to_node.id) for c in connections]
+        self.bias = index[inputs]          # El nodo bias tiene el ID siguiente a las entradas
+        self.output = index[inputs + 1]    # Y el nodo de salida el siguiente
+        # Los nodos ocultos añadidos por mutación tienen IDs a partir de inputs + 2
+        self.key = topology_key(inputs, layers, self.node_ids, self.node_layers,
+                                self.conn_from, self.conn_to, self.conn_enabled)
+
+        # Orden de activación: por capas y, dentro de cada capa, en el orden de la lista
+        net = [i for j in range(layers) for i in range(len(nodes)) if self.node_layers[i] == j]
+        position = {n: k for k, n in enumerate(net)}
+
+        # Conexiones entrantes de cada nodo en el mismo orden en que Node.activate
+        # las acumularía (nodo de origen según el orden de activación).
+        # Las conexiones desactivadas (divididas por add_node) no se evalúan
+        incoming = [[] for _ in nodes]
+        for c in sorted(range(len(connections)), key=lambda c: (position[self.conn_from[c]], c)):
+            if self.conn_enabled[c]:
+                incoming[self.conn_to[c]].append((c, self.conn_from[c]))
+
+        # Solo los nodos que no son de entrada necesitan evaluarse
+        self.order = [(n, tuple(incoming[n])) for n in net if self.node_layers[n] > 0]
+
+    def build_graph(self, weights):
+        """
+        Reconstruye los objetos Node y Connection de esta topología.
+
+        Args:
+            weights: Pesos de las conexiones
+
+        Returns:
+            Tupla (nodos, conexiones)
+        """
+        nodes = []
+        for node_id, layer in zip(self.node_ids, self.node_layers):
+            n = node.Node(node_id)
+            n.layer = layer
+            nodes.append(n)
+
+        connections = []
+        for c in range(len(self.conn_from)):
+            conn = connection.Connection(nodes[self.conn_from[c]], nodes[self.conn_to[c]], weights[c])
+            conn.enabled = self.conn_enabled[c]
+            connections.append(conn)
+        return nodes, connections
+
+    def describe(self):
+        """
+        Descripción de la topología como filas de texto (para guardarla en CSV).
+
+        Returns:
+            Lista de filas: ['red', entradas, capas], ['nodo', id, capa] y
+            ['conexion', id origen, id destino, activa]
+        """
+        rows = [['red', self.inputs, self.layers]]
+        rows += [['nodo', i, layer] for i, layer in zip(self.node_ids, self.node_layers)]
+        rows += [['conexion', self.node_ids[f], self.node_ids[t], int(e)]
+                 for f, t, e in zip(self.conn_from, self.conn_to, self.conn_enabled)]
+        return rows
+
+
+def topology_key(inputs, layers, node_ids, node_layers, conn_from, conn_to, conn_enabled):
+    """Huella corta de una topología: dos planes con la misma clave son equivalentes."""
+    text = repr((inputs, layers, node_ids, node_layers, conn_from, conn_to, conn_enabled))
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+# Planes compilados por clave de topología (se comparten entre cerebros). Un plan
+# sigue en la tabla mientras algún cerebro lo use, así que dos cerebros con la
+# misma topología siempre tienen el mismo objeto plan
+_plans = weakref.WeakValueDictionary()
+
+
+def compile_plan(inputs, nodes, connections, layers):
+    """
+    Compila una topología, reutilizando el plan si ya se compiló una igual.
+    Así todos los cerebros con la misma topología comparten el mismo objeto
+    NetworkPlan y pueden evaluarse (o cruzarse) juntos.
+    """
+    return intern_plan(NetworkPlan(inputs, nodes, connections, layers))
+
+
+def intern_plan(plan):
+    """
+    Devuelve el plan compartido con la misma topología que `plan` (p. ej. uno
+    recibido de otro proceso), registrándolo si es la primera vez que aparece.
+    """
+    return _plans.setdefault(plan.key, plan)
+
+
+def plan_from_rows(rows):
+    """
+    Reconstruye un plan a partir de NetworkPlan.describe().
+
+    Returns:
+        Tupla (plan, nodos, conexiones); las conexiones tienen peso 0
+    """
+    inputs = layers = None
+    nodes = {}
+    connections = []
+    for row in rows:
+        if row[0] == 'red':
+            inputs, layers = int(row[1]), int(row[2])
+        elif row[0] == 'nodo':
+            n = node.Node(int(row[1]))
+            n.layer = int(row[2])
+            nodes[n.id] = n
+        elif row[0] == 'conexion':
+            conn = connection.Connection(nodes[int(row[1])], nodes[int(row[2])], 0)
+            conn.enabled = bool(int(row[3]))
+            connections.append(conn)
+    nodes = list(nodes.values())
+    return compile_plan(inputs, nodes, connections, layers), nodes, connections
+
+
+def default_graph(inputs, hidden=()):
+    """
+    Crea el grafo por defecto: cada capa conectada por completo con la
+    siguiente y el bias conectado a todos los nodos que no son de entrada.
+    Sin capas ocultas, cada entrada y el bias se conectan a la salida.
+
+    Args:
+        inputs: Número de nodos de entrada
+        hidden: Número de nodos de cada capa oculta (p. ej. (4,) o (6, 3))
+
+    Returns:
+        Tupla (nodos, conexiones) con pesos a 0
+    """
+    nodes = []
+    # Crear nodos de entrada (3 nodos para las distancias a las tuberías)
+    for i in range(0, inputs):
+        nodes.append(node.Node(i))  # Crear un nodo con ID único
+        nodes[i].layer = 0  # Todos en la capa 0 (entrada)
+
+    # Crear nodo de sesgo (bias) siempre con valor 1
+    bias = node.Node(inputs)
+    bias.layer = 0  # También en la capa de entrada
+    nodes.append(bias)
+
+    # Crear nodo de salida (decide si aletear o no), en la última capa
+    output = node.Node(inputs + 1)
+    output.layer = len(hidden) + 1
+    nodes.append(output)
+
+    # Crear nodos ocultos (IDs a partir de inputs + 2)
+    layers = [nodes[:inputs]]
+    for depth, size in enumerate(hidden):
+        layer = []
+        for _ in range(size):
+            n = node.Node(len(nodes))
+            n.layer = depth + 1
+            nodes.append(n)
+            layer.append(n)
+        layers.append(layer)
+    layers.append([output])
+
+    # Crear conexiones: cada nodo de una capa (y el bias) conecta con los de la siguiente
+    connections = []
+    for previous, layer in zip(layers, layers[1:]):
+        for target in layer:
+            for source in previous + [bias]:
+                connections.append(connection.Connection(source, target, 0))
+    return nodes, connections
+
+
+_default_plans = {}  # Planes por defecto ya compilados, por entradas y capas ocultas
+
+
+def default_plan(inputs, hidden=()):
+    """Devuelve (compilándolo una sola vez) el plan de la topología por defecto."""
+    hidden = tuple(hidden)
+    if (inputs, hidden) not in _default_plans:
+        nodes, connections = default_graph(inputs, hidden)
+        _default_plans[inputs, hidden] = compile_plan(inputs, nodes, connections, len(hidden) + 2)
+    return _default_plans[inputs, hidden]
+
+
+def weight_matrix(brains):
+    """
+    Apila los pesos de varios cerebros con la misma topología en una matriz
+    NumPy (cerebros x conexiones), copiando directamente los bytes de cada array.
+    """
+    data = b''.join([b.weights.tobytes() for b in brains])
+    return np.frombuffer(data, dtype=np.float64).reshape(len(brains), -1).copy()
 
 
 class Brain:
     """
-    La clase Brain implementa una red neuronal simple de topología fija.
-    Representa el cerebro de cada jugador (pájaro) y toma decisiones basadas en la información visual.
+    La clase Brain implementa la red neuronal de cada jugador (pájaro) y toma
+    decisiones basadas en la información visual. Empieza con la topología por
+    defecto (con o sin capas ocultas) y puede crecer con add_node/add_connection.
+
+    Internamente la red está compilada: un array contiguo de pesos más un plan de
+    evaluación compartido (NetworkPlan). Los objetos Node y Connection solo se
+    crean si alguien accede a nodes/connections.
     """
-    def __init__(self, inputs, clone=False):
+    def __init__(self, inputs, clone=False, hidden=()):
         """
         Inicializa la red neuronal.
-        
+
         Args:
             inputs: Número de nodos de entrada (sensores de visión del pájaro)
             clone: Bandera que indica si este cerebro es un clon (para reproducción)
+            hidden: Número de nodos de cada capa oculta (vacío = entradas conectadas a la salida)
         """
-        self.connections = []  # Lista de conexiones entre nodos
-        self.nodes = []  # Lista de todos los nodos en la red
         self.inputs = inputs  # Número de entradas (3 en este caso)
-        self.net = []  # Lista ordenada de nodos para propagación hacia adelante
-        self.layers = 2  # Número de capas en la red (entrada y salida)
-
-        # Si no es un clon, crear una nueva red desde cero
-        if not clone:
-            # Crear nodos de entrada (3 nodos para las distancias a las tuberías)
-            for i in range(0, self.inputs):
-                self.nodes.append(node.Node(i))  # Crear un nodo con ID único
-                self.nodes[i].layer = 0  # Todos en la capa 0 (entrada)
-                
-            # Crear nodo de sesgo (bias) siempre con valor 1
-            self.nodes.append(node.Node(3))
-            self.nodes[3].layer = 0  # También en la capa de entrada
-            
-            # Crear nodo de salida (decide si aletear o no)
-            self.nodes.append(node.Node(4))
-            self.nodes[4].layer = 1  # En la capa 1 (salida)
-
-            # Crear conexiones: cada nodo de entrada conecta directamente al nodo de salida
-            for i in range(0, 4):  # Para los 3 nodos de entrada + nodo bias
-                # Crear conexión con peso aleatorio entre -1 y 1
-                self.connections.append(connection.Connection(
-                    self.nodes[i],  # Nodo de origen
-                    self.nodes[4],  # Nodo de destino (salida)
-                    random.uniform(-1, 1)  # Peso aleatorio inicial
-                ))
+        self.plan = default_plan(inputs, hidden)  # Topología compilada (compartida)
+        self.layers = self.plan.layers  # Número de capas en la red (entrada, ocultas y salida)
+        self._nodes = None  # Grafo de objetos, creado solo bajo demanda
+        self._connections = None
+
+        if clone:
+            # El clon recibe sus pesos de Brain.clone
+            self.weights = array('d')
+        else:
+            # Crear conexiones con peso aleatorio entre -1 y 1
+            self.weights = array('d', [random.uniform(-1, 1) for _ in self.plan.conn_from])
+
+    @property
+    def nodes(self):
+        """Lista de todos los nodos de la red (se construye bajo demanda)."""
+        if self._nodes is None:
+            self._nodes, self._connections = self.plan.build_graph(self.weights)
+        return self._nodes
+
+    @property
+    def connections(self):
+        """Lista de conexiones entre nodos (se construye bajo demanda)."""
+        if self._connections is None:
+            self._nodes, self._connections = self.plan.build_graph(self.weights)
+        return self._connections
 
     def connect_nodes(self):
         """
@@ -62,80 +282,75 @@ class Brain:
     def generate_net(self):
         """
         Prepara la red para hacer propagación hacia adelante.
-        Ordena los nodos por capas para procesamiento secuencial.
+        Si se modificó el grafo de objetos (nodes/connections), lo vuelve a
+        compilar en el plan y el array de pesos. Si no, no hay nada que hacer.
+        Después el grafo se descarta (se reconstruye desde el plan si alguien
+        lo vuelve a pedir), para que clone() y mutate() no recompilen.
         """
-        self.connect_nodes()  # Primero establecer las conexiones
-        self.net = []  # Reiniciar la lista de nodos ordenados
-        
-        # Recorrer cada capa y añadir sus nodos a la lista ordenada
-        for j in range(0, self.layers):
-            for i in range(0, len(self.nodes)):
-                if self.nodes[i].layer == j:
-                    self.net.append(self.nodes[i])
+        if self._connections is None:
+            return
+        self.connect_nodes()
+        self.plan = compile_plan(self.inputs, self._nodes, self._connections, self.layers)
+        self.weights = array('d', [c.weight for c in self._connections])
+        self._nodes = None
+        self._connections = None
 
     def feed_forward(self, vision):
         """
         Realiza la propagación hacia adelante en la red neuronal.
-        
+
         Args:
             vision: Lista con los valores de entrada (distancias normalizadas)
-            
+
         Returns:
             Valor de salida del nodo final (entre 0 y 1)
         """
+        plan = self.plan
+        weights = self.weights
+        values = [0] * len(plan.node_ids)
+
         # Establecer los valores de entrada (visión) en los nodos de entrada
         for i in range(0, self.inputs):
-            self.nodes[i].output_value = vision[i]
+            values[i] = vision[i]
 
         # El nodo bias siempre tiene valor 1
-        self.nodes[3].output_value = 1
-
-        # Activar todos los nodos en orden por capas
-        for i in range(0, len(self.net)):
-            self.net[i].activate()  # Cada nodo sumará sus entradas y aplicará función sigmoide
-
-        # Obtener el valor de salida del nodo final
-        output_value = self.nodes[4].output_value
+        values[plan.bias] = 1
 
-        # Reiniciar los valores de entrada para la próxima iteración
-        for i in range(0, len(self.nodes)):
-            self.nodes[i].input_value = 0
+        # Evaluar los nodos en el orden precalculado: suma ponderada + sigmoide
+        for n, incoming in plan.order:
+            total = 0
+            for c, source in incoming:
+                total += weights[c] * values[source]
+            values[n] = 1 / (1 + math.exp(-total))
 
-        return output_value  # Retorna valor entre 0 y 1
+        return values[plan.output]  # Retorna valor entre 0 y 1
 
     def clone(self):
         """
         Crea una copia exacta de este cerebro.
         Utilizado en el proceso de reproducción y evolución.
-        
+        El plan de evaluación y el array de pesos se comparten (copia en
+        escritura): mutate() crea un array nuevo antes de modificar pesos, así
+        que los clones que no mutan nunca copian sus pesos.
+
         Returns:
             Un nuevo objeto Brain que es copia de este
         """
+        if self._connections is not None:
+            self.generate_net()  # Incorporar cambios pendientes del grafo
         clone = Brain(self.inputs, True)  # Crear cerebro vacío
-
-        # Clonar todos los nodos
-        for n in self.nodes:
-            clone.nodes.append(n.clone())
-
-        # Clonar todas las conexiones
-        # Nota: Debemos asegurarnos de que las conexiones apunten a los nodos del clon, no del original
-        for c in self.connections:
-            clone.connections.append(c.clone(
-                clone.getNode(c.from_node.id),  # Buscar nodo de origen en el clon
-                clone.getNode(c.to_node.id)     # Buscar nodo de destino en el clon
-            ))
-
+        clone.plan = self.plan
         clone.layers = self.layers
-        clone.connect_nodes()  # Establecer conexiones en el clon
+        clone.weights = self.weights  # Compartido hasta que alguno mute
         return clone
 
     def getNode(self, id):
         """
         Busca un nodo por su ID.
-        
+
         Args:
             id: Identificador único del nodo
-            
+
         Returns:
             El nodo con ese ID o None si no se encuentra
         """
@@ -151,6 +366,82 @@ class Brain:
         Parte fundamental del algoritmo genético.
         """
         if random.uniform(0, 1) < 0.8:  # 80% de probabilidad de mutación
-            # Mutar todos los pesos de las conexiones
-            for i in range(0, len(self.connections)):
-                self.connections[i].mutate_weight()  # Cada conexión aplica su propia lógica de mutación
\ No newline at end of file
+            if self._connections is not None:
+                self.generate_net()  # Incorporar cambios pendientes del grafo
+            # Mutar todos los pesos en un array nuevo (puede estar compartido con clones)
+            weights = array('d', self.weights)
+            for i in range(0, len(weights)):
+                weights[i] = connection.mutate_weight(weights[i])
+            self.weights = weights
+            # El grafo de objetos (si existía) ya no refleja los pesos
+            self._nodes = None
+            self._connections = None
+
+    def set_plan(self, plan):
+        """
+        Cambia la topología del cerebro por la de un plan compilado; los pesos
+        quedan a 0 hasta que se carguen.
+        """
+        self.plan = plan
+        self.inputs = plan.inputs
+        self.layers = plan.layers
+        self.weights = array('d', bytes(8 * len(plan.conn_from)))
+        self._nodes = None
+        self._connections = None
+
+    def add_node(self, rng):
+        """
+        Mutación estructural: divide una conexión activa con un nodo nuevo.
+        La conexión original se desactiva y se sustituye por origen -> nuevo
+        (peso 1) y nuevo -> destino (peso original), más el bias -> nuevo (peso 0),
+        de modo que al principio la red se comporta casi igual.
+
+        Args:
+            rng: Generador de NumPy (np.random.Generator)
+
+        Returns:
+            True si se añadió el nodo
+        """
+        bias = self.getNode(self.inputs)
+        candidates = [c for c in self.connections if c.enabled and c.from_node is not bias]
+        if not candidates:
+            return False
+        split = candidates[int(rng.integers(len(candidates)))]
+        split.enabled = False
+
+        new_node = node.Node(max(n.id for n in self.nodes) + 1)
+        new_node.layer = split.from_node.layer + 1
+        if new_node.layer == split.to_node.layer:
+            # No hay capa libre entre origen y destino: desplazar las capas siguientes
+            for n in self.nodes:
+                if n.layer >= new_node.layer:
+                    n.layer += 1
+            self.layers += 1
+        self.nodes.append(new_node)
+
+        self.connections.append(connection.Connection(split.from_node, new_node, 1))
+        self.connections.append(connection.Connection(new_node, split.to_node, split.weight))
+        self.connections.append(connection.Connection(bias, new_node, 0))
+        self.generate_net()
+        return True
+
+    def add_connection(self, rng):
+        """
+        Mutación estructural: conecta dos nodos de capas distintas que aún no
+        estaban conectados (de la capa menor a la mayor), con peso aleatorio.
+
+        Args:
+            rng: Generador de NumPy (np.random.Generator)
+
+        Returns:
+            True si se añadió la conexión
+        """
+        existing = {(c.from_node.id, c.to_node.id) for c in self.connections}
+        candidates = [(a, b) for a in self.nodes for b in self.nodes
+                      if a.layer < b.layer and (a.id, b.id) not in existing]
+        if not candidates:
+            return False
+        a, b = candidates[int(rng.integers(len(candidates)))]
+        self.connections.append(connection.Connection(a, b, float(rng.uniform(-1, 1))))
+        self.generate_net()
+        return True
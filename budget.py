@@ -0,0 +1,246 @@
+"""
+Reglas de corte de una generación.
+
+Una generación termina cuando mueren todos los pájaros; si alguno aprende a no
+morir nunca, la evaluación no termina. GenerationBudget permite cortarla antes
+con cualquier combinación de:
+
+- un límite de frames o de tuberías superadas (el de tuberías se convierte en
+  el frame en el que se supera esa tubería),
+- un límite de tiempo real por generación,
+- un corte anticipado cuando los pájaros vivos ya no pueden cambiar el
+  resultado de la selección: queda un solo genoma vivo (o varias copias
+  idénticas, que morirían a la vez) y su tiempo de vida ya supera el mejor
+  fitness, el de referencia de todas las especies y el heredado de cualquier
+  jugador. A partir de ahí seguir simulando solo hace crecer su fitness: el
+  campeón de su especie, el estancamiento, el orden de las especies y el
+  mejor jugador ya no cambian.
+
+Todas las reglas cortan igual: si la generación se detiene en el frame F, el
+tiempo de vida (y por tanto el fitness) de cada pájaro pasa a ser
+min(tiempo de vida, F), exactamente lo que habría dado la simulación por
+frames detenida en ese frame. Así todos los motores obtienen el mismo
+resultado con el mismo recorrido (salvo con el límite de tiempo, que depende
+de la velocidad de la máquina).
+"""
+import time
+import events
+
+# Los motores que no avanzan frame a frame (eventos, procesos en paralelo)
+# simulan por rondas hasta un horizonte que se duplica en cada ronda
+FIRST_HORIZON = 1024
+
+
+def same_genome(brain_1, brain_2):
+    """True si los dos cerebros tienen la misma topología y los mismos pesos."""
+    return brain_1.plan.key == brain_2.plan.key and brain_1.weights == brain_2.weights
+
+
+def decided_frame(players, threshold, others=0):
+    """
+    Frame en el que la simulación por frames cortaría la generación porque la
+    selección ya está decidida, calculado a partir de los tiempos de vida.
+
+    Args:
+        players: Jugadores ya simulados (los que siguen vivos, hasta el mismo frame)
+        threshold: Tiempo de vida que debe superar el último genoma vivo
+        others: Mayor tiempo de vida de los jugadores que no están en la lista
+
+    Returns:
+        Número de frame, o None si la selección no se decide antes de que se
+        acaben los tiempos de vida conocidos
+    """
+    if not players:
+        return None
+    longest = max(p.lifespan for p in players)
+    survivor = next(p for p in players if p.lifespan == longest).brain
+    rest = [p.lifespan for p in players if not same_genome(p.brain, survivor)]
+    # Tras el frame n siguen vivos los pájaros con tiempo de vida >= n
+    frame = max(rest + [others, threshold]) + 1
+    return frame if frame <= longest else None
+
+
+class GenerationBudget:
+    """
+    Límites de una generación. Se llama a start() al empezar cada generación,
+    a exhausted() tras cada frame (o a los métodos de las rondas en los
+    motores que no van frame a frame) y a finish() al terminar.
+    """
+    def __init__(self, max_frames=None, max_pipes=None, max_seconds=None, early_stop=False):
+        """
+        Args:
+            max_frames: Frames como máximo por generación (None = sin límite)
+            max_pipes: Tuberías superadas como máximo (None = sin límite)
+            max_seconds: Segundos de tiempo real por generación (None = sin límite)
+            early_stop: Cortar cuando los vivos ya no pueden cambiar la selección
+        """
+        self.max_pipes = max_pipes
+        self.max_seconds = max_seconds
+        self.early_stop = early_stop
+        self.frame_limit = max_frames
+        self.limit_reason = 'límite de frames'
+        if max_pipes is not None:
+            pipe_frames = events.frames_for_pipes(max_pipes)
+            if max_frames is None or pipe_frames < max_frames:
+                self.frame_limit = pipe_frames
+                self.limit_reason = 'límite de tuberías'
+
+        self.deadline = None  # time.monotonic() en el que se acaba el tiempo
+        self.threshold = 0    # Tiempo de vida que debe superar el último genoma vivo
+        self.settled = 0      # Mayor tiempo de vida de los jugadores ya resueltos
+        self.stopped = None   # Frame en el que se cortó la última generación
+        self.reason = None    # Motivo del corte
+
+    @property
+    def rounds(self):
+        """True si los motores que no van frame a frame deben simular por rondas."""
+        return self.max_seconds is not None or self.early_stop
+
+    def horizon(self, limit=None, previous=None, players=None):
+        """
+        Horizonte de la siguiente ronda en los motores que no van frame a frame.
+
+        Args:
+            limit: Límite de frames del motor (None = sin límite)
+            previous: Horizonte de la ronda anterior (None = primera ronda)
+            players: Jugadores simulados hasta `previous` (opcional). Si solo
+                     sigue vivo un genoma, la ronda termina en el frame en el
+                     que el corte anticipado lo decidiría, en lugar de seguir
+                     simulándolo hasta el doble del horizonte
+
+        Returns:
+            Frame hasta el que simular (None = hasta que mueran todos)
+        """
+        if not self.rounds:
+            return limit
+        horizon = FIRST_HORIZON if previous is None else previous * 2
+        if self.early_stop and previous is not None and players:
+            survivors = [p for p in players if p.lifespan >= previous]
+            if survivors and all(same_genome(p.brain, survivors[0].brain) for p in survivors):
+                survivor = survivors[0].brain
+                rest = [p.lifespan for p in players if not same_genome(p.brain, survivor)]
+                decided = max(rest + [self.settled, self.threshold]) + 1
+                horizon = min(horizon, max(decided, previous + 1))
+        return horizon if limit is None else min(horizon, limit)
+
+    def label(self):
+        """Texto de las reglas de corte para el HUD."""
+        rules = []
+        if self.limit_reason == 'límite de tuberías':
+            rules.append(f"{self.max_pipes} tuberías")
+        elif self.frame_limit is not None:
+            rules.append(f"{self.frame_limit} frames")
+        if self.max_seconds is not None:
+            rules.append(f"{self.max_seconds:g}s")
+        if self.early_stop:
+            rules.append("selección decidida")
+        return "Corte: " + (", ".join(rules) if rules else "ninguno")
+
+    def start(self, pop):
+        """
+        Prepara el corte de una nueva generación.
+
+        Args:
+            pop: Población a punto de evaluarse (los jugadores ya resueltos por
+                 la caché deben estar marcados como muertos)
+        """
+        self.deadline = None if self.max_seconds is None else time.monotonic() + self.max_seconds
+        # El umbral se fija al empezar, para que no dependa del orden de simulación
+        self.threshold = max([pop.best_fitness] + [s.benchmark_fitness for s in pop.species] +
+                             [p.fitness for p in pop.players])
+        self.settled = max([p.lifespan for p in pop.players if not p.alive], default=0)
+        self.stopped = None
+        self.reason = None
+
+    def remaining(self):
+        """Segundos que quedan de la generación (None = sin límite de tiempo)."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def expired(self):
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.reason = 'límite de tiempo'
+            return True
+        return False
+
+    def exhausted(self, frame, survivors):
+        """
+        Comprueba, tras simular un frame, si hay que cortar la generación.
+
+        Args:
+            frame: Frames simulados (el tiempo de vida de los pájaros vivos)
+            survivors: Función que devuelve los cerebros de los pájaros vivos
+                       (solo se llama si el corte anticipado puede aplicarse)
+
+        Returns:
+            True si hay que detener la simulación en este frame
+        """
+        if self.frame_limit is not None and frame >= self.frame_limit:
+            self.reason = self.limit_reason
+            return True
+        if self.expired():
+            return True
+        if self.early_stop and frame > self.threshold and frame > self.settled:
+            brains = survivors()
+            if brains and all(same_genome(b, brains[0]) for b in brains):
+                self.reason = 'selección decidida'
+                return True
+        return False
+
+    def decided(self, players):
+        """Frame de corte anticipado según los tiempos de vida (ver decided_frame)."""
+        if not self.early_stop:
+            return None
+        frame = decided_frame(players, self.threshold, self.settled)
+        if frame is not None:
+            self.reason = 'selección decidida'
+        return frame
+
+    def finish(self, players, stopped=None):
+        """
+        Aplica el corte a todos los jugadores de la generación y los da por muertos.
+        También resuelve el corte anticipado con los jugadores que no se
+        simularon (los de la caché), que la simulación no ve.
+
+        Args:
+            players: Todos los jugadores de la generación
+            stopped: Frame en el que se detuvo la simulación con pájaros vivos
+                     (None = terminó porque murieron todos)
+
+        Returns:
+            Frame de corte (o None si la generación no se cortó)
+        """
+        if stopped is None and self.frame_limit is not None and \
+                any(p.lifespan >= self.frame_limit for p in players):
+            # Los que llegaron al límite los resolvió la caché: el corte es el mismo
+            stopped = self.frame_limit
+            self.reason = self.limit_reason
+        if stopped is not None:
+            if self.reason is None:
+                self.reason = self.limit_reason  # Los motores por rondas solo informan del frame
+            for p in players:
+                if p.lifespan > stopped:
+                    p.lifespan = stopped
+        if self.early_stop:
+            decided = decided_frame(players, self.threshold)
+            if decided is not None and (stopped is None or decided < stopped):
+                stopped = decided
+                self.reason = 'selección decidida'
+                for p in players:
+                    if p.lifespan > stopped:
+                        p.lifespan = stopped
+        for p in players:
+            p.alive = False
+        self.stopped = stopped
+        return stopped
+
+    def cutoff(self):
+        """
+        Tiempo de vida a partir del cual un resultado de la última generación no
+        vale para la caché de fitness (None = todos valen). Los cortados por el
+        límite de frames valen, porque la caché separa los resultados por límite.
+        """
+        if self.stopped is None or self.reason == self.limit_reason:
+            return None
+        return self.stopped
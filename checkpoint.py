@@ -0,0 +1,339 @@
+"""
+Checkpoints del entrenamiento.
+
+Guardan el estado evolutivo completo de una Population entre generaciones:
+genomas de todos los jugadores, especies (representante, campeón, fitness de
+referencia y estancamiento), mejor jugador, contador de generaciones y el
+estado de los generadores aleatorios (random y el de GeneticOperators). Al
+reanudar, el entrenamiento sigue exactamente donde se quedó.
+
+El checkpoint es un directorio con dos archivos binarios:
+
+- genomes-N.bin: almacén de pesos y topologías en el que solo se añaden datos.
+  Cada bloque se identifica por su contenido, así que en cada checkpoint solo se
+  escriben los genomas nuevos (los campeones clonados y los hijos sin mutar
+  ya están guardados). Cuando la mayor parte del archivo son bloques que ya no
+  se usan, se reescribe en un archivo nuevo (N + 1).
+- state.bin: estado de la población, con referencias (posición, longitud) a
+  los bloques del almacén. Se escribe en un archivo temporal y se sustituye
+  con os.replace, de modo que un corte a mitad de escritura deja intacto el
+  checkpoint anterior (los datos añadidos al almacén tras él se ignoran).
+"""
+import csv
+import io
+import os
+import random
+import struct
+from array import array
+import numpy as np
+import brain
+import player
+import species
+
+MAGIC = b'FBCK'
+VERSION = 1
+STATE_FILE = 'state.bin'
+
+
+class _Writer:
+    """Serializa campos de tamaño fijo en little-endian."""
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+    def pack(self, fmt, *values):
+        self.buffer.write(struct.pack('<' + fmt, *values))
+
+    def text(self, value):
+        data = value.encode()
+        self.pack('I', len(data))
+        self.buffer.write(data)
+
+    def getvalue(self):
+        return self.buffer.getvalue()
+
+
+class _Reader:
+    """Lee los campos escritos por _Writer, en el mismo orden."""
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, fmt):
+        fmt = '<' + fmt
+        values = struct.unpack_from(fmt, self.data, self.offset)
+        self.offset += struct.calcsize(fmt)
+        return values
+
+    def text(self):
+        length, = self.unpack('I')
+        value = bytes(self.data[self.offset:self.offset + length]).decode()
+        self.offset += length
+        return value
+
+
+class Checkpoint:
+    """
+    Checkpoint incremental de una población en un directorio.
+    """
+    def __init__(self, directory='checkpoint', compact_ratio=4):
+        """
+        Args:
+            directory: Directorio del checkpoint (se crea al guardar)
+            compact_ratio: El almacén se reescribe cuando ocupa más de esta
+                           proporción respecto a los datos que siguen en uso
+        """
+        self.directory = directory
+        self.compact_ratio = compact_ratio
+        self.store_index = 0
+        self.store_size = 0
+        self.blocks = {}  # Contenido -> (posición, longitud) de los bloques del almacén actual
+        self.failed = False  # Si falló la escritura de un checkpoint
+        self.epoch = 0  # Aumenta con cada fallo: lo preparado antes ya no es válido
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, STATE_FILE))
+
+    def _store_path(self, index=None):
+        return os.path.join(self.directory, f'genomes-{self.store_index if index is None else index}.bin')
+
+    def _append(self, pending, data):
+        """Añade un bloque a los pendientes de escribir si no estaba ya y devuelve su (posición, longitud)."""
+        block = self.blocks.get(data)
+        if block is None:
+            pending.append(data)
+            block = (self.store_size, len(data))
+            self.store_size += len(data)
+            self.blocks[data] = block
+        return block
+
+    def save(self, pop):
+        """
+        Guarda el estado de la población, escribiendo en el almacén solo los
+        genomas que no estaban en el checkpoint anterior.
+
+        Args:
+            pop: Population entre dos generaciones (tras natural_selection)
+        """
+        self.write(self.prepare(pop))
+
+    def prepare(self, pop):
+        """
+        Serializa en memoria el estado de la población, sin escribir nada;
+        write() lo lleva a disco (puede hacerse en otro hilo, ver autosave.py).
+        Los checkpoints preparados deben escribirse en el mismo orden.
+
+        Returns:
+            Checkpoint preparado para write()
+        """
+        brains = [p.brain for p in pop.players]
+        brains += [b for s in pop.species for b in (s.benchmark_brain, s.champion.brain)]
+        if pop.best_player is not None:
+            brains.append(pop.best_player.brain)
+
+        # Con demasiados bloques sin uso (o tras un error de escritura), empezar
+        # un almacén nuevo solo con los vivos
+        live = sum(8 * len(b.weights) for b in brains)
+        if self.failed or self.store_size > self.compact_ratio * live + (1 << 16):
+            self.failed = False
+            self.store_size = 0
+            self.blocks = {}
+        if not self.blocks:
+            # Almacén nuevo: nunca se escribe en uno que pueda usar el checkpoint anterior
+            while os.path.exists(self._store_path()):
+                self.store_index += 1
+
+        plans = {}  # Plan -> índice en la tabla de topologías del estado
+        pending = []  # Bloques nuevos, en orden de posición en el almacén
+
+        def genome_ref(net):
+            if id(net.plan) not in plans:
+                text = io.StringIO()
+                csv.writer(text).writerows(net.plan.describe())
+                plans[id(net.plan)] = (len(plans), self._append(pending, text.getvalue().encode()))
+            return (plans[id(net.plan)][0],) + self._append(pending, net.weights.tobytes())
+
+        refs = [genome_ref(b) for b in brains]
+
+        out = _Writer()
+        out.buffer.write(MAGIC)
+        out.pack('H', VERSION)
+        out.text(os.path.basename(self._store_path()))
+        out.pack('qqqqq', pop.generation, pop.size, pop.best_fitness,
+                 -1 if pop.iterations_limit is None else pop.iterations_limit, len(pop.pool))
+
+        # Generadores aleatorios
+        version, state, gauss = random.getstate()
+        out.pack('i625I', version, *state)
+        out.pack('?d', gauss is not None, gauss or 0.0)
+        numpy_state = pop.operators.rng.bit_generator.state
+        if numpy_state['bit_generator'] != 'PCG64':
+            raise ValueError(f"Generador no soportado: {numpy_state['bit_generator']}")
+        out.buffer.write(numpy_state['state']['state'].to_bytes(16, 'little'))
+        out.buffer.write(numpy_state['state']['inc'].to_bytes(16, 'little'))
+        out.pack('iI', numpy_state['has_uint32'], numpy_state['uinteger'])
+
+        # Topologías
+        out.pack('I', len(plans))
+        for _, (offset, length) in sorted(plans.values()):
+            out.pack('qq', offset, length)
+
+        refs = iter(refs)
+        out.pack('I', len(pop.players))
+        for p in pop.players:
+            out.pack('Iqqq3B', *next(refs), int(p.fitness), *p.color)
+        out.pack('I', len(pop.pool))
+        for p in pop.pool:
+            out.pack('3B', *p.color)
+        out.pack('I', len(pop.species))
+        for s in pop.species:
+            out.pack('dqqq', s.threshold, s.average_fitness, s.benchmark_fitness, s.staleness)
+            out.pack('Iqq', *next(refs))
+            out.pack('Iqqq', *next(refs), int(s.champion.fitness))
+        out.pack('?', pop.best_player is not None)
+        if pop.best_player is not None:
+            out.pack('Iqqq3B', *next(refs), int(pop.best_player.fitness), *pop.best_player.color)
+
+        offset = self.store_size - sum(map(len, pending))
+        return self.epoch, self._store_path(), offset, b''.join(pending), out.getvalue()
+
+    def write(self, prepared):
+        """
+        Escribe un checkpoint preparado con prepare(): añade sus bloques nuevos
+        al almacén y sustituye el estado de forma atómica.
+        """
+        epoch, store_path, offset, blocks, state = prepared
+        if epoch != self.epoch:
+            return  # Preparado antes de un fallo: sus bloques previos pueden faltar
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(store_path, 'ab') as store:
+                # Lo que quedara de una escritura interrumpida se descarta
+                store.truncate(offset)
+                store.write(blocks)
+                store.flush()
+                os.fsync(store.fileno())
+
+            # Sustitución atómica del estado
+            path = os.path.join(self.directory, STATE_FILE)
+            temp = f'{path}.{os.getpid()}.tmp'
+            with open(temp, 'wb') as f:
+                f.write(state)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, path)
+        except OSError:
+            # El siguiente checkpoint no puede apoyarse en bloques que quizá no se escribieron
+            self.failed = True
+            self.epoch += 1
+            raise
+
+        # Los almacenes anteriores ya no los usa ningún checkpoint
+        current = os.path.basename(store_path)
+        for name in os.listdir(self.directory):
+            if name.startswith('genomes-') and name.endswith('.bin') and name != current:
+                os.remove(os.path.join(self.directory, name))
+
+    def restore(self, pop):
+        """
+        Devuelve la población al estado del último checkpoint.
+
+        Args:
+            pop: Population recién creada con el mismo tamaño (sus jugadores y
+                 operadores se reutilizan)
+
+        Returns:
+            True si había un checkpoint y se restauró
+        """
+        if not self.exists():
+            return False
+        with open(os.path.join(self.directory, STATE_FILE), 'rb') as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{self.directory} no contiene un checkpoint válido")
+        state = _Reader(memoryview(data)[4:])
+        version, = state.unpack('H')
+        if version != VERSION:
+            raise ValueError(f"Versión de checkpoint no soportada: {version}")
+
+        store_name = state.text()
+        with open(os.path.join(self.directory, store_name), 'rb') as f:
+            store = f.read()
+        self.store_index = int(store_name[len('genomes-'):-len('.bin')])
+        self.blocks = {}
+
+        def block(offset, length):
+            data = store[offset:offset + length]
+            self.blocks[data] = (offset, length)
+            return data
+
+        generation, size, best_fitness, limit, pool_size = state.unpack('qqqqq')
+        if size != pop.size:
+            raise ValueError(f"El checkpoint de {self.directory} es de una población de {size} "
+                             f"jugadores, no de {pop.size}")
+        python_state = state.unpack('i625I')
+        has_gauss, gauss = state.unpack('?d')
+        numpy_state = {
+            'bit_generator': 'PCG64',
+            'state': {'state': int.from_bytes(state.data[state.offset:state.offset + 16], 'little'),
+                      'inc': int.from_bytes(state.data[state.offset + 16:state.offset + 32], 'little')},
+        }
+        state.offset += 32
+        numpy_state['has_uint32'], numpy_state['uinteger'] = state.unpack('iI')
+
+        plans = []
+        for _ in range(state.unpack('I')[0]):
+            rows = list(csv.reader(io.StringIO(block(*state.unpack('qq')).decode())))
+            plans.append(brain.plan_from_rows(rows)[0])
+
+        def load_brain(plan_index, offset, length):
+            net = brain.Brain(plans[plan_index].inputs, clone=True)
+            net.set_plan(plans[plan_index])
+            net.weights = array('d', block(offset, length))
+            return net
+
+        genomes = []
+        colors = []
+        for _ in range(state.unpack('I')[0]):
+            plan_index, offset, length, fitness, *color = state.unpack('Iqqq3B')
+            genomes.append(player.Genome(load_brain(plan_index, offset, length), fitness))
+            colors.append(tuple(color))
+        pool_colors = [tuple(state.unpack('3B')) for _ in range(state.unpack('I')[0])]
+
+        pop.species = []
+        for _ in range(state.unpack('I')[0]):
+            s = species.Species.__new__(species.Species)
+            s.players = []
+            s.threshold, s.average_fitness, s.benchmark_fitness, s.staleness = state.unpack('dqqq')
+            s.benchmark_brain = load_brain(*state.unpack('Iqq'))
+            s.representative = np.array(s.benchmark_brain.weights, dtype=np.float64)
+            plan_index, offset, length, fitness = state.unpack('Iqqq')
+            s.champion = player.Genome(load_brain(plan_index, offset, length), fitness)
+            pop.species.append(s)
+
+        pop.best_player = None
+        if state.unpack('?')[0]:
+            plan_index, offset, length, fitness, *color = state.unpack('Iqqq3B')
+            pop.best_player = player.Player(load_brain(plan_index, offset, length), tuple(color))
+            pop.best_player.fitness = fitness
+
+        # Reutilizar (o crear) los objetos Player del pool con sus colores
+        while len(pop.pool) < pool_size:
+            pop.pool.append(player.Player(genomes[0].brain))
+        del pop.pool[pool_size:]
+        for p, color in zip(pop.pool, pool_colors):
+            p.color = color
+        pop.players = pop.pool[:len(genomes)]
+        for p, genome, color in zip(pop.players, genomes, colors):
+            p.reset(genome.brain, genome.fitness)
+            p.color = color
+
+        pop.generation = generation
+        pop.size = size
+        pop.best_fitness = best_fitness
+        pop.iterations_limit = None if limit < 0 else limit
+        self.store_size = len(store)
+
+        # Los generadores se restauran al final: crear objetos Player consume random
+        pop.operators.rng.bit_generator.state = numpy_state
+        random.setstate((python_state[0], tuple(python_state[1:]), gauss if has_gauss else None))
+        return True
@@ -1,3 +1,4 @@
+import functools
 import pygame
 import random
 import config
@@ -15,11 +16,12 @@ class Ground:
         self.x2 = self.width
 
     def draw(self, window):
+        """Dibuja el suelo y devuelve el rectángulo de pantalla modificado."""
         # Si estamos en modo juego y las imágenes están cargadas
         if config.game_mode == 'play' and config.BASE_IMG:
             # Dibujar dos imágenes de base para crear efecto de movimiento continuo
-            window.blit(config.BASE_IMG, (self.x1, self.y))
-            window.blit(config.BASE_IMG, (self.x2, self.y))
+            dirty = window.blit(config.BASE_IMG, (self.x1, self.y))
+            dirty.union_ip(window.blit(config.BASE_IMG, (self.x2, self.y)))
             
             # Mover las bases
             self.x1 -= 1
@@ -30,44 +32,290 @@ class Ground:
                 self.x1 = self.x2 + self.width
             if self.x2 + self.width < 0:
                 self.x2 = self.x1 + self.width
-        else:
-            # Dibujar el suelo original (solo una línea)
-            pygame.draw.rect(window, (255, 255, 255), self.rect)
+            return dirty
+        # Dibujar el suelo original (solo una línea)
+        return pygame.draw.rect(window, (255, 255, 255), self.rect)
 
 
 class Pipes:
     width = 52  # Ancho ajustado para la imagen
     opening = 104  # Apertura entre tuberías aumentada para gráficos
 
-    def __init__(self, win_width):
+    def __init__(self, win_width, bottom_height=None):
+        self.bottom_rect = pygame.Rect(0, 0, 0, 0)
+        self.top_rect = pygame.Rect(0, 0, 0, 0)
+        self.reset(win_width, bottom_height)
+
+    def reset(self, win_width, bottom_height=None):
+        """
+        Reinicia la tubería en el borde derecho con una nueva altura.
+        Permite reutilizar el mismo objeto (y sus rectángulos) en lugar de crear otro.
+        """
         self.x = win_width
-        self.bottom_height = random.randint(50, 250)
+        if bottom_height is None:
+            bottom_height = random.randint(50, 250)
+        self.bottom_height = bottom_height
         self.top_height = Ground.ground_level - self.bottom_height - self.opening
-        self.bottom_rect = pygame.Rect(self.x, Ground.ground_level - self.bottom_height, self.width, self.bottom_height)
-        self.top_rect = pygame.Rect(self.x, 0, self.width, self.top_height)
+        self.bottom_rect.update(self.x, Ground.ground_level - self.bottom_height, self.width, self.bottom_height)
+        self.top_rect.update(self.x, 0, self.width, self.top_height)
         self.passed = False
         self.off_screen = False
 
     def draw(self, window):
-        # Actualizar rectángulos para colisiones
-        self.bottom_rect = pygame.Rect(self.x, Ground.ground_level - self.bottom_height, self.width, self.bottom_height)
-        self.top_rect = pygame.Rect(self.x, 0, self.width, self.top_height)
-        
-        if config.game_mode == 'play' and config.PIPE_IMG:
-            # Dibujar pipe inferior
-            window.blit(config.PIPE_IMG, (self.x, Ground.ground_level - self.bottom_height))
-            
-            # Dibujar pipe superior (girada)
-            top_pipe = pygame.transform.flip(config.PIPE_IMG, False, True)
-            window.blit(top_pipe, (self.x, self.top_height - 320))
-        else:
-            # Dibujar rectángulos simples en modo entrenamiento
-            pygame.draw.rect(window, (255, 255, 255), self.bottom_rect)
-            pygame.draw.rect(window, (255, 255, 255), self.top_rect)
+        """Dibuja la tubería y devuelve los rectángulos de pantalla modificados."""
+        if config.game_mode == 'play' and config.PIPE_TOP_IMG:
+            return window.blits((
+                # Pipe inferior
+                (config.PIPE_IMG, (self.x, Ground.ground_level - self.bottom_height)),
+                # Pipe superior (girada una sola vez al cargar las imágenes)
+                (config.PIPE_TOP_IMG, (self.x, self.top_height - 320)),
+            ))
+        # Dibujar rectángulos simples en modo entrenamiento
+        return [pygame.draw.rect(window, (255, 255, 255), self.bottom_rect),
+                pygame.draw.rect(window, (255, 255, 255), self.top_rect)]
 
     def update(self):
+        # Mantener los rectángulos de colisión sincronizados aunque no se dibuje
+        # (en modo headless draw() nunca se llama). Se actualizan antes de mover:
+        # en el juego original draw() los recalculaba antes de este paso, así que
+        # las colisiones se comprueban con la posición del frame anterior (ver
+        # tests/test_pipes.py; vectorized.py y events.py reproducen esta geometría)
+        self.bottom_rect.x = self.x
+        self.top_rect.x = self.x
         self.x -= 1
         if self.x + Pipes.width <= 50:
             self.passed = True
         if self.x <= -self.width:
-            self.off_screen = True
\ No newline at end of file
+            self.off_screen = True
+
+
+class PipeQueue:
+    """
+    Cola circular de capacidad fija con las tuberías en pantalla, de la más
+    antigua a la más reciente. Los objetos Pipes se crean una sola vez (pool)
+    y se reutilizan, así que en régimen estable no se reserva memoria por frame.
+    """
+    def __init__(self, capacity=8, win_width=400):
+        """
+        Args:
+            capacity: Máximo de tuberías simultáneas (con 200 frames entre
+                      tuberías caben 3 en una ventana de 400 píxeles)
+            win_width: Ancho de la ventana
+        """
+        self.slots = [Pipes(win_width, 50) for _ in range(capacity)]
+        self.head = 0   # Posición de la tubería más antigua
+        self.count = 0  # Tuberías en la cola
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        capacity = len(self.slots)
+        for i in range(self.count):
+            yield self.slots[(self.head + i) % capacity]
+
+    def __getitem__(self, i):
+        if not -self.count <= i < self.count:
+            raise IndexError('PipeQueue index out of range')
+        return self.slots[(self.head + i % self.count) % len(self.slots)]
+
+    def spawn(self, win_width, bottom_height=None):
+        """Añade al final una tubería reutilizada del pool y la devuelve."""
+        if self.count == len(self.slots):
+            raise IndexError('PipeQueue llena')
+        pipe = self.slots[(self.head + self.count) % len(self.slots)]
+        pipe.reset(win_width, bottom_height)
+        self.count += 1
+        return pipe
+
+    def popleft(self):
+        """Quita la tubería más antigua (queda en el pool para reutilizarse)."""
+        pipe = self.slots[self.head]
+        self.head = (self.head + 1) % len(self.slots)
+        self.count -= 1
+        return pipe
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+
+class WorldSnapshot:
+    """
+    Resumen del mundo en un frame, calculado una sola vez para todos los pájaros.
+    Guarda la tubería más cercana sin pasar (para la visión) y los intervalos
+    verticales sólidos (tuberías y suelo) que se solapan con la columna en la que
+    vuelan los pájaros, de modo que visión y colisiones se resuelven con
+    aritmética de intervalos en lugar de colliderect por pájaro y tubería.
+    """
+    def __init__(self, pipes, ground, left, right):
+        """
+        Args:
+            pipes: Tuberías actuales (p. ej. config.pipes)
+            ground: Suelo (objeto Ground o pygame.Rect), o None
+            left: Borde izquierdo de los pájaros
+            right: Borde derecho de los pájaros
+        """
+        # Tubería más cercana que aún no se ha pasado
+        self.closest = None
+        for p in pipes:
+            if not p.passed:
+                self.closest = p
+                break
+        if self.closest is not None:
+            self.pipe_x = self.closest.x
+            self.gap_top = self.closest.top_rect.bottom
+            self.gap_bottom = self.closest.bottom_rect.top
+
+        # Intervalos [top, bottom) con los que un pájaro puede chocar este frame
+        rects = [r for p in pipes for r in (p.top_rect, p.bottom_rect)]
+        if ground is not None:
+            rects.append(getattr(ground, 'rect', ground))
+        self.solids = [(r.top, r.bottom) for r in rects
+                       if r.width and r.height and r.left < right and left < r.right]
+
+    def collides(self, top, bottom):
+        """Indica si un pájaro que ocupa [top, bottom) toca algún obstáculo."""
+        for solid_top, solid_bottom in self.solids:
+            if top < solid_bottom and solid_top < bottom:
+                return True
+        return False
+
+
+class PipeCourse:
+    """
+    Recorrido de tuberías reproducible: las alturas salen de un generador
+    propio inicializado con una semilla, no del módulo random global.
+    Dos recorridos con la misma semilla generan exactamente las mismas tuberías.
+    Las alturas se precalculan por bloques al crear el recorrido.
+    """
+    chunk = 512  # Tuberías precalculadas de una vez (~100000 frames)
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.heights = []
+        self._extend()
+
+    def _extend(self):
+        self.heights.extend(self.rng.randint(50, 250) for _ in range(PipeCourse.chunk))
+
+    def height(self, i):
+        """Altura de la tubería inferior número i del recorrido."""
+        while i >= len(self.heights):
+            self._extend()
+        return self.heights[i]
+
+    @staticmethod
+    @functools.lru_cache(maxsize=32)
+    def get(seed):
+        """Devuelve el recorrido de esa semilla, reutilizándolo si ya se generó."""
+        return PipeCourse(seed)
+
+
+class PipeSpawner:
+    """
+    Genera, mueve y elimina las tuberías con el calendario del juego
+    (la primera a los 10 frames y luego una cada 200).
+    """
+    def __init__(self, pipes, win_width, course=None):
+        """
+        Args:
+            pipes: PipeQueue donde se guardan las tuberías (p. ej. config.pipes)
+            win_width: Ancho de la ventana (posición inicial de cada tubería)
+            course: PipeCourse con las alturas (None = random global)
+        """
+        self.pipes = pipes
+        self.win_width = win_width
+        self.course = course
+        self.spawn_time = 10
+        self.spawned = 0  # Tuberías generadas (índice en el recorrido)
+
+    def reset(self, course=None):
+        self.pipes.clear()
+        self.course = course
+        self.spawn_time = 10
+        self.spawned = 0
+
+    def update(self):
+        # Generar tuberías
+        if self.spawn_time <= 0:
+            height = self.course.height(self.spawned) if self.course else None
+            self.pipes.spawn(self.win_width, height)
+            self.spawned += 1
+            self.spawn_time = 200
+        self.spawn_time -= 1
+
+        # Actualizar tuberías
+        for pipe in self.pipes:
+            pipe.update()
+
+        # Todas se mueven igual: solo las más antiguas pueden salir de la pantalla
+        while self.pipes and self.pipes[0].off_screen:
+            self.pipes.popleft()
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(size, name='Arial'):
+    """Devuelve la fuente del sistema indicada, buscándola una sola vez."""
+    return pygame.font.SysFont(name, size)
+
+
+class Hud:
+    """
+    Panel de texto con fondo semi-transparente (generación, vivos, fitness...).
+    Cada línea solo se vuelve a renderizar cuando cambia su texto, y el fondo
+    solo se vuelve a crear cuando cambia el tamaño del panel.
+    """
+    def __init__(self, x=5, y=5, size=16, line_height=20):
+        """
+        Args:
+            x, y: Esquina superior izquierda del panel
+            size: Tamaño de la fuente
+            line_height: Separación vertical entre líneas
+        """
+        self.x, self.y = x, y
+        self.font = get_font(size)
+        self.line_height = line_height
+        self.texts = []  # Texto mostrado en cada línea
+        self.surfaces = []  # Texto ya renderizado de cada línea
+        self.background = None
+
+    def update(self, lines):
+        """Renderiza solo las líneas cuyo texto cambió."""
+        changed = len(lines) != len(self.texts)
+        del self.texts[len(lines):]
+        del self.surfaces[len(lines):]
+
+        for i, text in enumerate(lines):
+            if i == len(self.texts):
+                self.texts.append(None)
+                self.surfaces.append(None)
+            if self.texts[i] != text:
+                self.texts[i] = text
+                self.surfaces[i] = self.font.render(text, True, (255, 255, 255))
+                changed = True
+
+        if changed:
+            size = (max(s.get_width() for s in self.surfaces) + 20,
+                    self.line_height * len(self.surfaces) + 10)
+            if self.background is None or self.background.get_size() != size:
+                self.background = pygame.Surface(size, pygame.SRCALPHA)
+                self.background.fill((0, 0, 0, 150))
+
+    def draw(self, window, lines):
+        """
+        Dibuja el panel con las líneas indicadas.
+
+        Args:
+            window: Superficie donde dibujar
+            lines: Lista de textos, uno por línea
+
+        Returns:
+            Rectángulo de pantalla ocupado por el panel
+        """
+        self.update(lines)
+        dirty = window.blit(self.background, (self.x, self.y))
+        window.blits([(surface, (self.x + 5, self.y + 5 + self.line_height * i))
+                      for i, surface in enumerate(self.surfaces)], False)
+        return dirty
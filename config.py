@@ -1,4 +1,5 @@
 import pygame
+import assets
 
 # Window settings
 win_width = 400
@@ -18,24 +19,49 @@ PIPE_IMG = None
 BASE_IMG = None
 BG_IMG = None
 
+# Sprites transformados precalculados (ver build_sprite_cache)
+PIPE_TOP_IMG = None  # Tubería superior (PIPE_IMG girada verticalmente)
+BIRD_SPRITES = {}  # (índice de animación, inclinación) -> imagen rotada
+BIRD_TILTS = (0, 25, -90)  # Inclinaciones que usa Player.draw
+
 # Global variables
 game_mode = None  # 'train' or 'play'
 selected_model = None
+headless = False  # True cuando se entrena sin ventana (no se dibuja nada)
+hidden_layers = ()  # Nodos de cada capa oculta de los cerebros nuevos (vacío = sin capas ocultas)
 
 # Función para cargar imágenes
 def load_images():
+    """
+    Carga todas las imágenes ya escaladas y convertidas al formato de la
+    pantalla (ver assets.py). Se llama una vez al arrancar; el bucle de dibujo
+    solo usa las superficies ya preparadas.
+    """
     global BIRD_IMGS, PIPE_IMG, BASE_IMG, BG_IMG
     
     # Cargar imágenes del pájaro
-    BIRD_IMGS = [
-        pygame.transform.scale(pygame.image.load('assets/bird1.png'), (34, 24)),
-        pygame.transform.scale(pygame.image.load('assets/bird2.png'), (34, 24)),
-        pygame.transform.scale(pygame.image.load('assets/bird3.png'), (34, 24))
-    ]
+    BIRD_IMGS = [assets.load_sprite(f'bird{i}.png', (34, 24)) for i in (1, 2, 3)]
     
-    # Cargar imagen de la tubería y girarla para la parte superior
-    PIPE_IMG = pygame.transform.scale(pygame.image.load('assets/pipe.png'), (52, 320))
+    # Cargar imagen de la tubería (la superior se gira en build_sprite_cache)
+    PIPE_IMG = assets.load_sprite('pipe.png', (52, 320))
+    build_sprite_cache()
     
-    # Cargar imagen del suelo y fondo
-    BASE_IMG = pygame.transform.scale(pygame.image.load('assets/ground.png'), (win_width, 70))
-    BG_IMG = pygame.transform.scale(pygame.image.load('assets/bg.png'), (win_width, win_height))
\ No newline at end of file
+    # Cargar imagen del suelo y fondo (el fondo es opaco)
+    BASE_IMG = assets.load_sprite('ground.png', (win_width, 70))
+    BG_IMG = assets.load_sprite(assets.find_background(), (win_width, win_height), alpha=False)
+
+
+def build_sprite_cache():
+    """
+    Precalcula una sola vez las transformaciones de los sprites: la tubería
+    superior girada y cada combinación (imagen de animación, inclinación) del
+    pájaro. Así al dibujar solo se copian superficies ya hechas.
+    """
+    global PIPE_TOP_IMG, BIRD_SPRITES
+
+    PIPE_TOP_IMG = pygame.transform.flip(PIPE_IMG, False, True) if PIPE_IMG else None
+    BIRD_SPRITES = {
+        (i, tilt): pygame.transform.rotate(img, tilt)
+        for i, img in enumerate(BIRD_IMGS)
+        for tilt in BIRD_TILTS
+    }
@@ -6,7 +6,9 @@ class Connection:
     La clase Connection representa una conexión entre dos nodos en la red neuronal.
     Contiene un peso que determina la importancia de la señal transmitida.
     """
-    
+    # __slots__ evita un diccionario por instancia (se crean miles por generación)
+    __slots__ = ('from_node', 'to_node', 'weight', 'enabled')
+
     def __init__(self, from_node, to_node, weight):
         """
         Inicializa una conexión entre dos nodos con un peso específico.
@@ -29,18 +31,7 @@ class Connection:
         1. Cambio completo (10% de probabilidad): Asigna un nuevo peso aleatorio
         2. Ajuste ligero (90% de probabilidad): Modifica ligeramente el peso existente
         """
-        # 10% de probabilidad de cambio completo del peso
-        if random.uniform(0, 1) < 0.1:
-            self.weight = random.uniform(-1, 1)  # Nuevo peso aleatorio entre -1 y 1
-        else:  # 90% de probabilidad de ajuste ligero
-            # Añadir una pequeña variación gaussiana (centrada en 0)
-            self.weight += random.gauss(0, 1) / 50
-            
-            # Mantener el peso en el rango adecuado (-1 a 1)
-            if self.weight > 1:
-                self.weight = 1
-            if self.weight < -1:
-                self.weight = -1
+        self.weight = mutate_weight(self.weight)
 
     def clone(self, from_node, to_node):
         """
@@ -56,4 +47,32 @@ class Connection:
         """
         clone = Connection(from_node, to_node, self.weight)  # Crear nueva conexión
         clone.enabled = self.enabled  # Copiar estado de activación
-        return clone  # Retornar el clon
\ No newline at end of file
+        return clone  # Retornar el clon
+
+
+def mutate_weight(weight):
+    """
+    Devuelve el peso mutado según las reglas de Connection.mutate_weight.
+    Separado como función para poder mutar pesos guardados en arrays
+    sin necesidad de objetos Connection.
+
+    Args:
+        weight: Peso actual
+
+    Returns:
+        El nuevo peso (entre -1 y 1)
+    """
+    # 10% de probabilidad de cambio completo del peso
+    if random.uniform(0, 1) < 0.1:
+        return random.uniform(-1, 1)  # Nuevo peso aleatorio entre -1 y 1
+
+    # 90% de probabilidad de ajuste ligero:
+    # añadir una pequeña variación gaussiana (centrada en 0)
+    weight += random.gauss(0, 1) / 50
+
+    # Mantener el peso en el rango adecuado (-1 a 1)
+    if weight > 1:
+        weight = 1
+    if weight < -1:
+        weight = -1
+    return weight
@@ -0,0 +1,337 @@
+"""
+Simulación dirigida por eventos.
+
+Entre dos aleteos la trayectoria de un pájaro está completamente determinada
+(gravedad de 0.3 por frame con tope en 6), y las tuberías se mueven un píxel
+por frame con un calendario fijo. En lugar de integrar frame a frame, cada
+pájaro se simula por ventanas: se calcula de golpe con NumPy la trayectoria
+sin aleteo, su visión y su decisión, y se salta directamente al primer frame
+donde algo puede cambiar (un aleteo posible, una colisión o un cambio de
+tubería). Solo ese frame se ejecuta paso a paso, con la misma lógica que
+Player, así que el resultado es idéntico al de la integración por frames.
+"""
+import math
+import random
+import numpy as np
+import components
+import player
+import vectorized
+
+# Calendario de tuberías (ver components.PipeSpawner): la tubería i aparece en
+# el frame 10 + 200 * i, deja de ser la más cercana 401 frames después (passed)
+# y sus rectángulos se solapan con la columna de los pájaros entre 317 y 401
+# frames después de aparecer
+FIRST_SPAWN = 10
+SPAWN_INTERVAL = 200
+PASSED_AFTER = 401
+HAZARD_FROM = 400 - (vectorized.BIRD_X + vectorized.BIRD_WIDTH) + 1
+HAZARD_UNTIL = 400 + components.Pipes.width - vectorized.BIRD_X
+GROUND = (components.Ground.ground_level, components.Ground.ground_level + 50)
+
+# Límite de frames que se calculan de golpe en cada ventana
+MAX_WINDOW = 256
+
+# Preactivación equivalente al umbral de aleteo: sigmoid(z) > 0.73 <=> z > logit(0.73).
+# Se deja un margen: un falso candidato solo cuesta un paso exacto extra (el margen
+# también cubre el redondeo de np.exp frente a math.exp en las capas ocultas)
+FLAP_LOGIT = math.log(player.FLAP_THRESHOLD / (1 - player.FLAP_THRESHOLD)) - 1e-9
+
+
+def pipes_passed(lifespan):
+    """Número de tuberías que un pájaro ha dejado atrás tras vivir `lifespan` frames."""
+    return max(0, (lifespan - FIRST_SPAWN - HAZARD_UNTIL) // SPAWN_INTERVAL + 1)
+
+
+def frames_for_pipes(pipes):
+    """Tiempo de vida mínimo para haber dejado atrás `pipes` tuberías (inversa de pipes_passed)."""
+    if pipes <= 0:
+        return 0
+    return FIRST_SPAWN + HAZARD_UNTIL + SPAWN_INTERVAL * (pipes - 1)
+
+
+class Course:
+    """
+    Alturas de las tuberías de una generación, en orden de aparición.
+    Salen del PipeCourse indicado o, si no hay, se generan bajo demanda con
+    random.randint, igual que Pipes.__init__.
+    """
+    def __init__(self, pipe_course=None):
+        self.pipe_course = pipe_course
+        self.heights = []
+
+    def bottom_height(self, i):
+        if self.pipe_course:
+            return self.pipe_course.height(i)
+        while len(self.heights) <= i:
+            self.heights.append(random.randint(50, 250))
+        return self.heights[i]
+
+    def top_height(self, i):
+        return components.Ground.ground_level - self.bottom_height(i) - components.Pipes.opening
+
+    def draw_until(self, frame):
+        """Genera las alturas de todas las tuberías que aparecen hasta ese frame."""
+        if frame >= FIRST_SPAWN:
+            self.bottom_height((frame - FIRST_SPAWN) // SPAWN_INTERVAL)
+
+    @staticmethod
+    def spawn(i):
+        return FIRST_SPAWN + SPAWN_INTERVAL * i
+
+    @staticmethod
+    def closest(frame):
+        """Índice de la primera tubería no pasada en ese frame (o None)."""
+        if frame < FIRST_SPAWN:
+            return None
+        i = max(0, (frame - FIRST_SPAWN - PASSED_AFTER) // SPAWN_INTERVAL + 1)
+        return i if Course.spawn(i) <= frame else None
+
+    @staticmethod
+    def hazard(frame):
+        """Índice de la tubería que se solapa con los pájaros en ese frame (o None)."""
+        i = (frame - FIRST_SPAWN - HAZARD_FROM) // SPAWN_INTERVAL
+        if i >= 0 and frame < Course.spawn(i) + HAZARD_UNTIL:
+            return i
+        return None
+
+    def solids(self, frame):
+        """Intervalos verticales [top, bottom) sólidos en ese frame (como WorldSnapshot)."""
+        solids = [GROUND]
+        i = self.hazard(frame)
+        if i is not None:
+            solids.append((0, self.top_height(i)))
+            solids.append((components.Ground.ground_level - self.bottom_height(i),
+                           components.Ground.ground_level))
+        return solids
+
+    @staticmethod
+    def next_change(frame):
+        """Primer frame posterior en el que cambia alguna tubería relevante."""
+        best = None
+        for offset in (FIRST_SPAWN, FIRST_SPAWN + PASSED_AFTER,
+                       FIRST_SPAWN + HAZARD_FROM, FIRST_SPAWN + HAZARD_UNTIL):
+            i = max(0, (frame - offset) // SPAWN_INTERVAL + 1)
+            candidate = offset + SPAWN_INTERVAL * i
+            if best is None or candidate < best:
+                best = candidate
+        return best
+
+
+class EventSimulation:
+    """
+    Simula una generación completa pájaro a pájaro, saltando entre eventos.
+    """
+    def __init__(self, pop, course=None, max_frames=None, budget=None):
+        """
+        Args:
+            pop: Población cuyos jugadores se van a simular
+            course: PipeCourse con las alturas (None = random global)
+            max_frames: Frames como máximo; los pájaros que sigan vivos se quedan
+                        con ese tiempo de vida (None = hasta que mueran todos)
+            budget: GenerationBudget con el límite de tiempo y el corte
+                    anticipado (opcional; ver budget.py)
+        """
+        self.pop = pop
+        self.players = pop.players
+        self.course = Course(course)
+        self.max_frames = max_frames
+        self.budget = budget
+        self.stopped = None  # Frame en el que se cortó la generación (None = no se cortó)
+        self.steps = 0  # Frames ejecutados paso a paso más ventanas calculadas
+        self.bird_frames = 0  # Frames que se habrían integrado uno a uno (suma de vidas)
+
+    def run(self):
+        """
+        Simula a todos los jugadores hasta que mueren o se corta la generación.
+        Los pájaros que siguen vivos al cortar quedan vivos, con el tiempo de
+        vida del frame de corte.
+
+        Returns:
+            Número de frames que habría durado la generación frame a frame
+        """
+        simulated = [p for p in self.players if p.alive]
+        budget = self.budget
+        # Con límite de tiempo o corte anticipado se avanza a todos los pájaros
+        # por rondas, para poder parar entre medias
+        horizon = self.max_frames if budget is None else budget.horizon(self.max_frames)
+        reached = 0  # Frame al que han llegado todos los pájaros vivos
+
+        while True:
+            expired = False
+            for p in simulated:
+                if p.alive:
+                    self.simulate(p, horizon)
+                    if budget is not None and budget.expired():
+                        expired = True
+                        break
+            if expired:
+                self.stopped = reached
+                break
+            reached = horizon
+            # El corte anticipado puede caer antes de la última muerte
+            decided = budget.decided(self.players) if budget is not None else None
+            if decided is not None:
+                self.stopped = decided
+                break
+            if not any(p.alive for p in simulated):
+                break
+            if horizon == self.max_frames:
+                self.stopped = horizon
+                break
+            horizon = budget.horizon(self.max_frames, horizon, self.players)
+
+        if self.stopped is not None:
+            # Igual que la versión por frames detenida en ese frame
+            for p in self.players:
+                if p.lifespan > self.stopped:
+                    p.lifespan = self.stopped
+            for p in simulated:
+                p.alive = p.lifespan == self.stopped
+
+        longest = max(p.lifespan for p in self.players)
+        self.bird_frames = sum(p.lifespan + 1 for p in self.players)
+        # La versión por frames genera tuberías hasta detectar la extinción,
+        # un frame después de la última muerte (o hasta el frame de corte)
+        frames = longest + 1 if self.stopped is None else self.stopped
+        self.course.draw_until(frames)
+
+        for p in self.players:
+            if p.lifespan > self.pop.best_fitness:
+                self.pop.best_fitness = p.lifespan
+                self.pop.best_player = p
+        return frames
+
+    def hit(self, y, frame):
+        """Colisión de un pájaro en la altura y durante ese frame (como Player.update)."""
+        if y < 10:
+            return True
+        for top, bottom in self.course.solids(frame):
+            if y < bottom and top < y + vectorized.BIRD_HEIGHT:
+                return True
+        return False
+
+    def look(self, p, frame):
+        """Actualiza la visión del jugador en ese frame (como Player.look)."""
+        i = self.course.closest(frame)
+        if i is None:
+            return
+        center_y = p.rect.y + vectorized.HALF_HEIGHT
+        pipe_x = 399 - frame + Course.spawn(i)
+        p.vision[0] = max(0, center_y - self.course.top_height(i)) / 500
+        p.vision[1] = max(0, pipe_x - vectorized.CENTER_X) / 500
+        p.vision[2] = max(0, components.Ground.ground_level - self.course.bottom_height(i) - center_y) / 500
+
+    def step(self, p, frame):
+        """Ejecuta un único frame exacto del jugador: look, think y update."""
+        self.steps += 1
+        self.look(p, frame)
+
+        p.decision = p.brain.feed_forward(p.vision)
+        if p.decision > player.FLAP_THRESHOLD:
+            if not p.flap and not p.rect.y < 10:
+                p.flap = True
+                p.vel = -6
+            if p.vel >= 3:
+                p.flap = False
+
+        if not self.hit(p.rect.y, frame):
+            p.vel += 0.3
+            p.rect.y += p.vel
+            if p.vel > 6:
+                p.vel = 6
+            p.lifespan += 1
+        else:
+            p.alive = False
+            p.flap = False
+            p.vel = 0
+
+    def simulate(self, p, horizon=None):
+        """
+        Simula a un jugador desde su estado actual hasta que muere.
+
+        Args:
+            p: Jugador a simular
+            horizon: Tiempo de vida en el que detenerse si sigue vivo (None = sin límite)
+        """
+        frame = p.lifespan
+        weights = np.array(p.brain.weights, dtype=np.float64)[None]  # Una fila para toda la ventana
+
+        while p.alive and (horizon is None or frame < horizon):
+            length = min(Course.next_change(frame) - frame, MAX_WINDOW)
+            if horizon is not None:
+                length = min(length, horizon - frame)
+            advanced, event = self.window(p, frame, length, weights)
+            frame += advanced
+            if event:
+                # Solo el frame del evento se ejecuta paso a paso
+                self.step(p, frame)
+                frame += 1
+
+    def window(self, p, frame, length, weights):
+        """
+        Calcula `length` frames sin aleteo de golpe y avanza al jugador hasta
+        el primer frame donde algo puede cambiar.
+
+        Returns:
+            Tupla (frames avanzados, si hay un evento justo después)
+        """
+        self.steps += 1
+        j = np.arange(length)
+        frames = frame + j
+
+        # Velocidad: misma secuencia de sumas que Player.update (cumsum es secuencial)
+        moves = np.cumsum(np.concatenate(([p.vel], np.full(length, 0.3))))[1:]
+        capped = np.flatnonzero(moves > 6)
+        if capped.size:
+            moves[capped[0] + 1:] = 6.0 + 0.3
+        vel_before = np.empty(length)
+        vel_before[0] = p.vel
+        vel_before[1:] = np.minimum(moves[:-1], 6.0)
+
+        # Posición: se estima con redondeos independientes y se comprueba con la
+        # conversión real de pygame.Rect; la ventana se corta en la primera diferencia
+        guess = p.rect.y + np.cumsum(vectorized.rect_coord(moves))
+        y_before = np.concatenate(([p.rect.y], guess[:-1]))
+        exact = vectorized.rect_coord(y_before + moves)
+        wrong = np.flatnonzero(exact != guess)
+        if wrong.size:
+            length = int(wrong[0]) + 1
+            frames, y_before, vel_before = frames[:length], y_before[:length], vel_before[:length]
+
+        # Colisiones con el cielo, el suelo y la tubería (fijos dentro de la ventana)
+        bird_bottom = y_before + vectorized.BIRD_HEIGHT
+        events = y_before < 10
+        for top, bottom in self.course.solids(frame):
+            events |= (y_before < bottom) & (top < bird_bottom)
+
+        # Decisión de la red a lo largo de la ventana
+        closest = self.course.closest(frame)
+        if closest is not None:
+            center_y = y_before + vectorized.HALF_HEIGHT
+            vision = np.empty((len(frames), 3))
+            vision[:, 0] = np.maximum(0, center_y - self.course.top_height(closest)) / 500
+            vision[:, 1] = np.maximum(0, 399 - frames + Course.spawn(closest) - vectorized.CENTER_X) / 500
+            vision[:, 2] = np.maximum(0, components.Ground.ground_level -
+                                      self.course.bottom_height(closest) - center_y) / 500
+        else:
+            vision = np.tile(np.asarray(p.vision, dtype=np.float64), (len(frames), 1))
+
+        total = vectorized.forward(p.brain.plan, weights, vision)
+
+        # Un aleteo cambia el estado si no se está aleteando o si la velocidad permite reiniciarlo
+        flap_possible = np.ones(len(frames), dtype=bool) if not p.flap else vel_before >= 3
+        events |= (total > FLAP_LOGIT) & flap_possible
+
+        hits = np.flatnonzero(events)
+        advanced = int(hits[0]) if hits.size else len(frames)
+        if advanced == 0:
+            return 0, True
+
+        # Avanzar al jugador hasta justo antes del evento
+        last = advanced - 1
+        p.rect.y = int(exact[last])
+        p.vel = float(6.0 if moves[last] > 6 else moves[last])
+        p.lifespan += advanced
+        if closest is not None:
+            p.vision = [float(v) for v in vision[last]]
+        return advanced, bool(hits.size)
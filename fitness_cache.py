@@ -0,0 +1,118 @@
+"""
+Caché de fitness por genoma.
+
+Con un recorrido de tuberías con semilla, el tiempo de vida de un pájaro solo
+depende de sus pesos. Los campeones clonados por next_gen y los hijos que
+Brain.mutate deja sin cambios (20%) se repiten entre generaciones, y dentro de
+una misma generación puede haber genomas idénticos: todos ellos se resuelven
+con la caché en lugar de volver a simularse.
+
+Con un límite de frames por generación (ver budget.py) los resultados se
+guardan aparte para cada límite, y los cortados por tiempo o por el corte
+anticipado no se guardan: no son el tiempo de vida real del genoma.
+"""
+import hashlib
+from collections import OrderedDict
+
+
+class FitnessCache:
+    """
+    Caché LRU de tiempos de vida indexada por (hash de los pesos, semilla del
+    recorrido, límite de frames).
+    """
+    def __init__(self, max_entries=100000):
+        """
+        Args:
+            max_entries: Número máximo de genomas guardados antes de expulsar
+                         los usados hace más tiempo
+        """
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._pending = []     # (clave, jugador simulado) de la generación en curso
+        self._duplicates = []  # (jugador repetido, jugador simulado con el mismo genoma)
+
+    @staticmethod
+    def key(brain, course_seed, frame_limit=None):
+        """Clave de un genoma (topología y pesos) en un recorrido y con un límite de frames."""
+        digest = hashlib.blake2b(brain.plan.key + bytes(brain.weights), digest_size=16).digest()
+        return digest, course_seed, frame_limit
+
+    def get(self, key):
+        """Devuelve el tiempo de vida guardado (o None) y lo marca como usado."""
+        lifespan = self.entries.get(key)
+        if lifespan is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return lifespan
+
+    def put(self, key, lifespan):
+        self.entries[key] = lifespan
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def claim(self, players, course_seed, frame_limit=None):
+        """
+        Resuelve con la caché a los jugadores cuyo genoma ya se evaluó en este
+        recorrido (o se repite en la misma lista) y los marca como muertos con
+        su tiempo de vida, de modo que la simulación los salta.
+
+        Args:
+            players: Jugadores de la generación
+            course_seed: Semilla del recorrido de tuberías
+            frame_limit: Límite de frames de la generación (None = sin límite)
+
+        Returns:
+            Lista de jugadores que sí hay que simular
+        """
+        self._pending = []
+        self._duplicates = []
+        first = {}  # Primer jugador de esta generación con cada genoma
+        pending = []
+
+        for p in players:
+            key = self.key(p.brain, course_seed, frame_limit)
+            lifespan = self.get(key)
+            if lifespan is not None:
+                p.lifespan = lifespan
+                p.alive = False
+            elif key in first:
+                # El fallo ya se contó en get(); es un acierto dentro de la generación
+                self.misses -= 1
+                self.hits += 1
+                self._duplicates.append((p, first[key]))
+                p.alive = False
+            else:
+                first[key] = p
+                self._pending.append((key, p))
+                pending.append(p)
+        return pending
+
+    def resolve(self):
+        """Copia a los jugadores repetidos el tiempo de vida del que se simuló."""
+        for p, original in self._duplicates:
+            p.lifespan = original.lifespan
+
+    def store(self, cutoff=None):
+        """
+        Guarda los resultados de los jugadores simulados tras claim().
+
+        Args:
+            cutoff: Tiempo de vida a partir del cual los resultados se cortaron
+                    y no se guardan (None = se guardan todos)
+        """
+        for key, p in self._pending:
+            if cutoff is None or p.lifespan < cutoff:
+                self.put(key, p.lifespan)
+        self.resolve()
+        self._pending = []
+        self._duplicates = []
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0
+        return f"caché: {self.hits} aciertos, {self.misses} fallos ({rate:.0%}), {len(self.entries)} genomas"
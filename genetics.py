@@ -0,0 +1,138 @@
+"""
+Operadores genéticos vectorizados.
+
+La mutación y el cruce se aplican a todos los hijos de una generación a la
+vez, como operaciones sobre una matriz (hijos x conexiones), con un generador
+de NumPy con semilla propia de cada entrenamiento. Las reglas de mutación son
+las de connection.mutate_weight y Brain.mutate: cada hijo muta con un 80% de
+probabilidad y, si muta, cada peso tiene un 10% de probabilidad de cambiar por
+completo y un 90% de recibir un ajuste gaussiano pequeño, limitado a [-1, 1].
+
+Opcionalmente, los hijos pueden sufrir además mutaciones estructurales
+(Brain.add_node y Brain.add_connection), que cambian su topología; los hijos
+solo se apilan y se cruzan con otros de su misma topología.
+"""
+from array import array
+import numpy as np
+import brain
+import player
+
+
+class GeneticOperators:
+    """
+    Mutación y cruce en bloque para los genomas de una población.
+    """
+    def __init__(self, seed=None, mutation_rate=0.8, reset_rate=0.1, sigma=1 / 50,
+                 crossover_rate=0, crossover='uniform', node_rate=0, connection_rate=0):
+        """
+        Args:
+            seed: Semilla del generador (None = aleatoria)
+            mutation_rate: Probabilidad de que un hijo mute
+            reset_rate: Probabilidad de que un peso mutado cambie por completo
+            sigma: Desviación del ajuste gaussiano de los pesos
+            crossover_rate: Probabilidad de que un hijo tenga dos padres (0 = solo mutación)
+            crossover: 'uniform' (cada peso de un padre al azar) o
+                       'arithmetic' (mezcla ponderada de ambos padres)
+            node_rate: Probabilidad de que un hijo gane un nodo oculto
+            connection_rate: Probabilidad de que un hijo gane una conexión
+        """
+        if crossover not in ('uniform', 'arithmetic'):
+            raise ValueError(f"Cruce desconocido: {crossover}")
+        self.rng = np.random.default_rng(seed)
+        self.mutation_rate = mutation_rate
+        self.reset_rate = reset_rate
+        self.sigma = sigma
+        self.crossover_rate = crossover_rate
+        self.crossover = crossover
+        self.node_rate = node_rate
+        self.connection_rate = connection_rate
+
+    def mutate(self, weights):
+        """
+        Muta en el sitio las filas de la matriz de pesos.
+
+        Args:
+            weights: Matriz (hijos x conexiones)
+
+        Returns:
+            Vector booleano con las filas que mutaron
+        """
+        rows = self.rng.random(len(weights)) < self.mutation_rate
+        mutated = weights[rows]
+        reset = self.rng.random(mutated.shape) < self.reset_rate
+        perturbed = mutated + self.rng.standard_normal(mutated.shape) * self.sigma
+        mutated = np.where(reset, self.rng.uniform(-1, 1, mutated.shape), perturbed)
+        weights[rows] = np.clip(mutated, -1, 1)
+        return rows
+
+    def cross(self, first, second):
+        """
+        Cruza fila a fila dos matrices de pesos de padres.
+
+        Args:
+            first: Matriz (hijos x conexiones) del primer padre
+            second: Matriz (hijos x conexiones) del segundo padre
+
+        Returns:
+            Matriz de pesos de los hijos
+        """
+        if self.crossover == 'uniform':
+            return np.where(self.rng.random(first.shape) < 0.5, first, second)
+        alpha = self.rng.random((len(first), 1))
+        return alpha * first + (1 - alpha) * second
+
+    def breed(self, parents):
+        """
+        Crea los genomas hijos a partir de sus padres.
+
+        Args:
+            parents: Lista de tuplas (padre, segundo padre o None); los padres
+                     son objetos con brain y fitness (Player o Genome)
+
+        Returns:
+            Lista de genomas hijos, en el mismo orden
+        """
+        children = [None] * len(parents)
+
+        # Solo se pueden apilar (y cruzar) cerebros con la misma topología
+        groups = {}
+        for i, (first, second) in enumerate(parents):
+            groups.setdefault(id(first.brain.plan), []).append(i)
+
+        for indices in groups.values():
+            plan = parents[indices[0]][0].brain.plan
+            first = brain.weight_matrix([parents[i][0].brain for i in indices])
+            weights = first.copy()
+
+            crossed = np.array([parents[i][1] is not None and parents[i][1].brain.plan is plan
+                                for i in indices], dtype=bool)
+            if crossed.any():
+                second = brain.weight_matrix([parents[i][1].brain
+                                              for i, c in zip(indices, crossed) if c])
+                weights[crossed] = self.cross(first[crossed], second)
+
+            changed = self.mutate(weights) | crossed
+            for row, i in enumerate(indices):
+                parent = parents[i][0]
+                child = parent.brain.clone()  # Comparte el array si el hijo no cambia
+                if changed[row]:
+                    child.weights = array('d', weights[row].tobytes())
+                children[i] = player.Genome(child, parent.fitness)
+
+        if self.node_rate or self.connection_rate:
+            self.grow(children)
+        return children
+
+    def grow(self, children):
+        """
+        Aplica las mutaciones estructurales a los hijos. Cada cerebro mutado
+        recompila su plan y recibe un array de pesos propio (generate_net),
+        así que no afecta al padre con el que compartía los pesos.
+        """
+        nodes = self.rng.random(len(children)) < self.node_rate
+        connections = self.rng.random(len(children)) < self.connection_rate
+        for child, node, conn in zip(children, nodes.tolist(), connections.tolist()):
+            if node:
+                child.brain.add_node(self.rng)
+            if conn:
+                child.brain.add_connection(self.rng)
@@ -0,0 +1,322 @@
+"""
+Entrenamiento sin ventana (headless) y sin límite de FPS.
+
+Ejecuta la misma simulación que main.train_population pero sin dibujar nada
+y sin clock.tick(60), de modo que la velocidad solo depende de la CPU.
+
+Uso:
+    python headless.py --population 50 --generations 100 --seed 1 --output models
+"""
+import os
+
+# El driver de vídeo debe elegirse antes de que config cree la ventana
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import argparse
+import random
+import time
+import numpy as np
+import config
+import components
+import population
+import vectorized
+import events
+import parallel
+import fitness_cache
+import genetics
+import checkpoint
+import autosave
+import budget
+
+
+def run_generation(pop, backend='numpy', course=None, cache=None, evaluator=None, budget=None):
+    """
+    Simula una generación completa hasta que todos los jugadores mueren o
+    hasta que la corta alguno de los límites del presupuesto.
+    Sigue el mismo orden por frame que el bucle interactivo (tuberías primero,
+    luego jugadores), por lo que con la misma semilla los resultados coinciden.
+
+    Args:
+        pop: Población a evaluar
+        backend: 'numpy' (simulación vectorizada), 'events' (dirigida por eventos)
+                 u 'objects' (un Player a la vez)
+        course: PipeCourse con las tuberías (None = random global)
+        cache: FitnessCache para no repetir genomas ya evaluados (requiere course)
+        evaluator: ParallelEvaluator para simular en varios procesos (requiere course)
+        budget: GenerationBudget con los límites de la generación (None = sin límites)
+
+    Returns:
+        Número de frames de la generación
+    """
+    pending = pop.players
+    use_cache = cache is not None and course is not None
+    if use_cache:
+        pending = cache.claim(pop.players, course.seed, budget.frame_limit if budget else None)
+    if budget is not None:
+        budget.start(pop)
+
+    frames = simulate(pop, pending, backend, course, evaluator, budget)
+
+    if budget is not None:
+        if use_cache:
+            cache.resolve()  # Los repetidos cuentan para el corte anticipado
+        stopped = any(p.alive for p in pending)
+        if budget.finish(pop.players, frames if stopped else None) is not None:
+            frames = budget.stopped
+            print(f"  Generación cortada en el frame {frames} ({budget.reason})")
+    if use_cache:
+        cache.store(budget.cutoff() if budget else None)
+        if budget is None or budget.stopped is None:
+            # Los frames de la generación cuentan también a los pájaros resueltos
+            # por la caché, para que los frames/s se comparen con los de sin caché
+            frames = max(frames, max(p.lifespan for p in pop.players) + 1)
+    pop.record_lifespans([p.lifespan for p in pop.players])
+    return frames
+
+
+def simulate(pop, pending, backend, course, evaluator, budget=None):
+    """
+    Simula a los jugadores vivos de la población con el motor indicado. Si
+    el presupuesto corta la generación, los pájaros que llegan al frame de
+    corte quedan vivos.
+    """
+    if evaluator is not None:
+        return evaluator.evaluate(pending, course.seed, budget)
+
+    limit = budget.frame_limit if budget else None
+    if backend == 'events':
+        sim = events.EventSimulation(pop, course, limit, budget)
+        frames = sim.run()
+        print(f"  {sim.steps} pasos simulados en lugar de {sim.bird_frames} frames por pájaro")
+        return frames
+
+    spawner = components.PipeSpawner(config.pipes, config.win_width)
+    spawner.reset(course)
+    frames = 0
+    sim = vectorized.BatchSimulation.from_population(pop) if backend == 'numpy' else None
+    if sim is None:
+        survivors = lambda: [p.brain for p in pop.players if p.alive]
+    else:
+        survivors = lambda: [sim.players[i].brain for i in np.flatnonzero(sim.alive)]
+    stop = False
+
+    while True:
+        spawner.update()
+
+        if sim is None:
+            if pop.extinct() or stop:
+                break
+            pop.update_live_players()
+        else:
+            if sim.extinct() or stop:
+                break
+            sim.step(config.pipes, config.ground)
+        frames += 1
+        stop = budget is not None and budget.exhausted(frames, survivors)
+
+    if sim is not None:
+        sim.sync_players()
+    config.pipes.clear()
+    return frames
+
+
+def configure(hidden=()):
+    """Prepara la configuración global para entrenar sin ventana."""
+    config.game_mode = 'train'
+    config.headless = True
+    config.pipes = components.PipeQueue(win_width=config.win_width)
+    config.ground = components.Ground(config.win_width)
+    config.hidden_layers = tuple(hidden)
+
+
+def train(population_size=50, generations=None, seed=None, output_dir='models',
+          backend='numpy', workers=1, course_seed=None, cache_size=100000,
+          crossover_rate=0.5, crossover='uniform', hidden=(), node_rate=0, connection_rate=0,
+          checkpoint_dir=None, checkpoint_every=1, resume=False, autosave_interval=None,
+          autosave_generations=None, autosave_best=False, max_frames=None, max_pipes=None,
+          max_seconds=None, early_stop=False):
+    """
+    Entrena una población sin interfaz gráfica.
+
+    Args:
+        population_size: Número de jugadores por generación
+        generations: Número de generaciones a evaluar (None = hasta Ctrl+C)
+        seed: Semilla para el generador aleatorio (None = aleatoria)
+        output_dir: Directorio donde guardar el mejor modelo al terminar
+        backend: Motor de simulación ('numpy', 'events' u 'objects')
+        workers: Procesos para evaluar en paralelo (1 = en este proceso)
+        course_seed: Semilla fija del recorrido de tuberías para todas las
+                     generaciones (None = un recorrido nuevo por generación)
+        cache_size: Genomas guardados en la caché de fitness (0 = sin caché); la
+                    caché va por recorrido, así que entre generaciones solo
+                    acierta con un course_seed fijo
+        crossover_rate: Probabilidad de que un hijo tenga dos padres
+        crossover: Tipo de cruce ('uniform' o 'arithmetic')
+        hidden: Nodos de cada capa oculta de la red inicial (p. ej. (4,) o (6, 3))
+        node_rate: Probabilidad de que un hijo gane un nodo oculto
+        connection_rate: Probabilidad de que un hijo gane una conexión
+        checkpoint_dir: Directorio donde guardar checkpoints (None = sin checkpoints)
+        checkpoint_every: Generaciones entre checkpoints
+        resume: Reanudar desde el checkpoint de checkpoint_dir si existe; el
+                número de generaciones cuenta también las ya evaluadas
+        autosave_interval: Segundos entre guardados automáticos del mejor jugador
+        autosave_generations: Generaciones entre guardados automáticos
+        autosave_best: Guardar cada vez que mejore el mejor fitness
+        max_frames: Frames como máximo por generación (None = sin límite)
+        max_pipes: Tuberías superadas como máximo por generación (None = sin límite)
+        max_seconds: Segundos de simulación como máximo por generación (None = sin límite)
+        early_stop: Cortar la generación cuando los pájaros vivos ya no pueden
+                    cambiar la selección
+
+    Returns:
+        La población entrenada
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    configure(hidden)
+    operators = genetics.GeneticOperators(random.getrandbits(64), crossover_rate=crossover_rate,
+                                          crossover=crossover, node_rate=node_rate,
+                                          connection_rate=connection_rate)
+    pop = population.Population(population_size, operators)
+    pop.iterations_limit = None  # El límite lo controla este bucle
+
+    # Los guardados intermedios (modelos y checkpoints) se escriben en segundo plano
+    auto_save = autosave.AutoSaver(output_dir, autosave_interval, autosave_generations, autosave_best)
+    saver = checkpoint.Checkpoint(checkpoint_dir) if checkpoint_dir else None
+    evaluated = 0
+    if saver and resume:
+        restore_start = time.perf_counter()
+        if saver.restore(pop):
+            evaluated = pop.generation - 1
+            auto_save.mark_saved(pop)
+            print(f"Reanudando desde {checkpoint_dir}: generación {pop.generation} "
+                  f"({time.perf_counter() - restore_start:.3f}s)")
+        else:
+            print(f"No hay checkpoint en {checkpoint_dir}; empezando de cero")
+
+    evaluator = parallel.ParallelEvaluator(workers) if workers > 1 else None
+    cache = fitness_cache.FitnessCache(cache_size) if cache_size > 0 else None
+    limits = budget.GenerationBudget(max_frames, max_pipes, max_seconds, early_stop)
+
+    total_frames = 0
+    start = time.perf_counter()
+
+    try:
+        while generations is None or evaluated < generations:
+            gen_start = time.perf_counter()
+            # Cada generación corre sobre un recorrido con semilla (reproducible)
+            seed_for_course = course_seed if course_seed is not None else random.getrandbits(32)
+            course = components.PipeCourse.get(seed_for_course)
+            frames = run_generation(pop, backend, course, cache, evaluator, limits)
+            gen_time = time.perf_counter() - gen_start
+            total_frames += frames
+            evaluated += 1
+
+            print(f"Generación {pop.generation}: {frames} frames "
+                  f"({frames / max(gen_time, 1e-9):.0f} frames/s)")
+            if cache is not None:
+                print(f"  {cache.stats()}")
+
+            # La última generación no necesita reproducirse
+            if generations is None or evaluated < generations:
+                pop.natural_selection()
+                if saver and evaluated % checkpoint_every == 0:
+                    auto_save.checkpoint(saver, pop)
+                auto_save.update(pop)
+    except KeyboardInterrupt:
+        print("Entrenamiento interrumpido")
+    finally:
+        if evaluator:
+            evaluator.close()
+        auto_save.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    fps = total_frames / elapsed
+    print(f"{evaluated} generaciones en {elapsed:.2f}s: "
+          f"{evaluated / elapsed:.2f} generaciones/s, {fps:.0f} frames/s "
+          f"({fps / 60:.1f}x respecto a 60 FPS)")
+
+    pop.save_best_player(output_dir)
+    config.headless = False
+    config.game_mode = None
+    config.hidden_layers = ()
+    return pop
+
+
+def build_parser(description='Entrenamiento FlappyBird AI sin ventana'):
+    """Opciones de línea de comandos comunes a los entrenamientos sin ventana."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--population', type=int, default=50,
+                        help='Tamaño de la población (por defecto 50)')
+    parser.add_argument('--generations', type=int, default=None,
+                        help='Generaciones a evaluar (por defecto, hasta Ctrl+C)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Semilla del generador aleatorio')
+    parser.add_argument('--output', default='models',
+                        help='Directorio donde guardar el mejor modelo')
+    parser.add_argument('--backend', choices=['numpy', 'events', 'objects'], default='numpy',
+                        help='Motor de simulación: vectorizado (numpy), dirigido por '
+                             'eventos (events) o por objetos (objects)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Procesos para evaluar cada generación en paralelo')
+    parser.add_argument('--course-seed', type=int, default=None,
+                        help='Usar siempre el mismo recorrido de tuberías (semilla); por '
+                             'defecto, uno nuevo por generación')
+    parser.add_argument('--cache-size', type=int, default=100000,
+                        help='Genomas en la caché de fitness (0 = desactivada). Los '
+                             'resultados van por recorrido: sin --course-seed solo se '
+                             'reutilizan dentro de la misma generación')
+    parser.add_argument('--crossover-rate', type=float, default=0.5,
+                        help='Probabilidad de cruce entre dos padres (0 = solo mutación)')
+    parser.add_argument('--crossover', choices=['uniform', 'arithmetic'], default='uniform',
+                        help='Tipo de cruce: uniforme o aritmético')
+    parser.add_argument('--hidden', default='',
+                        help='Capas ocultas de la red inicial, p. ej. "4" o "6,3" (por defecto ninguna)')
+    parser.add_argument('--node-rate', type=float, default=0,
+                        help='Probabilidad de que un hijo gane un nodo oculto')
+    parser.add_argument('--connection-rate', type=float, default=0,
+                        help='Probabilidad de que un hijo gane una conexión')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Directorio donde guardar el estado completo del entrenamiento')
+    parser.add_argument('--checkpoint-every', type=int, default=1,
+                        help='Generaciones entre checkpoints (por defecto 1)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Reanudar desde el checkpoint (--generations cuenta las ya hechas)')
+    parser.add_argument('--autosave-interval', type=float, default=None,
+                        help='Guardar el mejor jugador cada tantos segundos')
+    parser.add_argument('--autosave-generations', type=int, default=None,
+                        help='Guardar el mejor jugador cada tantas generaciones')
+    parser.add_argument('--autosave-best', action='store_true',
+                        help='Guardar el mejor jugador cada vez que mejore el fitness')
+    parser.add_argument('--max-frames', type=int, default=None,
+                        help='Cortar cada generación tras tantos frames')
+    parser.add_argument('--max-pipes', type=int, default=None,
+                        help='Cortar cada generación cuando se superan tantas tuberías')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='Cortar cada generación tras tantos segundos de simulación')
+    parser.add_argument('--early-stop', action='store_true',
+                        help='Cortar cada generación cuando los pájaros vivos ya no '
+                             'pueden cambiar la selección')
+    return parser
+
+
+def parse_hidden(text):
+    """Convierte "6,3" en (6, 3)."""
+    return tuple(int(n) for n in text.split(',') if n.strip())
+
+
+def main():
+    args = build_parser().parse_args()
+    hidden = parse_hidden(args.hidden)
+
+    train(args.population, args.generations, args.seed, args.output, args.backend,
+          args.workers, args.course_seed, args.cache_size, args.crossover_rate, args.crossover,
+          hidden, args.node_rate, args.connection_rate, args.checkpoint,
+          args.checkpoint_every, args.resume, args.autosave_interval,
+          args.autosave_generations, args.autosave_best, args.max_frames, args.max_pipes,
+          args.max_seconds, args.early_stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Entrenamiento por islas en varios procesos.
+
+Cada isla es una Population independiente, con sus propias especies, que
+evoluciona en su propio proceso. Cada cierto número de generaciones, cada isla
+envía los genomas de sus mejores jugadores a sus vecinas por colas de
+multiprocessing y recibe los que le hayan llegado, sin esperar a nadie: los
+procesos no se sincronizan entre generaciones. Los inmigrantes sustituyen a los
+últimos hijos de la nueva generación, así que las islas mantienen su diversidad
+y a la vez comparten los avances.
+
+Uso:
+    python islands.py --islands 4 --migration-interval 5 --migrants 2 --topology ring
+"""
+import os
+
+# El driver de vídeo debe elegirse antes de que config cree la ventana
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import multiprocessing
+import queue
+import random
+import time
+import config
+import components
+import population
+import player
+import registry
+import fitness_cache
+import genetics
+import checkpoint
+import headless
+import budget
+
+TOPOLOGIES = ('ring', 'all', 'random')
+
+
+def neighbours(index, islands, topology, rng):
+    """
+    Islas a las que envía sus emigrantes la isla `index`.
+
+    Args:
+        index: Número de la isla
+        islands: Número total de islas
+        topology: 'ring' (a la siguiente), 'all' (a todas las demás) o
+                  'random' (a otra al azar en cada migración)
+        rng: random.Random de la isla
+
+    Returns:
+        Lista de números de isla
+    """
+    others = [i for i in range(islands) if i != index]
+    if not others:
+        return []
+    if topology == 'ring':
+        return [(index + 1) % islands]
+    if topology == 'all':
+        return others
+    return [rng.choice(others)]
+
+
+def _run_island(index, settings, inboxes, results):
+    """
+    Bucle de entrenamiento de una isla (se ejecuta en su propio proceso).
+
+    Args:
+        index: Número de la isla
+        settings: Diccionario con las opciones de train_islands
+        inboxes: Cola de entrada de cada isla
+        results: Cola donde se deja el mejor genoma de la isla al terminar
+    """
+    # Cada isla tiene su propia semilla (con fork, todas heredarían el mismo estado)
+    seed = settings['seed']
+    random.seed(None if seed is None else seed * 1000 + index)
+    rng = random.Random(random.getrandbits(64))
+
+    headless.configure(settings['hidden'])
+    operators = genetics.GeneticOperators(random.getrandbits(64),
+                                          crossover_rate=settings['crossover_rate'],
+                                          crossover=settings['crossover'],
+                                          node_rate=settings['node_rate'],
+                                          connection_rate=settings['connection_rate'])
+    pop = population.Population(settings['population_size'], operators)
+    pop.iterations_limit = None
+    cache_size = settings['cache_size']
+    cache = fitness_cache.FitnessCache(cache_size) if cache_size > 0 else None
+    limits = budget.GenerationBudget(settings['max_frames'], settings['max_pipes'],
+                                     settings['max_seconds'], settings['early_stop'])
+
+    generations = settings['generations']
+    interval = settings['migration_interval']
+    evaluated = 0
+    received = 0
+
+    # Cada isla guarda su propio checkpoint (los emigrantes en tránsito no se guardan)
+    saver = None
+    if settings['checkpoint_dir']:
+        saver = checkpoint.Checkpoint(os.path.join(settings['checkpoint_dir'], f'isla-{index}'))
+        if settings['resume'] and saver.restore(pop):
+            evaluated = pop.generation - 1
+            print(f"[Isla {index}] Reanudando desde la generación {pop.generation}")
+
+    try:
+        while generations is None or evaluated < generations:
+            gen_start = time.perf_counter()
+            course_seed = settings['course_seed']
+            seed_for_course = course_seed if course_seed is not None else random.getrandbits(32)
+            course = components.PipeCourse.get(seed_for_course)
+            frames = headless.run_generation(pop, settings['backend'], course, cache, budget=limits)
+            gen_time = time.perf_counter() - gen_start
+            evaluated += 1
+            print(f"[Isla {index}] Generación {pop.generation}: {frames} frames "
+                  f"({frames / max(gen_time, 1e-9):.0f} frames/s), mejor fitness {pop.best_fitness}")
+
+            if generations is not None and evaluated >= generations:
+                break
+
+            # Los emigrantes salen antes de la selección, con su tiempo de vida ya medido
+            if interval and evaluated % interval == 0:
+                migrants = pop.emigrants(settings['migrants'])
+                for target in neighbours(index, len(inboxes), settings['topology'], rng):
+                    inboxes[target].put(migrants)
+
+            pop.natural_selection()
+
+            # Recoger lo que haya llegado, sin esperar
+            arrivals = []
+            while True:
+                try:
+                    arrivals.extend(inboxes[index].get_nowait())
+                except queue.Empty:
+                    break
+            if arrivals:
+                # Si se acumulan envíos, entran primero los mejores
+                arrivals.sort(key=lambda genome: genome.fitness, reverse=True)
+                pop.immigrate(arrivals)
+                received += len(arrivals)
+
+            if saver and evaluated % settings['checkpoint_every'] == 0:
+                saver.save(pop)
+    except KeyboardInterrupt:
+        print(f"[Isla {index}] Entrenamiento interrumpido")
+
+    best = pop.best_player
+    results.put((index, pop.generation, pop.best_fitness, received,
+                 player.Genome(best.brain.clone(), pop.best_fitness) if best else None))
+
+    # Los emigrantes que nadie llegue a leer no deben impedir que el proceso termine
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+
+
+def _collect(processes, results, poll=0.5):
+    """
+    Recoge el resultado de cada isla, comprobando mientras tanto que los
+    procesos siguen vivos.
+
+    Args:
+        processes: Procesos de las islas, en orden de isla
+        results: Cola donde las islas dejan su resultado
+        poll: Segundos entre comprobaciones de los procesos
+
+    Returns:
+        Lista de resultados, en orden de llegada
+    """
+    reports = []
+    interrupted = False
+    while len(reports) < len(processes):
+        try:
+            reports.append(results.get(timeout=poll))
+            continue
+        except queue.Empty:
+            pass
+        except KeyboardInterrupt:
+            if interrupted:
+                raise
+            interrupted = True
+            print("Esperando a que las islas terminen su generación (Ctrl+C otra vez para abortar)")
+            continue
+
+        reported = {report[0] for report in reports}
+        for index, process in enumerate(processes):
+            if index in reported or process.exitcode is None:
+                continue
+            # El resultado puede estar aún en camino aunque el proceso ya haya terminado
+            try:
+                reports.append(results.get(timeout=poll))
+                break
+            except queue.Empty:
+                raise RuntimeError(f"La isla {index} terminó sin entregar su resultado "
+                                   f"(código de salida {process.exitcode})")
+    return reports
+
+
+def train_islands(islands=4, migration_interval=5, migrants=2, topology='ring',
+                  population_size=50, generations=None, seed=None, output_dir='models',
+                  backend='numpy', course_seed=None, cache_size=100000,
+                  crossover_rate=0.5, crossover='uniform', hidden=(), node_rate=0,
+                  connection_rate=0, checkpoint_dir=None, checkpoint_every=1, resume=False,
+                  max_frames=None, max_pipes=None, max_seconds=None, early_stop=False):
+    """
+    Entrena varias poblaciones en paralelo con migración entre ellas y guarda
+    el mejor jugador de todas las islas.
+
+    Args:
+        islands: Número de islas (procesos)
+        migration_interval: Generaciones entre migraciones (0 = sin migración)
+        migrants: Genomas que envía cada isla en cada migración
+        topology: A qué islas se envían ('ring', 'all' o 'random')
+        population_size: Número de jugadores de cada isla
+        El resto de argumentos son los de headless.train
+
+    Returns:
+        Lista de tuplas (isla, generación, mejor fitness, inmigrantes recibidos)
+    """
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Topología de migración desconocida: {topology}")
+
+    settings = dict(population_size=population_size, generations=generations, seed=seed,
+                    backend=backend, course_seed=course_seed, cache_size=cache_size,
+                    crossover_rate=crossover_rate, crossover=crossover, hidden=tuple(hidden),
+                    node_rate=node_rate, connection_rate=connection_rate,
+                    migration_interval=migration_interval, migrants=migrants,
+                    topology=topology, checkpoint_dir=checkpoint_dir,
+                    checkpoint_every=checkpoint_every, resume=resume, max_frames=max_frames,
+                    max_pipes=max_pipes, max_seconds=max_seconds, early_stop=early_stop)
+    inboxes = [multiprocessing.Queue() for _ in range(islands)]
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_run_island,
+                                         args=(i, settings, inboxes, results))
+                 for i in range(islands)]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+
+    # Con Ctrl+C las islas terminan su generación y entregan igualmente su
+    # resultado; un segundo Ctrl+C las detiene sin esperar
+    try:
+        reports = _collect(processes, results)
+    except BaseException:
+        # SIGKILL: SDL convierte SIGTERM en un evento de salida que las islas no leen
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+        for process in processes:
+            process.join()
+        raise
+    for process in processes:
+        process.join()
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    reports.sort(key=lambda report: report[0])
+    for index, generation, best_fitness, received, _ in reports:
+        print(f"Isla {index}: generación {generation}, mejor fitness {best_fitness}, "
+              f"{received} inmigrantes recibidos")
+    print(f"{islands} islas en {elapsed:.2f}s")
+
+    # Guardar el mejor jugador de todas las islas
+    index, generation, best_fitness, _, genome = max(reports, key=lambda report: report[2])
+    if genome is not None:
+        models = registry.ModelRegistry(output_dir)
+        model_id = models.save(genome.brain, generation, best_fitness, population_size * islands)
+        print(f"Modelo guardado como: modelo{model_id} ({models.data_path})")
+        print(f"Isla {index}, generaciones: {generation}, Fitness: {best_fitness}")
+    config.headless = False
+    config.game_mode = None
+    config.hidden_layers = ()
+    return [report[:4] for report in reports]
+
+
+def main():
+    parser = headless.build_parser('Entrenamiento FlappyBird AI por islas en varios procesos')
+    parser.add_argument('--islands', type=int, default=max(2, os.cpu_count() or 1),
+                        help='Número de islas, una por proceso (por defecto, una por núcleo)')
+    parser.add_argument('--migration-interval', type=int, default=5,
+                        help='Generaciones entre migraciones (0 = islas aisladas)')
+    parser.add_argument('--migrants', type=int, default=2,
+                        help='Mejores genomas que envía cada isla en cada migración')
+    parser.add_argument('--topology', choices=TOPOLOGIES, default='ring',
+                        help='Destino de los emigrantes: la siguiente isla (ring), '
+                             'todas (all) u otra al azar (random)')
+    args = parser.parse_args()
+    if args.workers > 1:
+        parser.error('--workers no se combina con --islands: cada isla ya es un proceso')
+    if args.autosave_interval is not None or args.autosave_generations is not None or args.autosave_best:
+        parser.error('--autosave-* no se combina con --islands: el mejor jugador de todas '
+                     'las islas se guarda al terminar')
+
+    train_islands(args.islands, args.migration_interval, args.migrants, args.topology,
+                  args.population, args.generations, args.seed, args.output, args.backend,
+                  args.course_seed, args.cache_size, args.crossover_rate, args.crossover,
+                  headless.parse_hidden(args.hidden), args.node_rate, args.connection_rate,
+                  args.checkpoint, args.checkpoint_every, args.resume, args.max_frames,
+                  args.max_pipes, args.max_seconds, args.early_stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,9 +4,14 @@ import config
 import components
 import population
 import player
+import renderer
+import timestep
+import checkpoint
+import autosave
+import registry
+import budget
 import os
 import time
-import re
 
 # Inicializar pygame
 pygame.init()
@@ -18,19 +23,20 @@ config.win_height = 500
 config.window = pygame.display.set_mode((config.win_width, config.win_height))
 pygame.display.set_caption("FlappyBird AI")
 
-# Inicializar pipes como lista vacía
-config.pipes = []
-
-def generate_pipes():
-    config.pipes.append(components.Pipes(config.win_width))
+# Inicializar pipes como cola vacía (los objetos Pipes se reutilizan)
+config.pipes = components.PipeQueue(win_width=config.win_width)
 
 def quit_game():
-    for event in pygame.event.get():
+    """
+    Cierra el juego si se pidió salir y devuelve todos los eventos pendientes
+    (no solo el primero, para no perder teclas pulsadas en el mismo frame).
+    """
+    events = pygame.event.get()
+    for event in events:
         if event.type == pygame.QUIT:
             pygame.quit()
             exit()
-        return event
-    return None
+    return events
 
 def load_assets():
     try:
@@ -49,21 +55,10 @@ def load_assets():
 
 def draw_background():
     """Dibuja el fondo en la ventana del juego"""
-    try:
-        # Intentar cargar directamente la imagen de fondo
-        if not hasattr(config, 'BG_IMG') or config.BG_IMG is None:
-            if os.path.exists('assets/background.png'):
-                config.BG_IMG = pygame.image.load('assets/background.png')
-                # Ajustar tamaño si es necesario
-                config.BG_IMG = pygame.transform.scale(config.BG_IMG, (config.win_width, config.win_height))
-        
-        # Dibujar la imagen si existe
-        if hasattr(config, 'BG_IMG') and config.BG_IMG:
-            config.window.blit(config.BG_IMG, (0, 0))
-        else:
-            config.window.fill((0, 0, 0))
-    except Exception as e:
-        print(f"Error cargando fondo: {str(e)}")
+    # Las imágenes se preparan una sola vez en load_assets
+    if config.BG_IMG:
+        config.window.blit(config.BG_IMG, (0, 0))
+    else:
         config.window.fill((0, 0, 0))
 
 def show_menu():
@@ -74,6 +69,7 @@ def show_menu():
     title = font.render('FlappyBird AI', True, (255, 255, 255))
     option1 = font.render('1. Entrenamiento', True, (255, 255, 255))
     option2 = font.render('2. Jugar', True, (255, 255, 255))
+    option3 = font.render('3. Continuar entrenamiento', True, (255, 255, 255))
     exit_text = font.render('0. Salir', True, (255, 255, 255))
     
     # Añadir un fondo semi-transparente a los textos para mejorar legibilidad
@@ -83,6 +79,8 @@ def show_menu():
     option1_bg.fill((0, 0, 0, 150))
     option2_bg = pygame.Surface((option2.get_width() + 20, option2.get_height() + 10), pygame.SRCALPHA)
     option2_bg.fill((0, 0, 0, 150))
+    option3_bg = pygame.Surface((option3.get_width() + 20, option3.get_height() + 10), pygame.SRCALPHA)
+    option3_bg.fill((0, 0, 0, 150))
     exit_bg = pygame.Surface((exit_text.get_width() + 20, exit_text.get_height() + 10), pygame.SRCALPHA)
     exit_bg.fill((0, 0, 0, 150))
     
@@ -96,8 +94,11 @@ def show_menu():
     config.window.blit(option2_bg, (40, 195))
     config.window.blit(option2, (50, 200))
     
-    config.window.blit(exit_bg, (40, 245))
-    config.window.blit(exit_text, (50, 250))
+    config.window.blit(option3_bg, (40, 245))
+    config.window.blit(option3, (50, 250))
+    
+    config.window.blit(exit_bg, (40, 295))
+    config.window.blit(exit_text, (50, 300))
     
     pygame.display.flip()
     
@@ -114,28 +115,18 @@ def show_menu():
                 elif event.key == pygame.K_2:
                     waiting = False
                     return 'play'
+                elif event.key == pygame.K_3:
+                    waiting = False
+                    return 'resume'
                 elif event.key == pygame.K_0:
                     pygame.quit()
                     exit()
         clock.tick(15)
 
 def get_saved_models():
-    models = []
-    if os.path.exists('models'):
-        for file in os.listdir('models'):
-            if file.endswith('.csv') and file.startswith('modelo'):
-                try:
-                    # Extraer número del modelo con regex
-                    match = re.search(r'modelo(\d+)\.csv', file)
-                    if match:
-                        model_num = int(match.group(1))
-                        models.append((model_num, file))
-                except:
-                    pass
-    
-    # Ordenar modelos por número
-    models.sort()
-    return models
+    # Los modelos más recientes del registro (uno por cada tecla del 1 al 9);
+    # solo se leen sus registros del índice, no todo el directorio
+    return registry.ModelRegistry('models').latest(9)
 
 def show_models_list():
     models = get_saved_models()
@@ -188,20 +179,9 @@ def show_models_list():
     list_bg.fill((0, 0, 0, 150))
     config.window.blit(list_bg, (25, 95))
     
-    for i, (model_num, filename) in enumerate(models):
-        # Obtener info del modelo si existe
-        info_text = ""
-        info_file = f'models/modelo{model_num}_info.txt'
-        if os.path.exists(info_file):
-            try:
-                with open(info_file, 'r') as f:
-                    lines = f.readlines()
-                    if lines:
-                        info_text = f" - Gen: {lines[0].split(':')[1].strip()}, Fitness: {lines[1].split(':')[1].strip()}"
-            except:
-                pass
-        
-        option = font.render(f"{i+1}. {filename}{info_text}", True, (255, 255, 255))
+    for i, model in enumerate(models):
+        info_text = f" - Gen: {model.generation}, Fitness: {model.fitness}"
+        option = font.render(f"{i+1}. modelo{model.id}{info_text}", True, (255, 255, 255))
         config.window.blit(option, (30, 100 + i * 40))
     
     back = font.render('0. Volver', True, (255, 255, 255))
@@ -224,96 +204,95 @@ def show_models_list():
                     idx = event.key - pygame.K_1
                     if idx < len(models):
                         waiting = False
-                        selection = models[idx][1]
+                        selection = models[idx].id
         clock.tick(15)
     
     return selection
 
-def play_with_model(model_path):
+def play_with_model(model_id):
     # Configurar el modo de juego
     config.game_mode = 'play'
     
-    # Crear el jugador y cargar el modelo
-    p = player.Player()
-    if not p.load_weights_from_csv(f'models/{model_path}'):
+    # Crear el jugador con el cerebro del modelo
+    net = registry.ModelRegistry('models').load(model_id)
+    if net is None:
+        print(f"Error: no existe el modelo {model_id}")
+        config.game_mode = None
         return
+    p = player.Player(net)
     
     # Configuración del juego
-    pipes_spawn_time = 10
+    spawner = components.PipeSpawner(config.pipes, config.win_width)
     config.ground = components.Ground(config.win_width)
+    hud = components.Hud()
+    
+    # Mensaje de fin de juego (se renderiza una sola vez)
+    font = components.get_font(16)
+    game_over = font.render("¡Game Over! Presiona ESC para volver", True, (255, 255, 255))
+    game_over_bg = pygame.Surface((game_over.get_width() + 20, game_over.get_height() + 10), pygame.SRCALPHA)
+    game_over_bg.fill((0, 0, 0, 150))
+    
+    # Solo se vuelven a pintar y enviar a pantalla las zonas que cambian
+    screen = renderer.Renderer(config.window, config.BG_IMG)
+    
+    # La simulación avanza con paso fijo, varias veces por frame dibujado
+    speed = timestep.FixedTimestep(60)
+    
+    def step():
+        # Generar, mover y eliminar tuberías
+        spawner.update()
+        if not p.alive:
+            return False  # Tras el Game Over las tuberías siguen a velocidad normal
+        
+        # Actualizar jugador
+        p.look()
+        p.think()
+        p.update(config.ground.rect)
     
     # Bucle principal del juego
     running = True
     while running:
-        event = quit_game()
-        if event and event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-            running = False
+        for event in quit_game():
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                running = False
+            speed.handle_event(event)
+        
+        # Avanzar la simulación los pasos que correspondan a la velocidad elegida
+        speed.run(step)
             
-        # Dibujar fondo
-        draw_background()
+        # Restaurar el fondo bajo lo dibujado en el frame anterior
+        screen.clear()
         
         # Información del modelo - con fondo semi-transparente
-        font = pygame.font.SysFont('Arial', 16)
-        info_text = font.render(f"Modelo: {model_path}", True, (255, 255, 255))
-        score_text = font.render(f"Puntuación: {p.lifespan}", True, (255, 255, 255))
-        
-        info_bg = pygame.Surface((max(info_text.get_width(), score_text.get_width()) + 20, 50), pygame.SRCALPHA)
-        info_bg.fill((0, 0, 0, 150))
-        config.window.blit(info_bg, (5, 5))
-        
-        config.window.blit(info_text, (10, 10))
-        config.window.blit(score_text, (10, 30))
-        
-        # Generar tuberías
-        if pipes_spawn_time <= 0:
-            generate_pipes()
-            pipes_spawn_time = 200
-        pipes_spawn_time -= 1
-        
-        # Actualizar y dibujar tuberías
-        to_remove = []
-        for pipe in config.pipes:
-            pipe.update()
-            if pipe.off_screen:
-                to_remove.append(pipe)
-        
-        for pipe in to_remove:
-            if pipe in config.pipes:
-                config.pipes.remove(pipe)
+        screen.add(hud.draw(config.window, [f"Modelo: modelo{model_id}", f"Puntuación: {p.lifespan}",
+                                            speed.label()]))
         
-        # Actualizar y dibujar jugador
-        if p.alive:
-            p.look()
-            p.think()
-            p.update(config.ground.rect)
-            
-        else:
+        if not p.alive:
             # Juego terminado
-            game_over = font.render("¡Game Over! Presiona ESC para volver", True, (255, 255, 255))
-            game_over_bg = pygame.Surface((game_over.get_width() + 20, game_over.get_height() + 10), pygame.SRCALPHA)
-            game_over_bg.fill((0, 0, 0, 150))
-            config.window.blit(game_over_bg, (config.win_width//2 - (game_over.get_width() + 20)//2, config.win_height//2 - 5))
+            screen.add(config.window.blit(game_over_bg, (config.win_width//2 - (game_over.get_width() + 20)//2, config.win_height//2 - 5)))
             config.window.blit(game_over, (config.win_width//2 - game_over.get_width()//2, config.win_height//2))
         
         # Dibujar tuberías después de actualizar
         for pipe in config.pipes:
-            pipe.draw(config.window)
+            screen.add(pipe.draw(config.window))
             
         # Dibujar el suelo después de todo
-        config.ground.draw(config.window)
+        screen.add(config.ground.draw(config.window))
         
         # Dibujar el jugador por encima del suelo
         if p.alive:
-            p.draw(config.window)
+            screen.add(p.draw(config.window))
         
-        pygame.display.flip()
+        screen.present()
         clock.tick(60)
     
     # Limpiar para volver al menú
     config.pipes.clear()
     config.game_mode = None
 
-def train_population(population_size=50):
+def train_population(population_size=50, checkpoint_dir='checkpoint', resume=False,
+                     autosave_interval=300, autosave_generations=None, autosave_best=False,
+                     max_frames=None, max_pipes=100, max_seconds=None, early_stop=True):
     # Configurar el modo de entrenamiento
     config.game_mode = 'train'
     
@@ -322,88 +301,119 @@ def train_population(population_size=50):
     # Establecer límite de iteraciones a None para indicar entrenamiento infinito
     pop.iterations_limit = None
     
+    # Cada generación se guarda un checkpoint (en segundo plano); solo se
+    # reanuda desde él si se pide (opción "Continuar entrenamiento")
+    saver = checkpoint.Checkpoint(checkpoint_dir)
+    resumed = False
+    if resume:
+        try:
+            resumed = saver.restore(pop)
+        except ValueError as e:
+            print(f"No se puede reanudar: {e}")
+        if resumed:
+            print(f"Reanudando entrenamiento desde la generación {pop.generation}")
+        else:
+            print("Empezando un entrenamiento nuevo")
+    
     # Configuración del juego
-    pipes_spawn_time = 10
+    spawner = components.PipeSpawner(config.pipes, config.win_width)
     config.ground = components.Ground(config.win_width)
+    hud = components.Hud()
+    
+    # Guardado automático en segundo plano (por defecto cada 5 minutos); el
+    # bucle solo encola copias en memoria, nunca espera al disco
+    auto_save = autosave.AutoSaver('models', autosave_interval, autosave_generations, autosave_best)
+    if resumed:
+        auto_save.mark_saved(pop)
+    
+    # Solo se vuelven a pintar y enviar a pantalla las zonas que cambian
+    screen = renderer.Renderer(config.window, config.BG_IMG)
     
-    # Variables para guardar automáticamente
-    last_save_time = time.time()
-    auto_save_interval = 300  # Guardar cada 5 minutos
+    # La simulación avanza con paso fijo, varias veces por frame dibujado
+    speed = timestep.FixedTimestep(60)
+    
+    # Con poblaciones grandes solo los mejores pájaros se dibujan completos
+    lod = renderer.LevelOfDetail()
+    
+    # Límites de cada generación (ver budget.py); al cortar una generación los
+    # pájaros vivos se dan por muertos con el tiempo de vida del corte. Por
+    # defecto una generación termina a las 100 tuberías o cuando la selección
+    # ya está decidida, para que un pájaro que no muere no la alargue sin fin
+    limits = budget.GenerationBudget(max_frames, max_pipes, max_seconds, early_stop)
+    limits.start(pop)
+    frame = 0
+    survivors = lambda: [p.brain for p in pop.players if p.alive]
+    
+    def step():
+        nonlocal frame
+        if pop.extinct():
+            # Cuando todos están muertos, hacer selección natural y reiniciar
+            spawner.reset()
+            pop.natural_selection()
+            auto_save.checkpoint(saver, pop)  # Estado completo, para poder reanudar
+            limits.start(pop)
+            frame = 0
+        else:
+            # Actualizar tuberías y todos los jugadores vivos
+            spawner.update()
+            pop.update_live_players()
+            frame += 1
+            if not pop.extinct() and limits.exhausted(frame, survivors):
+                limits.finish(pop.players, frame)
+                print(f"Generación {pop.generation} cortada en el frame {frame} ({limits.reason})")
     
     # Bucle principal de entrenamiento
     running = True
     while running:
-        event = quit_game()
-        if event and event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
-            # Guardar antes de salir
-            pop.save_best_player()
-            running = False
+        for event in quit_game():
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE and running:
+                # Guardar antes de salir
+                auto_save.save(pop)
+                running = False
+            speed.handle_event(event)
+        
+        # Avanzar la simulación los pasos que correspondan a la velocidad elegida
+        speed.run(step)
             
-        # Dibujar fondo
-        draw_background()
+        # Restaurar el fondo bajo lo dibujado en el frame anterior
+        screen.clear()
         
-        # Guardar automáticamente cada cierto tiempo
-        current_time = time.time()
-        if current_time - last_save_time > auto_save_interval:
-            pop.save_best_player()
-            last_save_time = current_time
+        # Guardar automáticamente según la programación
+        auto_save.update(pop)
         
         # Mostrar información del entrenamiento con fondo semi-transparente
-        font = pygame.font.SysFont('Arial', 16)
-        gen_text = font.render(f"Generación: {pop.generation} (Infinito)", True, (255, 255, 255))
-        alive_text = font.render(f"Vivos: {sum(1 for p in pop.players if p.alive)}/{len(pop.players)}", True, (255, 255, 255))
-        fitness_text = font.render(f"Mejor Fitness: {pop.best_fitness}", True, (255, 255, 255))
-        time_since_save = current_time - last_save_time
-        save_text = font.render(f"Último guardado: hace {int(time_since_save)}s", True, (255, 255, 255))
-        esc_text = font.render("ESC para guardar y salir", True, (255, 255, 255))
+        # (el HUD solo vuelve a renderizar las líneas que cambian)
+        time_since_save = auto_save.seconds_since_save()
+        screen.add(hud.draw(config.window, [
+            f"Generación: {pop.generation} (Infinito)",
+            f"Vivos: {sum(1 for p in pop.players if p.alive)}/{len(pop.players)}",
+            f"Mejor Fitness: {pop.best_fitness}",
+            f"Último guardado: hace {int(time_since_save)}s",
+            speed.label(),
+            lod.label(),
+            limits.label(),
+            "ESC para guardar y salir",
+        ]))
         
-        # Crear un fondo semi-transparente para todos los textos
-        max_width = max(gen_text.get_width(), alive_text.get_width(), 
-                       fitness_text.get_width(), save_text.get_width(), 
-                       esc_text.get_width()) + 20
-        info_bg = pygame.Surface((max_width, 110), pygame.SRCALPHA)
-        info_bg.fill((0, 0, 0, 150))
-        config.window.blit(info_bg, (5, 5))
-        
-        config.window.blit(gen_text, (10, 10))
-        config.window.blit(alive_text, (10, 30))
-        config.window.blit(fitness_text, (10, 50))
-        config.window.blit(save_text, (10, 70))
-        config.window.blit(esc_text, (10, 90))
-        
-        # Generar tuberías
-        if pipes_spawn_time <= 0:
-            generate_pipes()
-            pipes_spawn_time = 200
-        pipes_spawn_time -= 1
-        
-        # Actualizar y dibujar tuberías
-        to_remove = []
+        # Dibujar tuberías
         for pipe in config.pipes:
-            pipe.draw(config.window)
-            pipe.update()
-            if pipe.off_screen:
-                to_remove.append(pipe)
-        
-        for pipe in to_remove:
-            if pipe in config.pipes:
-                config.pipes.remove(pipe)
+            screen.add(pipe.draw(config.window))
         
         # Dibujar el suelo
-        config.ground.draw(config.window)
+        screen.add(config.ground.draw(config.window))
         
-        # Actualizar todos los jugadores vivos
-        if not pop.extinct():
-            pop.update_live_players()
-        else:
-            # Cuando todos están muertos, hacer selección natural y reiniciar
-            config.pipes.clear()
-            pop.natural_selection()
-            pipes_spawn_time = 10
+        # Dibujar (en lote) los jugadores vivos; el nivel de detalle se
+        # ajusta según lo que tarda este dibujo
+        draw_start = time.perf_counter()
+        screen.add(pop.draw_live_players(config.window, lod))
+        lod.record(time.perf_counter() - draw_start)
         
-        pygame.display.flip()
+        screen.present()
         clock.tick(60)
     
+    # Terminar las escrituras pendientes antes de volver al menú
+    auto_save.close()
+    
     # Limpiar para volver al menú
     config.pipes.clear()
     config.game_mode = None
@@ -412,6 +422,9 @@ def main():
     # Cargar recursos si están disponibles
     load_assets()
     
+    # Importar al registro los modelos CSV del formato anterior que falten
+    registry.ModelRegistry('models').import_legacy()
+    
     # Inicializar el suelo
     config.ground = components.Ground(config.win_width)
     
@@ -425,6 +438,10 @@ def main():
             # Iniciar entrenamiento infinito
             train_population()
         
+        elif choice == 'resume':
+            # Continuar desde el último checkpoint
+            train_population(resume=True)
+        
         elif choice == 'play':
             # Mostrar lista de modelos
             model = show_models_list()
@@ -5,6 +5,9 @@ class Node:
     La clase Node representa un nodo (neurona) en la red neuronal.
     Cada nodo puede recibir entradas, procesarlas y enviar su salida a otros nodos.
     """
+    # __slots__ evita un diccionario por instancia (se crean miles por generación)
+    __slots__ = ('id', 'layer', 'input_value', 'output_value', 'connections')
+
     def __init__(self, id_number):
         """
         Inicializa un nodo con sus propiedades básicas.
@@ -13,7 +16,7 @@ class Node:
             id_number: Identificador único del nodo
         """
         self.id = id_number              # Identificador único del nodo
-        self.layer = 0                   # Capa a la que pertenece (0=entrada, 1=salida)
+        self.layer = 0                   # Capa a la que pertenece (0=entrada, la última=salida)
         self.input_value = 0             # Valor de entrada acumulado desde conexiones entrantes
         self.output_value = 0            # Valor de salida (resultado de la función de activación)
         self.connections = []            # Lista de conexiones salientes desde este nodo
@@ -21,15 +24,15 @@ class Node:
     def activate(self):
         """
         Activa el nodo aplicando la función de activación y propaga el resultado.
-        Para nodos de salida, aplica la función sigmoide al valor de entrada.
+        Para nodos ocultos y de salida, aplica la función sigmoide al valor de entrada.
         Para nodos de entrada, el output_value ya está establecido directamente.
         """
         # Función sigmoide: transforma cualquier valor en un número entre 0 y 1
         def sigmoid(x):
             return 1/(1+math.exp(-x))
         
-        # Solo los nodos de salida (capa 1) aplican la función de activación
-        if self.layer == 1:
+        # Los nodos ocultos y de salida (capa > 0) aplican la función de activación
+        if self.layer > 0:
             self.output_value = sigmoid(self.input_value)
         
         # Propagar la salida a todos los nodos conectados
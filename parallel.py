@@ -0,0 +1,248 @@
+"""
+Evaluación del fitness en paralelo con un pool de procesos.
+
+Los jugadores de la población se reparten en bloques entre los procesos del
+pool. Todos simulan el mismo recorrido de tuberías (PipeCourse con la semilla
+de la generación) y escriben el tiempo de vida de sus pájaros en memoria
+compartida. Los pesos también viajan por memoria compartida, así que por
+generación solo se envía a cada proceso un puñado de enteros.
+
+Con límite de tiempo o corte anticipado (ver budget.py) la generación se
+simula por rondas con un horizonte de frames que se duplica. El estado de los
+pájaros también queda en memoria compartida al terminar cada ronda, así que la
+siguiente continúa desde el horizonte anterior en cualquier proceso del pool.
+Las topologías (NetworkPlan) se envían una vez por generación, serializadas en
+memoria compartida; las tareas solo llevan índices.
+"""
+import multiprocessing
+import os
+import pickle
+import time
+import numpy as np
+import components
+import config
+import vectorized
+
+_shared = {}  # Memoria compartida recibida al arrancar cada proceso del pool
+_plans = {}   # Topologías de la generación en curso, ya deserializadas en este proceso
+
+# Estado de cada pájaro entre rondas: y, velocidad, aleteo, vivo, tiempo de vida y visión
+STATE_COLUMNS = 8
+
+
+def _init_worker(weights, results, state, plans):
+    """Guarda en el proceso del pool los bloques de memoria compartida."""
+    _shared['weights'] = weights
+    _shared['results'] = results
+    _shared['state'] = state
+    _shared['plans'] = plans
+
+
+def _load_plans(generation, length):
+    """Topologías de la generación, deserializadas una sola vez por proceso."""
+    if _plans.get('generation') != generation:
+        _plans['plans'] = pickle.loads(memoryview(_shared['plans']).cast('B')[:length])
+        _plans['generation'] = generation
+    return _plans['plans']
+
+
+def _save_state(sim, state):
+    state[:, 0] = sim.y
+    state[:, 1] = sim.vel
+    state[:, 2] = sim.flap
+    state[:, 3] = sim.alive
+    state[:, 4] = sim.lifespan
+    state[:, 5:] = sim.vision
+
+
+def _load_state(sim, state):
+    sim.y[:] = state[:, 0]
+    sim.vel[:] = state[:, 1]
+    sim.flap[:] = state[:, 2] != 0
+    sim.alive[:] = state[:, 3] != 0
+    sim.lifespan[:] = state[:, 4]
+    sim.vision[:] = state[:, 5:]
+
+
+def _evaluate_chunk(segments, start, stop, course_seed, plans, first_frame=0,
+                    max_frames=None, seconds=None):
+    """
+    Simula en un proceso del pool los pájaros [start, stop) de la generación.
+
+    Args:
+        segments: Lista de (índice de la topología, posición del primer peso,
+                  número de pájaros) con los pájaros consecutivos que la comparten
+        start, stop: Posiciones de los pájaros en la memoria de resultados
+        course_seed: Semilla del recorrido de tuberías
+        plans: Tupla (generación, bytes) de las topologías serializadas
+        first_frame: Frame en el que se quedó la ronda anterior (0 = desde el principio)
+        max_frames: Frames como máximo (None = hasta que mueran todos)
+        seconds: Tiempo que queda de la generación (None = sin límite)
+
+    Returns:
+        Tupla (frames que duró la simulación del bloque, si quedaron pájaros vivos)
+    """
+    deadline = None if seconds is None else time.monotonic() + seconds
+    weights = np.frombuffer(_shared['weights'], dtype=np.float64)
+    results = np.frombuffer(_shared['results'], dtype=np.int64)
+    state = np.frombuffer(_shared['state'], dtype=np.float64).reshape(-1, STATE_COLUMNS)[start:stop]
+    topologies = _load_plans(*plans)
+
+    groups = []
+    for plan_index, offset, rows in segments:
+        plan = topologies[plan_index]
+        cols = len(plan.conn_from)
+        groups.append((plan, weights[offset:offset + rows * cols].reshape(rows, cols)))
+
+    sim = vectorized.BatchSimulation(vectorized.BatchBrains.from_groups(groups))
+    if first_frame:
+        _load_state(sim, state)
+    frames = vectorized.simulate(sim, config.win_width, components.Ground(config.win_width),
+                                 components.PipeCourse.get(course_seed), max_frames, deadline,
+                                 first_frame)
+    _save_state(sim, state)
+    results[start:stop] = sim.lifespan
+    return frames, not sim.extinct()
+
+
+class ParallelEvaluator:
+    """
+    Pool de procesos que evalúa generaciones completas en paralelo.
+    Debe cerrarse con close() al terminar.
+    """
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers: Número de procesos (None = uno por núcleo)
+        """
+        self.workers = workers or os.cpu_count()
+        self.pool = None
+        self.capacity = (0, 0, 0)  # (pesos, pájaros, bytes de topologías) reservados
+        self.weights = None  # Memoria compartida con la matriz de pesos
+        self.results = None  # Memoria compartida con los tiempos de vida
+        self.state = None    # Memoria compartida con el estado de los pájaros entre rondas
+        self.plans = None    # Memoria compartida con las topologías serializadas
+        self.generation = 0  # Generaciones evaluadas (para saber si cambiaron las topologías)
+
+    def _allocate(self, floats, rows, plan_bytes):
+        """
+        Reserva la memoria compartida y arranca el pool. Solo se repite si la
+        población, el número total de pesos o el tamaño de las topologías
+        crecen por encima de lo reservado.
+        """
+        if self.pool is not None and all(n <= c for n, c in zip((floats, rows, plan_bytes),
+                                                                  self.capacity)):
+            return
+        if self.pool is not None:
+            self.close()
+        # Las topologías crecen con las mutaciones estructurales: se reserva de más
+        plan_bytes = max(plan_bytes * 2, 1 << 16)
+        # Los procesos reciben la memoria compartida al arrancar, no en cada tarea
+        self.weights = multiprocessing.RawArray('d', max(1, floats))
+        self.results = multiprocessing.RawArray('q', max(1, rows))
+        self.state = multiprocessing.RawArray('d', max(1, rows) * STATE_COLUMNS)
+        self.plans = multiprocessing.RawArray('B', plan_bytes)
+        self.pool = multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                         initargs=(self.weights, self.results, self.state,
+                                                   self.plans))
+        self.capacity = (floats, rows, plan_bytes)
+
+    def evaluate(self, players, course_seed, budget=None):
+        """
+        Evalúa a los jugadores indicados y guarda su tiempo de vida. Si la
+        generación se corta, los pájaros que llegan al frame de corte quedan
+        vivos, con ese tiempo de vida.
+
+        Args:
+            players: Jugadores a evaluar
+            course_seed: Semilla del recorrido de tuberías de esta generación
+            budget: GenerationBudget de la generación (None = sin límites)
+
+        Returns:
+            Número de frames que duró la generación
+        """
+        if not players:
+            return 0
+
+        # Los pájaros con la misma topología se colocan seguidos
+        by_plan = {}
+        for p in players:
+            by_plan.setdefault(id(p.brain.plan), []).append(p)
+        ordered = [p for group in by_plan.values() for p in group]
+        topologies = [group[0].brain.plan for group in by_plan.values()]
+        plan_index = [i for i, group in enumerate(by_plan.values()) for _ in group]
+        sizes = [len(topologies[i].conn_from) for i in plan_index]
+        offsets = np.concatenate(([0], np.cumsum(sizes)))
+        serialized = pickle.dumps(topologies, pickle.HIGHEST_PROTOCOL)
+        self._allocate(int(offsets[-1]), len(ordered), len(serialized))
+
+        weights = np.frombuffer(self.weights, dtype=np.float64)
+        weights[:offsets[-1]] = np.frombuffer(b''.join([p.brain.weights.tobytes() for p in ordered]))
+        memoryview(self.plans).cast('B')[:len(serialized)] = serialized
+        self.generation += 1
+        plans = (self.generation, len(serialized))
+
+        bounds = np.linspace(0, len(ordered), min(self.workers, len(ordered)) + 1).astype(int)
+        chunks = []
+        for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            segments = []
+            i = start
+            while i < stop:
+                j = i
+                while j < stop and plan_index[j] == plan_index[i]:
+                    j += 1
+                segments.append((plan_index[i], int(offsets[i]), j - i))
+                i = j
+            chunks.append((segments, start, stop, course_seed, plans))
+
+        limit = budget.frame_limit if budget else None
+        horizon = budget.horizon(limit) if budget else None
+        results = np.frombuffer(self.results, dtype=np.int64)
+        stopped = None  # Frame de corte (None = murieron todos)
+        reports = [(0, True)] * len(chunks)  # (frames, quedan vivos) de cada bloque
+        first_frame = 0  # Frame desde el que continúan los bloques con pájaros vivos
+        while True:
+            seconds = budget.remaining() if budget else None
+            # Solo los bloques con pájaros vivos siguen, desde donde se quedaron
+            running = [i for i, (_, alive) in enumerate(reports) if alive]
+            tasks = [chunks[i] + (first_frame, horizon, seconds) for i in running]
+            for i, report in zip(running, self.pool.starmap(_evaluate_chunk, tasks)):
+                reports[i] = report
+            for p, lifespan in zip(ordered, results[:len(ordered)].tolist()):
+                p.lifespan = lifespan
+            frames = max(f for f, _ in reports)
+
+            # Los bloques detenidos por tiempo antes del horizonte marcan el corte
+            timed = [f for f, alive in reports if alive and f != horizon]
+            if timed:
+                stopped = min(timed)
+                budget.reason = 'límite de tiempo'
+                break
+            if not any(alive for _, alive in reports):
+                break
+            decided = budget.decided(ordered) if budget else None
+            if decided is not None:
+                stopped = decided
+                break
+            if horizon == limit:
+                stopped = horizon
+                break
+            if budget.expired():
+                stopped = horizon
+                break
+            first_frame = horizon
+            horizon = budget.horizon(limit, horizon, ordered)
+
+        for p in ordered:
+            if stopped is not None and p.lifespan >= stopped:
+                p.lifespan = stopped
+                p.alive = True
+            else:
+                p.alive = False
+        return frames if stopped is None else stopped
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
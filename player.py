@@ -1,16 +1,66 @@
 import brain
+import csv
+import os
 import random
 import pygame
 import config
-import math
+import components
+
+# Umbral de la salida de la red a partir del cual el pájaro aletea
+FLAP_THRESHOLD = 0.73
+
+# Geometría del pájaro (posición inicial y tamaño del rectángulo de colisión)
+BIRD_X, BIRD_Y = 50, 200
+BIRD_WIDTH, BIRD_HEIGHT = 34, 24
+
+# Entradas de la red: las tres distancias de la visión del pájaro
+INPUTS = 3
+
+
+class Genome:
+    """
+    Genotipo de un jugador: su cerebro (array de pesos más plan compartido) y
+    el fitness heredado. La reproducción trabaja solo con genomas; los objetos
+    Player se crean (o se reutilizan) cuando la generación empieza a jugar.
+    """
+    __slots__ = ('brain', 'fitness')
+
+    def __init__(self, brain, fitness=0):
+        self.brain = brain
+        self.fitness = fitness
+
+    def clone(self):
+        """Copia del genoma (los pesos se comparten hasta que uno de los dos mute)."""
+        return Genome(self.brain.clone(), self.fitness)
 
 
 class Player:
-    def __init__(self):
+    def __init__(self, net=None, color=None):
+        """
+        Args:
+            net: Cerebro del jugador (None = uno nuevo con pesos aleatorios)
+            color: Color del pájaro en modo entrenamiento (None = aleatorio)
+        """
     # Bird
-        self.x, self.y = 50, 200  # Posición inicial del pájaro
-        self.rect = pygame.Rect(self.x, self.y, 34, 24)  # Rectángulo de colisión
-        self.color = random.randint(100, 255), random.randint(100, 255), random.randint(100, 255)  # Color aleatorio
+        self.rect = pygame.Rect(BIRD_X, BIRD_Y, BIRD_WIDTH, BIRD_HEIGHT)  # Rectángulo de colisión
+        self.color = color or (random.randint(100, 255), random.randint(100, 255), random.randint(100, 255))  # Color aleatorio
+        self.inputs = INPUTS  # Número de entradas para la red neuronal
+        if net is None:
+            net = brain.Brain(self.inputs, hidden=config.hidden_layers)  # Crea una red neuronal
+            net.generate_net()  # Inicializa la red neuronal
+        self.reset(net)
+
+    def reset(self, net, fitness=0):
+        """
+        Devuelve al jugador al estado inicial con otro cerebro, de modo que el
+        mismo objeto se puede reutilizar en la siguiente generación.
+
+        Args:
+            net: Cerebro que usará el jugador
+            fitness: Fitness heredado del genoma
+        """
+        self.x, self.y = BIRD_X, BIRD_Y  # Posición inicial del pájaro
+        self.rect.topleft = (self.x, self.y)
         self.vel = 0  # Velocidad vertical inicial
         self.flap = False  # Estado del aleteo
         self.alive = True  # Estado de vida
@@ -24,14 +74,39 @@ class Player:
         # AI
         self.decision = None  # Resultado de la decisión de la IA
         self.vision = [0.5, 1, 0.5]  # Datos de entrada para la IA (visión)
-        self.fitness = 0  # Puntuación de aptitud para el algoritmo genético
-        self.inputs = 3  # Número de entradas para la red neuronal
-        self.brain = brain.Brain(self.inputs)  # Crea una red neuronal
-        self.brain.generate_net()  # Inicializa la red neuronal
+        self.fitness = fitness  # Puntuación de aptitud para el algoritmo genético
+        self.brain = net
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        self._color = color
+        self._surface = None  # Se crea al dibujar, una sola vez por color
+
+    def color_surface(self):
+        """Superficie del tamaño del pájaro rellena de su color (para dibujar en lote)."""
+        if self._surface is None:
+            self._surface = pygame.Surface((BIRD_WIDTH, BIRD_HEIGHT))
+            self._surface.fill(self._color)
+        return self._surface
 
     # Game related functions
     def draw(self, window):
-        if config.game_mode == 'play' and config.BIRD_IMGS:
+        """Dibuja el pájaro y devuelve el rectángulo de pantalla modificado."""
+        return window.blit(*self.sprite())
+
+    def sprite(self):
+        """
+        Avanza la animación y devuelve la imagen del pájaro y su posición,
+        listas para window.blit o para dibujar muchos pájaros con window.blits.
+
+        Returns:
+            Tupla (superficie, posición)
+        """
+        if config.game_mode == 'play' and config.BIRD_SPRITES:
             # Gestionar animación del pájaro
             self.img_count += 1
             
@@ -55,13 +130,12 @@ class Player:
                 self.tilt = -90  # Hacia abajo cuando cae rápido
                 self.img_index = 1  # Usar imagen central durante la caída
             
-            # Rotar y dibujar la imagen del pájaro
-            rotated_image = pygame.transform.rotate(config.BIRD_IMGS[self.img_index], self.tilt)
+            # Dibujar la imagen del pájaro ya rotada (precalculada al cargar las imágenes)
+            rotated_image = config.BIRD_SPRITES[(self.img_index, self.tilt)]
             rect = rotated_image.get_rect(center=self.rect.center)
-            window.blit(rotated_image, rect.topleft)
-        else:
-            # Modo entrenamiento: dibujar rectángulo simple
-            pygame.draw.rect(window, self.color, self.rect)
+            return rotated_image, rect.topleft
+        # Modo entrenamiento: rectángulo simple del color del pájaro
+        return self.color_surface(), self.rect.topleft
 
     def ground_collision(self, ground):
         return pygame.Rect.colliderect(self.rect, ground)
@@ -69,13 +143,16 @@ class Player:
     def sky_collision(self):
         return bool(self.rect.y < 10)
 
-    def pipe_collision(self):
-        for p in config.pipes:
-            return pygame.Rect.colliderect(self.rect, p.top_rect) or \
-                   pygame.Rect.colliderect(self.rect, p.bottom_rect)
+    def pipe_collision(self, world=None):
+        # Comprobar todas las tuberías en pantalla, no solo la primera
+        if world is None:
+            world = self.snapshot()
+        return world.collides(self.rect.top, self.rect.bottom)
 
-    def update(self, ground):
-        if not (self.ground_collision(ground) or self.pipe_collision() or self.sky_collision()):
+    def update(self, ground, world=None):
+        if world is None:
+            world = self.snapshot(ground)
+        if not (world.collides(self.rect.top, self.rect.bottom) or self.sky_collision()):
             # Gravity
             self.vel += 0.3
             self.rect.y += self.vel
@@ -102,57 +179,78 @@ class Player:
                 return p
         return None  # En caso de que no haya tubos
 
+    @staticmethod
+    def snapshot(ground=None):
+        """Resumen del mundo actual (config.pipes) para un solo pájaro."""
+        return components.WorldSnapshot(config.pipes, ground, BIRD_X, BIRD_X + BIRD_WIDTH)
+
     # AI related functions
-    def look(self):
-        closest = self.closest_pipe()
-        if config.pipes and closest:
+    def look(self, world=None):
+        if world is None:
+            world = self.snapshot()
+        if world.closest:
             # Line to top pipe
-            self.vision[0] = max(0, self.rect.center[1] - closest.top_rect.bottom) / 500
-            if config.game_mode != 'play':  # Solo mostrar líneas en modo entrenamiento
-                pygame.draw.line(config.window, self.color, self.rect.center,
-                                (self.rect.center[0], closest.top_rect.bottom))
+            self.vision[0] = max(0, self.rect.center[1] - world.gap_top) / 500
 
             # Line to mid pipe
-            self.vision[1] = max(0, closest.x - self.rect.center[0]) / 500
-            if config.game_mode != 'play':
-                pygame.draw.line(config.window, self.color, self.rect.center,
-                                (closest.x, self.rect.center[1]))
+            self.vision[1] = max(0, world.pipe_x - self.rect.center[0]) / 500
 
             # Line to bottom pipe
-            self.vision[2] = max(0, closest.bottom_rect.top - self.rect.center[1]) / 500
-            if config.game_mode != 'play':
-                pygame.draw.line(config.window, self.color, self.rect.center,
-                                (self.rect.center[0], closest.bottom_rect.top))
+            self.vision[2] = max(0, world.gap_bottom - self.rect.center[1]) / 500
+
+    def draw_lines(self, window, world):
+        """
+        Dibuja las líneas de visión hacia la tubería más cercana.
+
+        Returns:
+            Rectángulo de pantalla modificado (o None si no hay tubería)
+        """
+        closest = world.closest
+        if not closest:
+            return None
+        center = self.rect.center
+        top = pygame.draw.line(window, self.color, center, (center[0], closest.top_rect.bottom))
+        mid = pygame.draw.line(window, self.color, center, (closest.x, center[1]))
+        bottom = pygame.draw.line(window, self.color, center, (center[0], closest.bottom_rect.top))
+        return top.union(mid).union(bottom)
 
     def think(self):
         self.decision = self.brain.feed_forward(self.vision)
-        if self.decision > 0.73:
+        if self.decision > FLAP_THRESHOLD:
             self.bird_flap()
 
     def calculate_fitness(self):
         self.fitness = self.lifespan
 
+    def genome(self):
+        """Genoma del jugador (sin copiar el array de pesos)."""
+        return Genome(self.brain.clone(), self.fitness)
+
     def clone(self):
-        clone = Player()
+        clone = Player(self.brain.clone(), self.color)
         clone.fitness = self.fitness
-        clone.brain = self.brain.clone()
-        clone.brain.generate_net()
         return clone
 
     # Cargar los pesos desde un archivo CSV
     def load_weights_from_csv(self, filename):
         try:
+            # Si el modelo tiene una topología propia, se guarda junto a los pesos
+            topology = filename[:-len('.csv')] + '_red.csv'
+            if os.path.exists(topology):
+                with open(topology, newline='') as f:
+                    plan = brain.plan_from_rows(list(csv.reader(f)))[0]
+                self.brain.set_plan(plan)
+
             with open(filename, 'r') as f:
                 lines = f.readlines()
-                if len(lines) != len(self.brain.connections):
-                    print(f"Error: El modelo tiene {len(lines)} conexiones pero se esperaban {len(self.brain.connections)}")
+                if len(lines) != len(self.brain.weights):
+                    print(f"Error: El modelo tiene {len(lines)} conexiones pero se esperaban {len(self.brain.weights)}")
                     return False
                 
                 for i, line in enumerate(lines):
                     weight = float(line.strip())
-                    self.brain.connections[i].weight = weight
+                    self.brain.weights[i] = weight
                 
-                self.brain.generate_net()
                 return True
         except Exception as e:
             print(f"Error al cargar el modelo: {str(e)}")
@@ -4,8 +4,12 @@ import player
 import math
 import species
 import operator
-import os
-import csv
+import numpy as np
+import heapq
+import random
+import genetics
+import brain
+import registry
 
 
 class Population:
@@ -14,12 +18,14 @@ class Population:
     Implementa la selección natural, especiación y generación de nuevas poblaciones.
     """
     
-    def __init__(self, size):
+    def __init__(self, size, operators=None):
         """
         Inicializa una población de jugadores (pájaros).
         
         Args:
             size: Número de jugadores en la población
+            operators: GeneticOperators para mutar y cruzar (None = por defecto, solo mutación,
+                       con una semilla tomada de random para que sea reproducible)
         """
         self.players = []                # Lista de jugadores
         self.generation = 1              # Contador de generaciones
@@ -32,25 +38,80 @@ class Population:
         # Crear la población inicial con jugadores aleatorios
         for i in range(0, self.size):
             self.players.append(player.Player())
+        
+        # Todos los objetos Player creados; se reutilizan en cada generación
+        self.pool = list(self.players)
+        
+        # Mutación y cruce en bloque con un generador propio de este entrenamiento
+        self.operators = operators or genetics.GeneticOperators(random.getrandbits(64))
+
+    def draw_live_players(self, window, lod=None):
+        """
+        Dibuja los jugadores vivos: primero sus líneas de visión y después
+        todos los pájaros con una sola llamada a window.blits.
+
+        Args:
+            window: Superficie donde dibujar
+            lod: LevelOfDetail opcional; si lo hay, solo los mejores pájaros se
+                 dibujan completos y el resto como una franja de densidad
+
+        Returns:
+            Lista de rectángulos de pantalla modificados
+        """
+        alive = [p for p in self.players if p.alive]
+        dirty = []
+        if lod is not None and lod.detail is not None and len(alive) > lod.detail:
+            # Mejores = más tiempo vivos y, a igualdad, hijos de padres con más fitness
+            top = heapq.nlargest(lod.detail, alive, key=lambda p: (p.lifespan, p.fitness))
+            chosen = set(map(id, top))
+            rest = [p for p in alive if id(p) not in chosen]
+            dirty.append(lod.draw_density(window, rest, player.BIRD_X, player.BIRD_WIDTH))
+            alive = top
+        if config.game_mode != 'play':
+            world = player.Player.snapshot(config.ground)
+            for p in alive:
+                rect = p.draw_lines(window, world)
+                if rect:
+                    dirty.append(rect)
+        dirty.extend(window.blits([p.sprite() for p in alive]))
+        return dirty
 
     def update_live_players(self):
         """
         Actualiza todos los jugadores vivos en la población.
-        Cada jugador observa el entorno, piensa, se dibuja y actualiza su posición.
+        Cada jugador observa el entorno, piensa y actualiza su posición.
         También actualiza el registro del mejor jugador si es necesario.
+        El dibujo se hace aparte, con draw_live_players.
         """
+        # El resumen del mundo se calcula una vez por frame para todos los jugadores
+        world = player.Player.snapshot(config.ground)
         for p in self.players:
             if p.alive:
-                p.look()                 # El jugador observa el entorno
+                p.look(world)            # El jugador observa el entorno
                 p.think()                # El jugador decide si aletear
-                p.draw(config.window)    # Se dibuja el jugador en la ventana
-                p.update(config.ground)  # Se actualiza su posición
+                p.update(config.ground, world)  # Se actualiza su posición
                 
                 # Actualizar el registro del mejor jugador si este ha sobrevivido más tiempo
                 if p.lifespan > self.best_fitness:
                     self.best_fitness = p.lifespan
                     self.best_player = p
 
+    def record_lifespans(self, lifespans):
+        """
+        Asigna a cada jugador el tiempo de vida obtenido fuera de
+        update_live_players (p. ej. en otros procesos) y lo da por muerto.
+        También actualiza el registro del mejor jugador.
+        
+        Args:
+            lifespans: Tiempo de vida de cada jugador, en el orden de self.players
+        """
+        for p, lifespan in zip(self.players, lifespans):
+            p.lifespan = lifespan
+            p.alive = False
+            if p.lifespan > self.best_fitness:
+                self.best_fitness = p.lifespan
+                self.best_player = p
+
     def natural_selection(self):
         """
         Realiza el proceso de selección natural al finalizar una generación.
@@ -78,23 +139,57 @@ class Population:
         Agrupa a los jugadores en especies basándose en la similitud entre sus cerebros.
         Si un jugador es similar a una especie existente, se añade a ella.
         En caso contrario, se crea una nueva especie para ese jugador.
+
+        Las distancias se calculan en bloque con una matriz jugadores x especies;
+        el resultado es el mismo que comparar jugador a jugador y especie a especie.
         """
         # Limpiar jugadores de todas las especies
         for s in self.species:
             s.players = []
+        if not self.players:
+            return
 
-        # Asignar cada jugador a una especie
-        for p in self.players:
-            add_to_species = False
-            # Buscar una especie compatible para el jugador
-            for s in self.species:
-                if s.similarity(p.brain):
-                    s.add_to_species(p)  # Añadir a la especie existente
-                    add_to_species = True
-                    break
-            # Si no hay especie compatible, crear una nueva
-            if not add_to_species:
-                self.species.append(species.Species(p))
+        plans = {p.brain.plan.key for p in self.players}
+        plans.update(s.benchmark_brain.plan.key for s in self.species)
+        if len(plans) == 1:
+            weights = brain.weight_matrix([p.brain for p in self.players])
+            representatives = np.array([s.representative for s in self.species])
+        else:
+            # Topologías distintas (mutaciones estructurales): alinear por conexión
+            genomes = [(p.brain.plan, p.brain.weights) for p in self.players]
+            genomes += [(s.benchmark_brain.plan, s.representative) for s in self.species]
+            aligned = species.align(genomes)
+            weights, representatives = aligned[:len(self.players)], aligned[len(self.players):]
+        choice = np.full(len(self.players), -1)  # Especie asignada a cada jugador
+
+        # Primera especie compatible (distancia por debajo de su umbral) entre las existentes
+        if self.species:
+            thresholds = np.array([s.threshold for s in self.species])
+            compatible = species.distance_matrix(weights, representatives) < thresholds
+            found = compatible.any(axis=1)
+            choice[found] = compatible.argmax(axis=1)[found]
+
+        # Los jugadores sin especie fundan especies nuevas, en orden: el primero
+        # funda una y se le unen los siguientes compatibles con ella
+        founders = set()
+        unmatched = np.flatnonzero(choice < 0)
+        while unmatched.size:
+            first, rest = unmatched[0], unmatched[1:]
+            new_species = species.Species(self.players[first])
+            self.species.append(new_species)
+            founders.add(int(first))
+            choice[first] = len(self.species) - 1
+
+            # El fundador es el representante (su fila ya está alineada con el resto)
+            distances = species.distance_matrix(weights[rest], weights[first][None])[:, 0]
+            close = distances < new_species.threshold
+            choice[rest[close]] = len(self.species) - 1
+            unmatched = rest[~close]
+
+        # Añadir cada jugador a su especie (el fundador ya está en la suya)
+        for i, (p, s) in enumerate(zip(self.players, choice.tolist())):
+            if i not in founders:
+                self.species[s].add_to_species(p)
 
     def calculate_fitness(self):
         """
@@ -169,32 +264,74 @@ class Population:
         """
         Crea la siguiente generación de jugadores.
         Incluye el campeón de cada especie y genera descendencia proporcional al fitness.
+        
+        La reproducción solo produce genomas; después se reinician en el sitio
+        los objetos Player del pool con esos genomas, sin construir jugadores nuevos.
         """
-        children = []  # Lista para la nueva generación
+        children = []  # Genomas de la nueva generación
 
         # Añadir un clon del campeón de cada especie (elitismo)
         for s in self.species:
             children.append(s.champion.clone())
 
         # Distribuir el resto de slots entre las especies según su fitness
+        crossover_rate = self.operators.crossover_rate
+        parents = []
         children_per_species = math.floor((self.size - len(self.species)) / len(self.species))
         for s in self.species:
-            # Generar descendencia para cada especie
+            # Elegir los padres de la descendencia de cada especie
             for i in range(0, children_per_species):
-                children.append(s.offspring())
+                parents.append(s.pick_parents(crossover_rate))
 
         # Si aún faltan jugadores, llenarlos con descendencia de la mejor especie
-        while len(children) < self.size:
-            children.append(self.species[0].offspring())
+        while len(children) + len(parents) < self.size:
+            parents.append(self.species[0].pick_parents(crossover_rate))
+
+        # Cruzar y mutar a todos los hijos a la vez
+        children.extend(self.operators.breed(parents))
 
-        # Reemplazar la población anterior con los nuevos jugadores
-        self.players = []
-        for child in children:
-            self.players.append(child)
+        # El mejor jugador sobrevive a la reutilización del pool como copia propia
+        if any(p is self.best_player for p in self.pool):
+            self.best_player = self.best_player.clone()
+        
+        # Reemplazar la población anterior reutilizando los jugadores del pool
+        while len(self.pool) < len(children):
+            self.pool.append(player.Player(children[len(self.pool)].brain))
+        self.players = self.pool[:len(children)]
+        for p, child in zip(self.players, children):
+            p.reset(child.brain, child.fitness)
         
         # Incrementar el contador de generaciones
         self.generation += 1
 
+    def emigrants(self, count):
+        """
+        Genomas de los mejores jugadores de la generación recién evaluada,
+        para enviarlos a otra isla (ver islands.py).
+
+        Args:
+            count: Número de genomas
+
+        Returns:
+            Lista de genomas, del mejor al peor
+        """
+        best = heapq.nlargest(count, self.players, key=operator.attrgetter('lifespan'))
+        return [player.Genome(p.brain.clone(), p.lifespan) for p in best]
+
+    def immigrate(self, genomes):
+        """
+        Introduce en la nueva generación genomas llegados de otra isla. Ocupan
+        el lugar de los últimos hijos; los clones de los campeones, al principio
+        de la lista, nunca se sustituyen.
+
+        Args:
+            genomes: Genomas recibidos (sus planes pueden venir de otro proceso)
+        """
+        free = max(0, len(self.players) - len(self.species))
+        for p, genome in zip(reversed(self.players), genomes[:free]):
+            genome.brain.plan = brain.intern_plan(genome.brain.plan)
+            p.reset(genome.brain, genome.fitness)
+
     def extinct(self):
         """
         Verifica si todos los jugadores han muerto (están extintos).
@@ -208,47 +345,25 @@ class Population:
                 extinct = False
         return extinct
         
-    def save_best_player(self):
+    def save_best_player(self, directory='models'):
         """
-        Guarda el mejor jugador encontrado como un archivo CSV.
-        También guarda un archivo de información con detalles sobre el modelo.
+        Guarda el mejor jugador encontrado en el registro de modelos del
+        directorio, junto con la generación, el fitness y la población.
+        
+        Args:
+            directory: Directorio donde se guardan los modelos
+
+        Returns:
+            Número del modelo guardado (o None si no hay jugador)
         """
         if self.best_player:
-            # Crear directorio models si no existe
-            if not os.path.exists('models'):
-                os.makedirs('models')
-            
-            # Encontrar el siguiente número modelo disponible
-            model_num = 1
-            while os.path.exists(f'models/modelo{model_num}.csv'):
-                model_num += 1
+            models = registry.ModelRegistry(directory)
+            model_id = models.save(self.best_player.brain, self.generation, self.best_fitness,
+                                   self.size, self.iterations_limit)
             
-            filename = f'models/modelo{model_num}.csv'
-            
-            # Guardar los pesos en un archivo CSV
-            with open(filename, 'w', newline='') as f:
-                writer = csv.writer(f)
-                for conn in self.best_player.brain.connections:
-                    writer.writerow([conn.weight])
-            
-            print(f"Modelo guardado como: {filename}")
+            print(f"Modelo guardado como: modelo{model_id} ({models.data_path})")
             print(f"Generaciones: {self.generation}, Fitness: {self.best_fitness}")
-            
-            # Guardar información del modelo en un archivo de texto
-            with open(f'models/modelo{model_num}_info.txt', 'w') as f:
-                f.write(f"Generaciones: {self.generation}\n")
-                f.write(f"Fitness: {self.best_fitness}\n")
-                f.write(f"Fecha de creacion: {import_datetime().now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Poblacion: {self.size}\n")
-                f.write(f"Iteraciones: {self.iterations_limit}\n")
+            return model_id
         else:
             print("No hay jugador para guardar")
-
-# Función auxiliar para importar datetime solo cuando es necesario
-def import_datetime():
-    """
-    Importa el módulo datetime solo cuando es necesario.
-    Esto evita importarlo al inicio del archivo si no se usa.
-    """
-    import datetime
-    return datetime.datetime
\ No newline at end of file
+            return None
@@ -0,0 +1,284 @@
+"""
+Registro de modelos guardados.
+
+Todos los modelos de un directorio se guardan en dos archivos binarios en los
+que solo se añaden datos:
+
+- models.bin: la topología (NetworkPlan.describe en CSV) y los pesos (float64)
+  de cada modelo, uno detrás de otro.
+- models.idx: un registro de tamaño fijo por modelo con la posición de sus
+  datos, la generación, el fitness, la población, el límite de iteraciones y
+  la fecha. El modelo N está en la posición (N - 1) * tamaño del registro.
+
+Guardar un modelo es añadir sus datos y un registro; consultar o cargar uno es
+leer un registro y un bloque de datos, sin recorrer el directorio ni los demás
+modelos. Los datos se escriben antes que el registro del índice: si el proceso
+se corta a mitad, el modelo incompleto simplemente no aparece.
+
+Los modelos antiguos (modeloN.csv con su modeloN_info.txt) se importan con
+import_legacy(), que el menú llama al arrancar; los ya importados se anotan en
+legacy.txt, así que una importación interrumpida continúa en la siguiente.
+"""
+import csv
+import io
+import os
+import re
+import struct
+import time
+from array import array
+from collections import namedtuple
+from datetime import datetime
+import brain
+import player
+
+DATA_FILE = 'models.bin'
+INDEX_FILE = 'models.idx'
+LEGACY_FILE = 'legacy.txt'  # Números de los modelos CSV ya importados, uno por línea
+
+# Posición y longitud de la topología y de los pesos, generación, fitness,
+# población, límite de iteraciones (-1 = sin límite) y fecha (segundos epoch)
+RECORD = struct.Struct('<qqqqqqqqd')
+
+Model = namedtuple('Model', ['id', 'generation', 'fitness', 'population', 'iterations',
+                             'timestamp', 'topology', 'weights'])
+
+
+class ModelRegistry:
+    """
+    Registro de modelos de un directorio, con acceso directo por número.
+    """
+    def __init__(self, directory='models'):
+        """
+        Args:
+            directory: Directorio de los modelos (se crea al guardar el primero)
+        """
+        self.directory = directory
+        self.data_path = os.path.join(directory, DATA_FILE)
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self._plans = {}  # Clave de topología -> bloque ya guardado en esta sesión
+        self._parsed = {}  # Topología guardada -> plan compilado
+
+    def __len__(self):
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // RECORD.size
+
+    def save(self, net, generation, fitness, population=0, iterations=None, timestamp=None):
+        """
+        Añade un modelo al registro.
+
+        Args:
+            net: Cerebro del modelo
+            generation: Generación en la que se guardó
+            fitness: Fitness del modelo
+            population: Tamaño de la población que lo entrenó
+            iterations: Límite de generaciones del entrenamiento (None = sin límite)
+            timestamp: Fecha de creación (None = ahora)
+
+        Returns:
+            Número del modelo
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.data_path, 'ab') as data:
+            offset = data.tell()
+            topology = self._plans.get(net.plan.key)
+            if topology is None:
+                text = io.StringIO()
+                csv.writer(text).writerows(net.plan.describe())
+                encoded = text.getvalue().encode()
+                data.write(encoded)
+                topology = (offset, len(encoded))
+                offset += len(encoded)
+            weights = net.weights.tobytes()
+            data.write(weights)
+            data.flush()
+            os.fsync(data.fileno())
+        self._plans[net.plan.key] = topology
+
+        with open(self.index_path, 'ab') as index:
+            # Un registro a medias (corte durante la escritura) se descarta
+            size = index.tell()
+            if size % RECORD.size:
+                index.truncate(size - size % RECORD.size)
+            index.write(RECORD.pack(topology[0], topology[1], offset, len(weights),
+                                    int(generation), int(fitness), int(population),
+                                    -1 if iterations is None else int(iterations),
+                                    time.time() if timestamp is None else timestamp))
+            index.flush()
+            os.fsync(index.fileno())
+            return (size - size % RECORD.size) // RECORD.size + 1
+
+    @staticmethod
+    def _unpack(model_id, fields):
+        (topology_offset, topology_length, weights_offset, weights_length,
+         generation, fitness, population, iterations, timestamp) = fields
+        return Model(model_id, generation, fitness, population,
+                     None if iterations < 0 else iterations, timestamp,
+                     (topology_offset, topology_length), (weights_offset, weights_length))
+
+    def get(self, model_id):
+        """Datos del modelo con ese número (o None si no existe)."""
+        if not 1 <= model_id <= len(self):
+            return None
+        with open(self.index_path, 'rb') as index:
+            index.seek((model_id - 1) * RECORD.size)
+            return self._unpack(model_id, RECORD.unpack(index.read(RECORD.size)))
+
+    def latest(self, count):
+        """
+        Los últimos modelos guardados, del más reciente al más antiguo.
+
+        Args:
+            count: Número máximo de modelos
+        """
+        total = len(self)
+        first = max(0, total - count)
+        if first == total:
+            return []
+        with open(self.index_path, 'rb') as index:
+            index.seek(first * RECORD.size)
+            data = index.read((total - first) * RECORD.size)
+        models = [self._unpack(first + i + 1, fields)
+                  for i, fields in enumerate(RECORD.iter_unpack(data))]
+        return models[::-1]
+
+    def models(self):
+        """Todos los modelos del registro, en orden de guardado."""
+        if not len(self):
+            return []
+        with open(self.index_path, 'rb') as index:
+            data = index.read(len(self) * RECORD.size)
+        return [self._unpack(i + 1, fields) for i, fields in enumerate(RECORD.iter_unpack(data))]
+
+    def read(self, model):
+        """
+        Bytes de la topología y de los pesos de un modelo.
+
+        Returns:
+            Tupla (topología, pesos)
+        """
+        with open(self.data_path, 'rb') as data:
+            data.seek(model.topology[0])
+            topology = data.read(model.topology[1])
+            data.seek(model.weights[0])
+            weights = data.read(model.weights[1])
+        return topology, weights
+
+    def load(self, model_id):
+        """
+        Carga el cerebro de un modelo.
+
+        Returns:
+            Brain con la topología y los pesos guardados (o None si no existe)
+        """
+        model = self.get(model_id)
+        if model is None:
+            return None
+        return self.make_brain(*self.read(model))
+
+    def make_brain(self, topology, weights):
+        """
+        Crea un cerebro a partir de los bytes leídos con read(). Cada topología
+        distinta se compila una sola vez.
+        """
+        plan = self._parsed.get(topology)
+        if plan is None:
+            plan = brain.plan_from_rows(list(csv.reader(io.StringIO(topology.decode()))))[0]
+            self._parsed[topology] = plan
+        net = brain.Brain(plan.inputs, clone=True)
+        net.set_plan(plan)
+        net.weights = array('d', weights)
+        return net
+
+    def import_legacy(self):
+        """
+        Importa al registro los modelos CSV del formato anterior, en orden de
+        número. Cada modelo importado se anota en legacy.txt, así que se puede
+        llamar siempre: solo importa los que faltan. Los modelos que no se
+        pueden leer se saltan con un aviso.
+
+        Returns:
+            Número de modelos importados
+        """
+        if not os.path.isdir(self.directory):
+            return 0
+        legacy = []
+        for file in os.listdir(self.directory):
+            match = re.fullmatch(r'modelo(\d+)\.csv', file)
+            if match:
+                legacy.append(int(match.group(1)))
+        if not legacy:
+            return 0
+
+        done_path = os.path.join(self.directory, LEGACY_FILE)
+        if os.path.exists(done_path):
+            with open(done_path) as f:
+                done = {int(line) for line in f if line.strip().isdigit()}
+        elif len(self):
+            # Registro de una versión anterior, que importaba los CSV al abrirlo
+            # (en orden de número, como primeros modelos) y podía quedarse a
+            # medias: se dan por importados los que coinciden con esos modelos
+            done = set()
+            records = iter(self.models())
+            for number in sorted(legacy):
+                try:
+                    model = self._read_legacy(number)
+                except ValueError:
+                    break
+                if model is None:
+                    continue
+                record = next(records, None)
+                if record is None or self.read(record)[1] != model[0].weights.tobytes():
+                    break
+                done.add(number)
+            with open(done_path, 'w') as f:
+                f.writelines(f"{number}\n" for number in sorted(done))
+        else:
+            done = set()
+
+        imported = 0
+        for number in sorted(set(legacy) - done):
+            try:
+                model = self._read_legacy(number)
+            except ValueError as e:
+                print(f"No se puede importar modelo{number}: {e}")
+                continue
+            if model is None:
+                continue
+            self.save(*model)
+            with open(done_path, 'a') as f:
+                f.write(f"{number}\n")
+                f.flush()
+                os.fsync(f.fileno())
+            imported += 1
+        if imported:
+            print(f"{imported} modelos CSV importados al registro de {self.directory}")
+        return imported
+
+    def _read_legacy(self, number):
+        """
+        Lee un modelo CSV del formato anterior.
+
+        Returns:
+            Argumentos de save() (o None si los pesos no se pueden cargar)
+
+        Raises:
+            ValueError: Si el archivo de información tiene datos no válidos
+        """
+        p = player.Player()
+        if not p.load_weights_from_csv(os.path.join(self.directory, f'modelo{number}.csv')):
+            return None
+        info = {}
+        info_path = os.path.join(self.directory, f'modelo{number}_info.txt')
+        if os.path.exists(info_path):
+            with open(info_path) as f:
+                for line in f:
+                    key, _, value = line.partition(':')
+                    info[key.strip()] = value.strip()
+        timestamp = None
+        if 'Fecha de creacion' in info:
+            timestamp = datetime.strptime(info['Fecha de creacion'], '%Y-%m-%d %H:%M:%S').timestamp()
+        iterations = info.get('Iteraciones', 'None')
+        return (p.brain, int(info.get('Generaciones', 0)), int(float(info.get('Fitness', 0))),
+                int(info.get('Poblacion', 0)), None if iterations == 'None' else int(iterations),
+                timestamp)
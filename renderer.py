@@ -0,0 +1,164 @@
+"""
+Dibujo por rectángulos sucios (dirty rects).
+
+En lugar de volver a pintar todo el fondo y enviar la ventana completa con
+pygame.display.flip() en cada frame, el Renderer recuerda qué zonas se
+dibujaron, restaura el fondo solo en ellas al empezar el siguiente frame y
+envía a la pantalla únicamente las zonas que cambiaron.
+"""
+import pygame
+
+
+class Renderer:
+    """
+    Lleva la cuenta de las zonas dibujadas en cada frame.
+
+    Uso por frame:
+        renderer.clear()              # Restaura el fondo bajo el frame anterior
+        renderer.add(sprite.draw(w))  # Registra lo que se dibuja
+        renderer.present()            # Actualiza solo las zonas modificadas
+    """
+    def __init__(self, window, background=None):
+        """
+        Args:
+            window: Superficie de la ventana
+            background: Imagen de fondo del tamaño de la ventana (None = negro)
+        """
+        self.window = window
+        self.background = background
+        self.dirty = []  # Zonas dibujadas en este frame
+        self.previous = []  # Zonas dibujadas en el frame anterior
+        self.full_redraw = True  # El primer frame se envía completo
+
+    def restore(self, rect):
+        """Vuelve a pintar el fondo dentro del rectángulo indicado."""
+        if self.background:
+            self.window.blit(self.background, rect, rect)
+        else:
+            self.window.fill((0, 0, 0), rect)
+
+    def clear(self):
+        """Borra lo dibujado en el frame anterior restaurando el fondo."""
+        if self.full_redraw:
+            self.restore(self.window.get_rect())
+        else:
+            for rect in self.previous:
+                self.restore(rect)
+
+    def add(self, rects):
+        """
+        Registra zonas dibujadas en este frame.
+
+        Args:
+            rects: Un rectángulo, una lista de rectángulos o None
+        """
+        if rects is None:
+            return
+        if isinstance(rects, pygame.Rect):
+            self.dirty.append(rects)
+        else:
+            self.dirty.extend(rects)
+
+    def invalidate(self):
+        """Fuerza a redibujar y enviar la ventana completa en el próximo frame."""
+        self.full_redraw = True
+
+    def present(self):
+        """Envía a la pantalla las zonas que cambiaron (las de este frame y las borradas)."""
+        if self.full_redraw:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            pygame.display.update(self.previous + self.dirty)
+        self.previous = self.dirty
+        self.dirty = []
+
+
+class LevelOfDetail:
+    """
+    Nivel de detalle del dibujo de la población.
+
+    Solo los K mejores pájaros vivos se dibujan completos (sprite y líneas de
+    visión); el resto se resume en una franja de densidad. K baja sola cuando
+    dibujar a los pájaros supera el presupuesto de tiempo y vuelve a subir
+    cuando sobra tiempo.
+    """
+    LEVELS = (None, 200, 50, 10, 1)  # Pájaros con detalle completo (None = todos)
+
+    def __init__(self, budget=0.004, patience=10, bin_size=4):
+        """
+        Args:
+            budget: Tiempo máximo (s) para dibujar a los pájaros en cada frame
+            patience: Frames seguidos fuera del presupuesto antes de cambiar de nivel
+            bin_size: Alto en píxeles de cada franja de la superposición de densidad
+        """
+        self.level = 0
+        self.budget = budget
+        self.patience = patience
+        self.slow = 0  # Frames seguidos por encima del presupuesto
+        self.fast = 0  # Frames seguidos muy por debajo del presupuesto
+        self.bin_size = bin_size
+        self.overlay = None
+
+    @property
+    def detail(self):
+        """Número de pájaros con detalle completo (None = todos)."""
+        return self.LEVELS[self.level]
+
+    def label(self):
+        """Texto del nivel actual para el HUD."""
+        return "Detalle: todos" if self.detail is None else f"Detalle: {self.detail} mejores"
+
+    def record(self, elapsed):
+        """
+        Ajusta el nivel según lo que tardó el último dibujo.
+
+        Args:
+            elapsed: Segundos que tardó en dibujarse la población
+        """
+        if elapsed > self.budget:
+            self.slow += 1
+            self.fast = 0
+            if self.slow >= self.patience and self.level < len(self.LEVELS) - 1:
+                self.level += 1
+                self.slow = 0
+        elif elapsed < self.budget / 4:
+            self.fast += 1
+            self.slow = 0
+            # Subir de nivel con más cautela que bajar para no oscilar
+            if self.fast >= self.patience * 10 and self.level > 0:
+                self.level -= 1
+                self.fast = 0
+        else:
+            self.slow = 0
+            self.fast = 0
+
+    def draw_density(self, window, players, x, width):
+        """
+        Dibuja a los jugadores como una franja vertical semi-transparente cuya
+        opacidad depende de cuántos pájaros hay a cada altura.
+
+        Args:
+            window: Superficie donde dibujar
+            players: Jugadores a resumir
+            x: Posición horizontal de la franja
+            width: Ancho de la franja
+
+        Returns:
+            Rectángulo de pantalla modificado
+        """
+        height = window.get_height()
+        if self.overlay is None or self.overlay.get_size() != (width, height):
+            self.overlay = pygame.Surface((width, height), pygame.SRCALPHA)
+
+        bins = [0] * (height // self.bin_size + 1)
+        last = len(bins) - 1
+        for p in players:
+            bins[min(max(p.rect.centery // self.bin_size, 0), last)] += 1
+
+        self.overlay.fill((0, 0, 0, 0))
+        for i, count in enumerate(bins):
+            if count:
+                alpha = min(255, 60 + 15 * count)
+                self.overlay.fill((255, 200, 0, alpha), (0, i * self.bin_size, width, self.bin_size))
+        return window.blit(self.overlay, (x, 0))
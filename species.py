@@ -1,5 +1,68 @@
 import operator
 import random
+import numpy as np
+
+
+# Peso de cada conexión que solo tiene uno de los dos genomas (topologías distintas)
+DISJOINT_WEIGHT = 0.5
+
+
+def align(genomes):
+    """
+    Apila los pesos de genomas con topologías distintas en una matriz cuyas
+    columnas son conexiones identificadas por (ID de origen, ID de destino),
+    rellenando con NaN las conexiones que un genoma no tiene. Así la columna k
+    es la misma conexión en todos los genomas aunque su posición no coincida.
+
+    Args:
+        genomes: Lista de tuplas (plan, pesos)
+
+    Returns:
+        Matriz (genomas x conexiones)
+    """
+    columns = {}  # Conexión -> columna, por orden de aparición
+    for plan, _ in genomes:
+        for gene in plan.genes:
+            columns.setdefault(gene, len(columns))
+    matrix = np.full((len(genomes), len(columns)), np.nan)
+    for i, (plan, weights) in enumerate(genomes):
+        matrix[i, [columns[gene] for gene in plan.genes]] = weights
+    return matrix
+
+
+def distance_matrix(weights, representatives):
+    """
+    Distancia entre cada genoma y cada representante de especie: la suma de
+    las diferencias absolutas de los pesos de las conexiones comunes más
+    DISJOINT_WEIGHT por cada conexión que solo tiene uno de los dos (como
+    Species.weight_difference). Con una sola topología se acumula conexión a
+    conexión en el mismo orden que weight_difference, así que los valores
+    coinciden exactamente.
+
+    Args:
+        weights: Matriz (jugadores x conexiones) con los pesos de cada genoma
+        representatives: Matriz (especies x conexiones) con los pesos representantes,
+                         con las mismas columnas (ver align)
+
+    Returns:
+        Matriz (jugadores x especies) de distancias
+    """
+    ragged = np.isnan(weights).any() or np.isnan(representatives).any()
+
+    distances = np.zeros((len(weights), len(representatives)))
+    disjoint = np.zeros_like(distances)
+    for k in range(weights.shape[1]):
+        difference = np.abs(weights[:, k, None] - representatives[None, :, k])
+        if ragged:
+            # Conexión que solo tiene uno de los dos genomas (o ninguno, si es NaN en ambos)
+            disjoint += np.isnan(weights[:, k, None]) != np.isnan(representatives[None, :, k])
+            difference = np.nan_to_num(difference, nan=0.0)
+        distances += difference
+
+    if ragged:
+        distances += DISJOINT_WEIGHT * disjoint
+    return distances
+
 
 class Species:
     def __init__(self, player):
@@ -9,7 +72,9 @@ class Species:
         self.players.append(player)
         self.benchmark_fitness = player.fitness
         self.benchmark_brain = player.brain.clone()
-        self.champion = player.clone()
+        # Pesos del representante como vector (para comparar en bloque)
+        self.representative = np.array(self.benchmark_brain.weights, dtype=np.float64)
+        self.champion = player.genome()  # Genoma del mejor jugador
         self.staleness = 0
 
     def similarity(self, brain):
@@ -19,11 +84,17 @@ class Species:
     @staticmethod
     def weight_difference(brain_1, brain_2):
         total_weight_difference = 0
-        for i in range(0, len(brain_1.connections)):
-            for j in range(0, len(brain_2.connections)):
-                if i == j:
-                    total_weight_difference += abs(brain_1.connections[i].weight -
-                                                   brain_2.connections[j].weight)
+        # Comparar los pesos de la misma conexión (mismos nodos de origen y destino)
+        weights_2 = dict(zip(brain_2.plan.genes, brain_2.weights))
+        matched = 0
+        for gene, weight_1 in zip(brain_1.plan.genes, brain_1.weights):
+            if gene in weights_2:
+                total_weight_difference += abs(weight_1 - weights_2[gene])
+                matched += 1
+        # Las conexiones que solo tiene uno de los dos cerebros
+        disjoint = len(brain_1.weights) + len(brain_2.weights) - 2 * matched
+        if disjoint:
+            total_weight_difference += DISJOINT_WEIGHT * disjoint
         return total_weight_difference
 
     def add_to_species(self, player):
@@ -34,7 +105,7 @@ class Species:
         if self.players[0].fitness > self.benchmark_fitness:
             self.staleness = 0
             self.benchmark_fitness = self.players[0].fitness
-            self.champion = self.players[0].clone()
+            self.champion = self.players[0].genome()
         else:
             self.staleness += 1
 
@@ -47,10 +118,30 @@ class Species:
         else:
             self.average_fitness = 0
 
-    def offspring(self):
-        baby = self.players[random.randint(1, len(self.players)) - 1].clone()
-        baby.brain.mutate()
-        return baby
+    def pick_parents(self, crossover_rate=0):
+        """
+        Elige al azar los padres de un hijo dentro de la especie.
+
+        Args:
+            crossover_rate: Probabilidad de elegir también un segundo padre
+
+        Returns:
+            Tupla (padre, segundo padre o None)
+        """
+        if crossover_rate and len(self.players) > 1 and random.uniform(0, 1) < crossover_rate:
+            # Dos jugadores distintos (un cruce consigo mismo sería solo una copia)
+            first, second = random.sample(self.players, 2)
+            return first, second
+        return self.players[random.randint(1, len(self.players)) - 1], None
+
+    def offspring(self, operators):
+        """
+        Genoma hijo de la especie (cruce opcional y mutación).
+
+        Args:
+            operators: GeneticOperators de la población
+        """
+        return operators.breed([self.pick_parents(operators.crossover_rate)])[0]
 
 
 
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Los módulos del juego están en la raíz del repositorio y usan pygame sin ventana
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,53 @@
+import pytest
+import autosave
+import config
+import genetics
+import headless
+import population
+import registry
+
+
+@pytest.fixture(autouse=True)
+def headless_config():
+    headless.configure(())
+    yield
+    config.headless = False
+    config.game_mode = None
+    config.hidden_layers = ()
+
+
+def make_population():
+    pop = population.Population(10, genetics.GeneticOperators(1))
+    pop.best_player = pop.players[0]
+    pop.best_fitness = 80
+    return pop
+
+
+def test_save_writes_best_player(tmp_path):
+    pop = make_population()
+    saver = autosave.AutoSaver(str(tmp_path), interval=None)
+    assert saver.save(pop)
+    # La población puede seguir cambiando mientras se escribe la copia
+    expected = list(pop.best_player.brain.weights)
+    pop.best_player.brain.weights[0] += 1
+    saver.close()
+
+    models = registry.ModelRegistry(str(tmp_path))
+    assert saver.last_model == len(models) == 1
+    assert (models.get(1).generation, models.get(1).fitness) == (pop.generation, 80)
+    assert list(models.load(1).weights) == expected
+
+
+def test_saves_every_n_generations(tmp_path):
+    pop = make_population()
+    saver = autosave.AutoSaver(str(tmp_path), interval=None, every_generations=2)
+    saved = []
+    for generation in range(1, 8):
+        pop.generation = generation
+        if saver.update(pop):
+            saved.append(generation)
+        # Dentro de la misma generación no vuelve a guardar
+        assert not saver.update(pop)
+    saver.close()
+    assert saved == [3, 5, 7]
+    assert len(registry.ModelRegistry(str(tmp_path))) == 3
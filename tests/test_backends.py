@@ -0,0 +1,87 @@
+import random
+import pytest
+import budget
+import components
+import config
+import fitness_cache
+import genetics
+import headless
+import parallel
+import population
+
+# Reglas de corte que se prueban (None = sin presupuesto)
+RULES = {
+    'sin límites': None,
+    'frames': dict(max_frames=300),
+    'tuberías': dict(max_pipes=1),
+    'corte anticipado': dict(early_stop=True),
+    'corte anticipado y tuberías': dict(early_stop=True, max_pipes=2),
+}
+
+BACKENDS = ['numpy', 'events', 'parallel']
+
+
+@pytest.fixture(autouse=True)
+def headless_config():
+    yield
+    config.headless = False
+    config.game_mode = None
+    config.hidden_layers = ()
+
+
+def evolve(backend, rules, generations=8, seed=3, cache_size=0, hidden=(), structural=0):
+    """
+    Entrena unas generaciones sobre un recorrido fijo y devuelve, por
+    generación, los tiempos de vida de todos los jugadores y el motivo del corte.
+    """
+    random.seed(seed)
+    headless.configure(hidden)
+    operators = genetics.GeneticOperators(random.getrandbits(64), crossover_rate=0.5,
+                                          node_rate=structural, connection_rate=structural)
+    pop = population.Population(30, operators)
+    limits = None if rules is None else budget.GenerationBudget(**rules)
+    evaluator = parallel.ParallelEvaluator(2) if backend == 'parallel' else None
+    cache = fitness_cache.FitnessCache() if cache_size else None
+    history = []
+    try:
+        for _ in range(generations):
+            course = components.PipeCourse.get(11)
+            headless.run_generation(pop, 'objects' if evaluator else backend, course, cache,
+                                    evaluator, limits)
+            history.append(([p.lifespan for p in pop.players], limits and limits.reason))
+            pop.natural_selection()
+    finally:
+        if evaluator:
+            evaluator.close()
+    return history
+
+
+@pytest.mark.parametrize('rules', list(RULES.values()), ids=list(RULES))
+def test_backends_match_objects(rules):
+    expected = evolve('objects', rules)
+    if rules is not None:
+        # La regla tiene que cortar alguna generación para que la prueba sirva
+        assert any(reason is not None for _, reason in expected)
+    for backend in BACKENDS:
+        assert evolve(backend, rules) == expected, backend
+
+
+@pytest.mark.parametrize('rules', [None, RULES['corte anticipado']], ids=['sin límites', 'corte anticipado'])
+def test_structural_mutations_match_objects(rules):
+    # Topologías distintas en la misma generación (agrupación por plan y especiación alineada)
+    expected = evolve('objects', rules, generations=6, hidden=(2,), structural=0.2)
+    for backend in BACKENDS:
+        assert evolve(backend, rules, generations=6, hidden=(2,), structural=0.2) == expected, backend
+
+
+@pytest.mark.parametrize('rules', list(RULES.values()), ids=list(RULES))
+def test_fitness_cache_does_not_change_lifespans(rules):
+    assert evolve('numpy', rules, cache_size=1000) == evolve('numpy', rules)
+
+
+def test_rounds_resume_where_they_stopped(monkeypatch):
+    # Con rondas cortas los motores por rondas continúan varias veces desde el horizonte anterior
+    monkeypatch.setattr(budget, 'FIRST_HORIZON', 16)
+    expected = evolve('objects', RULES['corte anticipado'])
+    for backend in ('events', 'parallel'):
+        assert evolve(backend, RULES['corte anticipado']) == expected, backend
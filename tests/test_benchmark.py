@@ -0,0 +1,46 @@
+import csv
+import pytest
+import benchmark
+import config
+import headless
+import player
+import registry
+
+
+@pytest.fixture(autouse=True)
+def headless_config():
+    headless.configure(())
+    yield
+    config.headless = False
+    config.game_mode = None
+    config.hidden_layers = ()
+
+
+def test_second_run_uses_cache(tmp_path, monkeypatch):
+    models = registry.ModelRegistry(str(tmp_path))
+    net = player.Player().brain
+    models.save(net, 1, 10)
+    models.save(player.Player().brain, 2, 20)
+    models.save(net, 3, 10)  # Mismos pesos que el primero: se simula una vez
+
+    simulated = []
+    score = benchmark.score
+
+    def counting_score(brains, course_seeds, max_frames):
+        simulated.append(len(brains))
+        return score(brains, course_seeds, max_frames)
+
+    monkeypatch.setattr(benchmark, 'score', counting_score)
+    first = benchmark.benchmark(str(tmp_path), courses=2, max_frames=500)
+    second = benchmark.benchmark(str(tmp_path), courses=2, max_frames=500)
+    assert simulated == [2, 0]
+    assert second == first
+    assert len(first) == 3
+
+    with open(tmp_path / benchmark.LEADERBOARD_FILE) as f:
+        leaderboard = list(csv.DictReader(f))
+    assert [int(row['modelo']) for row in leaderboard] == [row['modelo'] for row in first]
+
+    # Con otro límite de frames los resultados guardados no valen
+    benchmark.benchmark(str(tmp_path), courses=2, max_frames=400)
+    assert simulated[-1] == 2
@@ -0,0 +1,41 @@
+import pytest
+import checkpoint
+import config
+import genetics
+import headless
+import population
+
+
+@pytest.fixture(autouse=True)
+def headless_config():
+    yield
+    config.headless = False
+    config.game_mode = None
+    config.hidden_layers = ()
+
+
+def snapshot(pop):
+    """Estado comparable de una población: generación, mejor fitness y genomas."""
+    return (pop.generation, pop.best_fitness,
+            [(p.lifespan, p.brain.plan.key, list(p.brain.weights)) for p in pop.players])
+
+
+def test_resume_matches_uninterrupted_run(tmp_path):
+    settings = dict(population_size=30, seed=7, max_pipes=6, hidden=(2,),
+                    node_rate=0.1, connection_rate=0.1)
+    expected = headless.train(generations=15, output_dir=str(tmp_path / 'seguido'), **settings)
+
+    checkpoints = str(tmp_path / 'checkpoints')
+    output = str(tmp_path / 'reanudado')
+    headless.train(generations=8, output_dir=output, checkpoint_dir=checkpoints, **settings)
+    resumed = headless.train(generations=15, output_dir=output, checkpoint_dir=checkpoints,
+                             resume=True, **settings)
+    assert snapshot(resumed) == snapshot(expected)
+
+
+def test_restore_rejects_other_population_size(tmp_path):
+    headless.configure(())
+    pop = population.Population(10, genetics.GeneticOperators(1))
+    checkpoint.Checkpoint(str(tmp_path)).save(pop)
+    with pytest.raises(ValueError):
+        checkpoint.Checkpoint(str(tmp_path)).restore(population.Population(12, genetics.GeneticOperators(1)))
@@ -0,0 +1,29 @@
+import pytest
+import config
+import islands
+import registry
+
+
+@pytest.fixture(autouse=True)
+def headless_config():
+    yield
+    config.headless = False
+    config.game_mode = None
+    config.hidden_layers = ()
+
+
+def test_two_islands_migrate_and_save_champion(tmp_path):
+    reports = islands.train_islands(2, migration_interval=1, migrants=2, population_size=15,
+                                    generations=2, seed=4, output_dir=str(tmp_path),
+                                    max_pipes=3)
+    assert [report[0] for report in reports] == [0, 1]
+    assert all(generation == 2 for _, generation, _, _ in reports)
+    # Con dos generaciones hay una sola migración; si llega a tiempo depende
+    # de la velocidad de cada isla, porque no se espera a los migrantes
+    assert all(received in (0, 2) for _, _, _, received in reports)
+
+    models = registry.ModelRegistry(str(tmp_path))
+    assert len(models) == 1
+    champion = models.get(1)
+    assert champion.fitness == max(best for _, _, best, _ in reports)
+    assert champion.population == 30
@@ -0,0 +1,63 @@
+import random
+import pygame
+import components
+
+
+class LegacyPipes:
+    """Tubería del juego original: draw() recalculaba los rectángulos de colisión."""
+    def __init__(self, win_width):
+        self.x = win_width
+        self.bottom_height = random.randint(50, 250)
+        self.top_height = components.Ground.ground_level - self.bottom_height - components.Pipes.opening
+        self.draw()
+
+    def draw(self):
+        self.bottom_rect = pygame.Rect(self.x, components.Ground.ground_level - self.bottom_height,
+                                       components.Pipes.width, self.bottom_height)
+        self.top_rect = pygame.Rect(self.x, 0, components.Pipes.width, self.top_height)
+
+    def update(self):
+        self.x -= 1
+
+
+def test_collision_rects_match_play_loop():
+    # Modo juego original: mover las tuberías, comprobar colisiones y después dibujar
+    random.seed(3)
+    legacy = LegacyPipes(400)
+    random.seed(3)
+    pipe = components.Pipes(400)
+    for _ in range(460):
+        legacy.update()
+        pipe.update()
+        assert pipe.x == legacy.x
+        assert pipe.bottom_rect == legacy.bottom_rect
+        assert pipe.top_rect == legacy.top_rect
+        legacy.draw()
+
+
+def test_collision_rects_match_training_loop():
+    # Modo entrenamiento original: dibujar y mover cada tubería y después comprobar colisiones
+    random.seed(4)
+    legacy = LegacyPipes(400)
+    random.seed(4)
+    pipe = components.Pipes(400)
+    for _ in range(460):
+        legacy.draw()
+        legacy.update()
+        pipe.update()
+        assert pipe.x == legacy.x
+        assert pipe.bottom_rect == legacy.bottom_rect
+        assert pipe.top_rect == legacy.top_rect
+
+
+def test_reused_pipe_starts_like_a_new_one():
+    random.seed(5)
+    queue = components.PipeQueue(capacity=1)
+    queue.spawn(400, 120)
+    for _ in range(460):
+        queue[0].update()
+    queue.popleft()
+    pipe = queue.spawn(400, 80)
+    fresh = components.Pipes(400, 80)
+    assert (pipe.x, pipe.bottom_rect, pipe.top_rect, pipe.passed, pipe.off_screen) == \
+        (fresh.x, fresh.bottom_rect, fresh.top_rect, fresh.passed, fresh.off_screen)
@@ -0,0 +1,52 @@
+import pytest
+import config
+import headless
+import player
+import registry
+
+
+@pytest.fixture(autouse=True)
+def headless_config():
+    headless.configure((2,))
+    yield
+    config.headless = False
+    config.game_mode = None
+    config.hidden_layers = ()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    models = registry.ModelRegistry(str(tmp_path))
+    net = player.Player().brain
+    first = models.save(net, generation=12, fitness=345, population=50, iterations=100,
+                        timestamp=1700000000.0)
+    second = models.save(player.Player().brain, generation=13, fitness=400)
+    assert (first, second) == (1, 2)
+
+    # Un registro nuevo lee lo mismo desde disco
+    models = registry.ModelRegistry(str(tmp_path))
+    assert len(models) == 2
+    model = models.get(first)
+    assert (model.generation, model.fitness, model.population, model.iterations,
+            model.timestamp) == (12, 345, 50, 100, 1700000000.0)
+    assert models.get(second).iterations is None
+    assert [m.id for m in models.latest(5)] == [second, first]
+
+    loaded = models.load(first)
+    assert loaded.plan.key == net.plan.key
+    assert list(loaded.weights) == list(net.weights)
+    assert loaded.feed_forward([0.5, -0.2, 0.1]) == net.feed_forward([0.5, -0.2, 0.1])
+
+
+def test_import_legacy_skips_bad_models_and_only_once(tmp_path):
+    for number, date in ((1, '2024-01-01 10:00:00'), (2, 'ayer'), (3, '2024-01-03 10:00:00')):
+        p = player.Player()
+        with open(tmp_path / f'modelo{number}.csv', 'w') as f:
+            f.writelines(f"{w}\n" for w in p.brain.weights)
+        with open(tmp_path / f'modelo{number}_info.txt', 'w') as f:
+            f.write(f"Generaciones: {number}\nFitness: {number * 10}\nPoblacion: 50\n"
+                    f"Iteraciones: None\nFecha de creacion: {date}\n")
+
+    models = registry.ModelRegistry(str(tmp_path))
+    assert models.import_legacy() == 2
+    assert [(m.generation, m.fitness) for m in models.models()] == [(1, 10), (3, 30)]
+    assert registry.ModelRegistry(str(tmp_path)).import_legacy() == 0
@@ -0,0 +1,69 @@
+"""
+Paso fijo de simulación desacoplado del dibujo.
+
+Cada frame dibujado (a 60 FPS) puede avanzar varios pasos de simulación.
+Con las teclas 1-4 se elige la velocidad: 1x, 10x, 100x o la máxima que
+permita el tiempo del frame. Los pasos se cortan si se agota el presupuesto
+del frame, de modo que la ventana sigue respondiendo aunque la simulación
+sea lenta.
+"""
+import time
+import pygame
+
+
+class FixedTimestep:
+    """
+    Controla cuántos pasos de simulación se ejecutan por frame dibujado.
+    """
+    # Tecla -> pasos por frame (None = tantos como quepan en el frame)
+    SPEEDS = {pygame.K_1: 1, pygame.K_2: 10, pygame.K_3: 100, pygame.K_4: None}
+
+    def __init__(self, fps=60, budget=0.8):
+        """
+        Args:
+            fps: Frames dibujados por segundo
+            budget: Fracción del frame que puede gastar la simulación
+                    (el resto queda para dibujar y atender eventos)
+        """
+        self.multiplier = 1
+        self.frame_budget = budget / fps
+        self.last_steps = 0  # Pasos ejecutados en el último frame
+
+    def handle_event(self, event):
+        """
+        Cambia la velocidad si el evento es una de las teclas 1-4.
+
+        Returns:
+            True si el evento cambió la velocidad
+        """
+        if event and event.type == pygame.KEYDOWN and event.key in self.SPEEDS:
+            self.multiplier = self.SPEEDS[event.key]
+            return True
+        return False
+
+    def label(self):
+        """Texto de la velocidad actual para el HUD."""
+        speed = "máx" if self.multiplier is None else f"{self.multiplier}x"
+        return f"Velocidad: {speed} ({self.last_steps} pasos/frame, teclas 1-4)"
+
+    def run(self, step):
+        """
+        Ejecuta los pasos de simulación de este frame.
+
+        Args:
+            step: Función que avanza la simulación un paso; si devuelve False
+                  no se ejecutan más pasos en este frame
+
+        Returns:
+            Número de pasos ejecutados
+        """
+        start = time.perf_counter()
+        steps = 0
+        while self.multiplier is None or steps < self.multiplier:
+            if step() is False:
+                break
+            steps += 1
+            if time.perf_counter() - start >= self.frame_budget:
+                break
+        self.last_steps = steps
+        return steps
@@ -0,0 +1,331 @@
+"""
+Simulación vectorizada de toda la población con NumPy.
+
+En lugar de recorrer objetos Player uno a uno, el estado de todos los pájaros
+se guarda en arrays (struct-of-arrays): posición, velocidad, aleteo, vida,
+tiempo de vida y visión. Cada frame se resuelve con unas pocas operaciones
+sobre arrays, reproduciendo exactamente la lógica de Player.look, Player.think
+y Player.update.
+"""
+import time
+import numpy as np
+import pygame
+import brain
+import components
+import player
+
+# Geometría fija del pájaro (ver player.py)
+BIRD_X = player.BIRD_X
+BIRD_WIDTH = player.BIRD_WIDTH
+BIRD_HEIGHT = player.BIRD_HEIGHT
+CENTER_X = BIRD_X + BIRD_WIDTH // 2
+HALF_HEIGHT = BIRD_HEIGHT // 2
+
+
+def _rect_rounds():
+    """
+    Comprueba cómo convierte pygame.Rect las coordenadas float.
+    Las versiones recientes redondean (alejándose de cero) y las antiguas truncan.
+    """
+    r = pygame.Rect(0, 0, 1, 1)
+    r.y = 0.5
+    return r.y == 1
+
+
+if _rect_rounds():
+    def rect_coord(values):
+        """Convierte coordenadas float igual que pygame.Rect (redondeo)."""
+        return np.sign(values) * np.floor(np.abs(values) + 0.5)
+else:
+    def rect_coord(values):
+        """Convierte coordenadas float igual que pygame.Rect (truncado)."""
+        return np.trunc(values)
+
+
+def sigmoid(x):
+    """Función sigmoide vectorizada (igual que en Node.activate)."""
+    return 1 / (1 + np.exp(-x))
+
+
+def forward(plan, weights, inputs):
+    """
+    Propagación hacia adelante de un plan sobre muchas filas a la vez.
+
+    Args:
+        plan: NetworkPlan a evaluar
+        weights: Matriz (filas x conexiones) de pesos, o (1 x conexiones) para
+                 evaluar un mismo cerebro con muchas entradas
+        inputs: Matriz (filas x entradas) con la visión
+
+    Returns:
+        Preactivación del nodo de salida de cada fila (antes de la sigmoide)
+    """
+    values = np.zeros((len(inputs), len(plan.node_ids)), dtype=np.float64)
+    values[:, :plan.inputs] = inputs
+    values[:, plan.bias] = 1
+
+    # Se acumula conexión a conexión, en el mismo orden que Brain.feed_forward,
+    # para obtener exactamente los mismos valores que la versión por objetos
+    for n, incoming in plan.order:
+        total = np.zeros(len(inputs), dtype=np.float64)
+        for c, source in incoming:
+            total += weights[:, c] * values[:, source]
+        values[:, n] = sigmoid(total)
+    # El nodo de salida es el único de la última capa, así que es el último del orden
+    return total
+
+
+class BatchBrains:
+    """
+    Todos los cerebros de la población empaquetados en matrices de pesos,
+    una por topología. Cada fila es un cerebro y cada columna una conexión, de
+    modo que la decisión de todos los pájaros se obtiene con operaciones sobre
+    las matrices en lugar de llamar a Brain.feed_forward una vez por pájaro.
+    El coste por frame depende del número de topologías distintas, no del de
+    objetos Node o Connection.
+    """
+    def __init__(self, weights, plan):
+        """
+        Args:
+            weights: Matriz (cerebros x conexiones) con los pesos de cada cerebro
+            plan: NetworkPlan común a todos los cerebros
+        """
+        self.groups = [(plan, weights)]  # (plan, matriz de pesos) por topología
+        self.group = np.zeros(len(weights), dtype=np.int64)  # Grupo de cada cerebro
+        self.local = np.arange(len(weights))  # Fila de cada cerebro dentro de su grupo
+
+    def __len__(self):
+        return len(self.group)
+
+    @classmethod
+    def from_groups(cls, groups):
+        """
+        Args:
+            groups: Lista de (plan, matriz de pesos); los cerebros quedan
+                    numerados en el orden de los grupos
+        """
+        batch = cls(groups[0][1], groups[0][0])
+        batch.groups = list(groups)
+        batch.group = np.repeat(np.arange(len(groups)), [len(w) for _, w in groups])
+        batch.local = np.concatenate([np.arange(len(w)) for _, w in groups])
+        return batch
+
+    @classmethod
+    def from_brains(cls, brains):
+        """
+        Args:
+            brains: Lista de cerebros (pueden tener topologías distintas)
+        """
+        by_plan = {}
+        for i, b in enumerate(brains):
+            by_plan.setdefault(id(b.plan), []).append(i)
+
+        batch = cls(np.empty((0, 0)), brains[0].plan)
+        batch.groups = []
+        batch.group = np.zeros(len(brains), dtype=np.int64)
+        batch.local = np.zeros(len(brains), dtype=np.int64)
+        for g, indices in enumerate(by_plan.values()):
+            batch.groups.append((brains[indices[0]].plan,
+                                 brain.weight_matrix([brains[i] for i in indices])))
+            batch.group[indices] = g
+            batch.local[indices] = np.arange(len(indices))
+        return batch
+
+    def feed_forward(self, vision, rows):
+        """
+        Propagación hacia adelante de varios cerebros a la vez.
+
+        Args:
+            vision: Matriz (pájaros x entradas) con la visión de cada pájaro
+            rows: Índices de los cerebros (filas) a evaluar
+
+        Returns:
+            Array con la salida de cada cerebro evaluado (entre 0 y 1)
+        """
+        if len(self.groups) == 1:
+            plan, weights = self.groups[0]
+            return sigmoid(forward(plan, weights[self.local[rows]], vision[rows]))
+
+        output = np.empty(len(rows), dtype=np.float64)
+        group = self.group[rows]
+        for g, (plan, weights) in enumerate(self.groups):
+            mask = group == g
+            if mask.any():
+                selected = rows[mask]
+                output[mask] = sigmoid(forward(plan, weights[self.local[selected]], vision[selected]))
+        return output
+
+
+class BatchSimulation:
+    """
+    Estado de una generación completa en arrays NumPy.
+    Si se crea desde una población, los objetos Player solo se leen al crear
+    la simulación y se actualizan al final con sync_players().
+    """
+    def __init__(self, brains, pop=None):
+        """
+        Crea el estado de pájaros recién nacidos (igual que Player.__init__).
+
+        Args:
+            brains: BatchBrains con un cerebro por pájaro
+            pop: Población a la que informar del mejor jugador (opcional)
+        """
+        n = len(brains)
+        self.pop = pop
+        self.players = pop.players if pop else None
+        self.brains = brains
+
+        self.y = np.full(n, 200, dtype=np.float64)
+        self.vel = np.zeros(n, dtype=np.float64)
+        self.flap = np.zeros(n, dtype=bool)
+        self.alive = np.ones(n, dtype=bool)
+        self.lifespan = np.zeros(n, dtype=np.int64)
+        self.vision = np.tile(np.array([0.5, 1, 0.5], dtype=np.float64), (n, 1))
+        self.decision = np.zeros(n, dtype=np.float64)
+
+    @classmethod
+    def from_population(cls, pop):
+        """
+        Copia el estado de los jugadores de la población a arrays.
+
+        Args:
+            pop: Población cuyos jugadores se van a simular
+        """
+        players = pop.players
+        sim = cls(BatchBrains.from_brains([p.brain for p in players]), pop)
+        sim.y[:] = [p.rect.y for p in players]
+        sim.vel[:] = [p.vel for p in players]
+        sim.flap[:] = [p.flap for p in players]
+        sim.alive[:] = [p.alive for p in players]
+        sim.lifespan[:] = [p.lifespan for p in players]
+        sim.vision[:] = [p.vision for p in players]
+        return sim
+
+    def extinct(self):
+        return not self.alive.any()
+
+    def look(self, world):
+        """
+        Calcula la visión de todos los pájaros respecto a la tubería más cercana.
+        Equivalente a Player.look.
+        """
+        if world.closest is None:
+            return
+
+        alive = self.alive
+        center_y = self.y[alive] + HALF_HEIGHT
+        self.vision[alive, 0] = np.maximum(0, center_y - world.gap_top) / 500
+        self.vision[alive, 1] = max(0, world.pipe_x - CENTER_X) / 500
+        self.vision[alive, 2] = np.maximum(0, world.gap_bottom - center_y) / 500
+
+    def think(self):
+        """
+        Evalúa el cerebro de todos los pájaros vivos y aplica el aleteo.
+        Equivalente a Player.think y Player.bird_flap.
+        """
+        rows = np.flatnonzero(self.alive)
+        self.decision[rows] = self.brains.feed_forward(self.vision, rows)
+
+        wants = self.alive & (self.decision > player.FLAP_THRESHOLD)
+        jumps = wants & ~self.flap & (self.y >= 10)
+        self.flap |= jumps
+        self.vel[jumps] = -6
+        self.flap[wants & (self.vel >= 3)] = False
+
+    def collisions(self, world):
+        """
+        Devuelve una máscara con los pájaros que colisionan este frame.
+        Equivalente a Player.update (obstáculos del resumen del mundo y cielo).
+        """
+        top = self.y
+        bottom = self.y + BIRD_HEIGHT
+
+        hit = top < 10
+        for solid_top, solid_bottom in world.solids:
+            hit |= (top < solid_bottom) & (solid_top < bottom)
+        return hit
+
+    def update(self, world):
+        """
+        Aplica gravedad y colisiones a todos los pájaros vivos.
+        Equivalente a Player.update.
+        """
+        hit = self.collisions(world)
+        dying = self.alive & hit
+        moving = self.alive & ~hit
+
+        self.alive[dying] = False
+        self.flap[dying] = False
+        self.vel[dying] = 0
+
+        self.vel[moving] += 0.3
+        self.y[moving] = rect_coord(self.y[moving] + self.vel[moving])
+        self.vel[moving & (self.vel > 6)] = 6
+        self.lifespan[moving] += 1
+
+    def step(self, pipes, ground):
+        """
+        Simula un frame completo de todos los pájaros vivos.
+
+        Args:
+            pipes: Tuberías actuales (config.pipes)
+            ground: Suelo del juego (config.ground)
+        """
+        # El resumen del mundo se calcula una vez por frame para todos los pájaros
+        world = components.WorldSnapshot(pipes, ground, BIRD_X, BIRD_X + BIRD_WIDTH)
+        self.look(world)
+        self.think()
+        self.update(world)
+
+        # Todos los pájaros vivos comparten lifespan, basta con el primero
+        alive = np.flatnonzero(self.alive)
+        if self.pop and alive.size and self.lifespan[alive[0]] > self.pop.best_fitness:
+            self.pop.best_fitness = int(self.lifespan[alive[0]])
+            self.pop.best_player = self.players[alive[0]]
+
+    def sync_players(self):
+        """Copia el estado final de los arrays a los objetos Player."""
+        for i, p in enumerate(self.players):
+            p.rect.y = int(self.y[i])
+            p.vel = float(self.vel[i])
+            p.flap = bool(self.flap[i])
+            p.alive = bool(self.alive[i])
+            p.lifespan = int(self.lifespan[i])
+            p.vision = [float(v) for v in self.vision[i]]
+            p.decision = float(self.decision[i])
+
+
+def simulate(sim, win_width, ground, course, max_frames=None, deadline=None, start=0):
+    """
+    Simula una generación completa con sus propias tuberías, sin usar config.pipes.
+    Puede continuar una simulación detenida en el frame `start` (con el estado
+    de los pájaros de ese frame): las tuberías dependen solo del número de
+    frame, así que basta con volver a avanzarlas hasta él.
+
+    Args:
+        sim: BatchSimulation a simular
+        win_width: Ancho de la ventana
+        ground: Suelo del juego
+        course: PipeCourse con las alturas de las tuberías
+        max_frames: Frames como máximo; los pájaros que sigan vivos se quedan
+                    con ese tiempo de vida (None = hasta que mueran todos)
+        deadline: time.monotonic() en el que detenerse aunque queden pájaros
+                  vivos (None = sin límite de tiempo)
+        start: Frames ya simulados de los pájaros de `sim`
+
+    Returns:
+        Número de frames simulados (contando los `start` anteriores)
+    """
+    pipes = components.PipeQueue(win_width=win_width)
+    spawner = components.PipeSpawner(pipes, win_width, course)
+    for _ in range(start):
+        spawner.update()
+    frames = start
+    while True:
+        spawner.update()
+        if sim.extinct() or frames == max_frames:
+            return frames
+        if deadline is not None and time.monotonic() >= deadline:
+            return frames
+        sim.step(pipes, ground)
+        frames += 1